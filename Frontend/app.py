@@ -5,6 +5,30 @@ import json
 
 BASE_URL = "http://127.0.0.1:8000/api/"
 
+# Largest page the job listings endpoint returns
+JOB_LISTINGS_LIMIT = 1000
+
+
+def get_job_listings(**params):
+    """
+    Fetch one page of job listings, reusing the cached copy when the server answers 304
+    """
+    cache = st.session_state.setdefault('job_listings_cache', {})
+    key = json.dumps(params, sort_keys=True)
+    cached = cache.get(key)
+    headers = {'If-None-Match': cached['etag']} if cached else {}
+
+    response = requests.get(f"{BASE_URL}job_listings/", params=params, headers=headers)
+    if response.status_code == 304:
+        return cached['jobs'], cached['next_cursor']
+    response.raise_for_status()
+
+    jobs = response.json()
+    next_cursor = response.headers.get('X-Next-Cursor')
+    if 'ETag' in response.headers:
+        cache[key] = {'etag': response.headers['ETag'], 'jobs': jobs, 'next_cursor': next_cursor}
+    return jobs, next_cursor
+
 def upload_resume():
     """
     Resume Upload Section
@@ -57,10 +81,10 @@ def match_resume_to_jobs():
     
     # Fetch job listings for matching
     try:
-        response = requests.get(f"{BASE_URL}job_listings/")
+        # Titles only for the dropdown; the selected job is fetched in full
+        jobs, _ = get_job_listings(fields="id,title,company", limit=JOB_LISTINGS_LIMIT)
         
-        if response.status_code == 200:
-            jobs = response.json()
+        if jobs:
             
             # Select job for matching
             job_titles = [job.get('title', 'Untitled Job') for job in jobs]
@@ -68,6 +92,8 @@ def match_resume_to_jobs():
             
             # Find selected job
             selected_job = next((job for job in jobs if job.get('title') == selected_job_title), None)
+            if selected_job:
+                selected_job = get_job_listings(ids=selected_job['id'])[0][0]
             
             if st.button("Match Resume"):
                 if selected_job:
@@ -119,15 +145,91 @@ def match_resume_to_jobs():
                 
                 else:
                     st.warning("Please select a job")
+            
+            # Score against every listed job, several jobs per LLM call
+            if st.button("Match All Jobs") and jobs:
+                batch_response = requests.post(
+                    f"{BASE_URL}match_batch/",
+                    json={
+                        'candidate': dict(st.session_state.parsed_resume),
+                        'job_ids': [job['id'] for job in jobs[:100]]
+                    }
+                )
+                
+                if batch_response.status_code == 200:
+                    st.subheader("Match Results for All Jobs")
+                    for result in batch_response.json().get('results', []):
+                        st.write(f"**{result['job_title']}** at {result['company']}: {result['match_score']}/100")
+                        if result.get('missing_skills'):
+                            st.write(f"Missing skills: {', '.join(result['missing_skills'])}")
+                        st.write(result.get('summary', ''))
+                else:
+                    st.error(f"Batch matching failed: {batch_response.text}")
         else:
-            st.error("Failed to fetch job listings for matching")
+            st.warning("No job listings found")
     
     except Exception as e:
         st.error(f"Error in job matching: {e}")
         # Optional: print full traceback for debugging
         import traceback
         st.error(traceback.format_exc())
-        
+
+    show_top_jobs()
+
+
+def show_top_jobs():
+    """
+    Rank every job for the parsed resume in a single request
+    """
+    st.subheader("🏆 Best Matching Jobs")
+
+    top_k = st.number_input("Number of jobs", min_value=1, max_value=100, value=10)
+
+    if st.button("Rank All Jobs"):
+        try:
+            rank_response = requests.post(
+                f"{BASE_URL}rank_jobs/",
+                json={'candidate': dict(st.session_state.parsed_resume), 'top_k': int(top_k)}
+            )
+
+            if rank_response.status_code == 200:
+                ranked_jobs = rank_response.json()
+
+                if not ranked_jobs:
+                    st.info("No job listings available yet.")
+
+                for job in ranked_jobs:
+                    with st.expander(f"{job.get('match_score', 0)}% - {job.get('job_title', 'Untitled Job')} at {job.get('company', 'Unknown Company')}"):
+                        missing_skills = job.get('missing_skills', [])
+                        if missing_skills:
+                            st.write("**Missing Skills:** " + ", ".join(missing_skills))
+                        else:
+                            st.write("✅ No missing skills!")
+            else:
+                st.error(f"Ranking failed: {rank_response.text}")
+
+        except Exception as e:
+            st.error(f"Error ranking jobs: {e}")
+
+
+def stream_cover_letter(response):
+    """
+    Yield cover letter text from a server-sent event stream
+    """
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+            if event == "error":
+                st.error(f"Cover letter generation failed: {data.get('error')}")
+            elif "delta" in data:
+                yield data["delta"]
+        elif not line:
+            event = None
+
+
 def generate_cover_letter():
     """
     Cover Letter Generation Section
@@ -141,10 +243,10 @@ def generate_cover_letter():
 
     try:
         # Fetch job listings
-        response = requests.get(f"{BASE_URL}job_listings/")
+        # Titles only for the dropdown; the selected job is fetched in full
+        jobs, _ = get_job_listings(fields="id,title,company", limit=JOB_LISTINGS_LIMIT)
         
-        if response.status_code == 200:
-            jobs = response.json()
+        if jobs:
             
             # Select job for cover letter
             job_titles = [job.get('title', 'Untitled Job') for job in jobs]
@@ -152,6 +254,8 @@ def generate_cover_letter():
             
             # Find selected job
             selected_job = next((job for job in jobs if job.get('title') == selected_job_title), None)
+            if selected_job:
+                selected_job = get_job_listings(ids=selected_job['id'])[0][0]
             
             if st.button("Generate Cover Letter"):
                 if selected_job:
@@ -172,27 +276,21 @@ def generate_cover_letter():
                     # Debug: Print payload
                     st.write("Payload being sent:", json.dumps(cover_letter_payload, indent=2))
                     
-                    # Send cover letter generation request
+                    # Stream the cover letter as it is written
                     try:
                         cover_letter_response = requests.post(
                             f"{BASE_URL}generate_cover_letter/",
-                            json=cover_letter_payload,
-                            timeout=30
+                            json={**cover_letter_payload, "stream": True},
+                            stream=True,
+                            # Connect timeout, then the longest wait between chunks
+                            timeout=(5, 60)
                         )
                         
-                        # Debug response
-                        st.write(f"Response Status: {cover_letter_response.status_code}")
-                        st.write(f"Response Content: {cover_letter_response.text}")
-                        
                         if cover_letter_response.status_code == 200:
-                            # Parse the response
-                            response_data = cover_letter_response.json()
-                            cover_letter = response_data.get('cover_letter', '')
+                            st.subheader("Generated Cover Letter")
+                            cover_letter = st.write_stream(stream_cover_letter(cover_letter_response))
                             
                             if cover_letter:
-                                st.subheader("Generated Cover Letter")
-                                st.text_area("Cover Letter", cover_letter, height=400)
-                                
                                 # Add download button
                                 st.download_button(
                                     label="Download Cover Letter",
@@ -212,7 +310,7 @@ def generate_cover_letter():
                 else:
                     st.warning("Please select a job")
         else:
-            st.error("Failed to fetch job listings")
+            st.warning("No job listings found")
     
     except Exception as e:
         st.error(f"Error generating cover letter: {e}")
@@ -225,89 +323,100 @@ def list_jobs():
     """
     st.header("💼 Job Listings")
     
-    # Fetch job listings
     try:
-        response = requests.get(f"{BASE_URL}job_listings/")
+        # Filter options come from a light projection of the listings
+        facets, _ = get_job_listings(fields="company,required_skills", limit=JOB_LISTINGS_LIMIT)
         
-        if response.status_code == 200:
-            jobs = response.json()
-            
-            # Sidebar for filtering
-            st.sidebar.header("🔍 Job Search Filters")
-            
-            # Collect unique values for filters
-            all_companies = sorted(set(job.get('company', 'Unknown') for job in jobs))
-            all_skills = sorted(set(skill for job in jobs for skill in job.get('required_skills', [])))
-            
-            # Filter widgets
-            selected_companies = st.sidebar.multiselect(
-                "Filter by Companies", 
-                options=all_companies, 
-                default=[]
+        # Sidebar for filtering
+        st.sidebar.header("🔍 Job Search Filters")
+        
+        # Collect unique values for filters
+        all_companies = sorted(set(job.get('company', 'Unknown') for job in facets))
+        all_skills = sorted(set(skill for job in facets for skill in job.get('required_skills', [])))
+        
+        # Filter widgets
+        selected_companies = st.sidebar.multiselect(
+            "Filter by Companies", 
+            options=all_companies, 
+            default=[]
+        )
+        
+        
+        selected_skills = st.sidebar.multiselect(
+            "Filter by Skills", 
+            options=all_skills, 
+            default=[]
+        )
+        match_all_skills = st.sidebar.checkbox("Require all selected skills")
+        
+        # Search box
+        search_term = st.sidebar.text_input("Search Jobs")
+        
+        # Filtering happens on the server, one page at a time
+        filters = {
+            'company': selected_companies,
+            'skill': selected_skills,
+            'skill_match': 'all' if match_all_skills and selected_skills else None,
+            'search': search_term,
+        }
+        if st.session_state.get('job_filters') != filters:
+            st.session_state.job_filters = filters
+            st.session_state.job_cursors = []
+        cursors = st.session_state.setdefault('job_cursors', [])
+        
+        params = {key: value for key, value in filters.items() if value and key != 'search'}
+        if search_term:
+            # Ranked full-text search; the best 50 matches, no paging
+            response = requests.get(
+                f"{BASE_URL}job_search/",
+                params={**params, 'q': search_term, 'prefix': 'true', 'limit': 50}
             )
-            
-            
-            selected_skills = st.sidebar.multiselect(
-                "Filter by Skills", 
-                options=all_skills, 
-                default=[]
+            response.raise_for_status()
+            filtered_jobs, next_cursor = response.json(), None
+            st.write(f"🔎 Best matches for \"{search_term}\": {len(filtered_jobs)}")
+        else:
+            filtered_jobs, next_cursor = get_job_listings(
+                **params,
+                limit=50,
+                cursor=cursors[-1] if cursors else 0
             )
             
-            # Search box
-            search_term = st.sidebar.text_input("Search Jobs")
-            
-            # Apply filters
-            filtered_jobs = jobs
-            
-            if selected_companies:
-                filtered_jobs = [job for job in filtered_jobs if job.get('company') in selected_companies]
-            
-            
-            if selected_skills:
-                filtered_jobs = [
-                    job for job in filtered_jobs 
-                    if any(skill in job.get('required_skills', []) for skill in selected_skills)
-                ]
-            
-            if search_term:
-                filtered_jobs = [
-                    job for job in filtered_jobs
-                    if search_term.lower() in job.get('title', '').lower() or 
-                       search_term.lower() in job.get('description', '').lower()
-                ]
-            
             # Display job count
-            st.write(f"🔢 Total Jobs Found: {len(filtered_jobs)}")
-            
-            # Job display
-            for job in filtered_jobs:
-                with st.expander(f"📋 {job.get('title', 'Untitled Job')} at {job.get('company', 'Unknown Company')}"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.write(f"**Company:** {job.get('company', 'N/A')}")
-                        st.write(f"**Location:** {job.get('location', 'N/A')}")
-                        st.write(f"**Job Type:** {job.get('job_type', 'N/A')}")
-                    
-                    with col2:
-                        st.write(f"**Salary Range:** {job.get('salary_range', 'Not Disclosed')}")
-                        st.write(f"**Posted Date:** {job.get('posted_date', 'N/A')}")
-                    
-                    st.write("**Job Description:**")
-                    st.write(job.get('description', 'No description available'))
-                    
-                    st.write("**Required Skills:**")
-                    skills = job.get('required_skills', [])
-                    if skills:
-                        skill_cols = st.columns(min(len(skills), 5))
-                        for i, skill in enumerate(skills[:5]):
-                            skill_cols[i].badge(skill)
-                    else:
-                        st.write("No specific skills listed")
-                    
+            st.write(f"🔢 Jobs on this page: {len(filtered_jobs)} (page {len(cursors) + 1})")
         
-        else:
-            st.error("Failed to fetch job listings")
+        col_prev, col_next = st.columns(2)
+        if cursors and col_prev.button("⬅️ Previous page"):
+            cursors.pop()
+            st.rerun()
+        if next_cursor and col_next.button("Next page ➡️"):
+            cursors.append(next_cursor)
+            st.rerun()
+        
+        # Job display
+        for job in filtered_jobs:
+            with st.expander(f"📋 {job.get('title', 'Untitled Job')} at {job.get('company', 'Unknown Company')}"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.write(f"**Company:** {job.get('company', 'N/A')}")
+                    st.write(f"**Location:** {job.get('location', 'N/A')}")
+                    st.write(f"**Job Type:** {job.get('job_type', 'N/A')}")
+                
+                with col2:
+                    st.write(f"**Salary Range:** {job.get('salary_range', 'Not Disclosed')}")
+                    st.write(f"**Posted Date:** {job.get('posted_date', 'N/A')}")
+                
+                st.write("**Job Description:**")
+                st.write(job.get('snippet') or job.get('description', 'No description available'))
+                
+                st.write("**Required Skills:**")
+                skills = job.get('required_skills', [])
+                if skills:
+                    skill_cols = st.columns(min(len(skills), 5))
+                    for i, skill in enumerate(skills[:5]):
+                        skill_cols[i].badge(skill)
+                else:
+                    st.write("No specific skills listed")
     
     except Exception as e:
         st.error(f"Error fetching job listings: {e}")
@@ -318,17 +427,59 @@ def view_match_results():
     """
     st.header("📊 Match Results")
 
-    # Fetch match results
+    # Score distribution and most common gaps, computed on the server
     try:
-        response = requests.get(f"{BASE_URL}match-results/")
+        stats_response = requests.get(f"{BASE_URL}match-results/stats/", params={'top_skills': 10})
+        if stats_response.status_code == 200:
+            stats = stats_response.json()
+            if stats.get('count'):
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Matches", stats['count'])
+                    st.metric("Average score", f"{stats['average_score']}%")
+                    st.bar_chart(
+                        [
+                            {'score': f"{bucket['min_score']}-{bucket['max_score']}", 'matches': bucket['count']}
+                            for bucket in stats['histogram']
+                        ],
+                        x='score',
+                        y='matches'
+                    )
+                with col2:
+                    st.write("**Most common missing skills:**")
+                    for skill in stats['missing_skills']:
+                        st.write(f"- {skill['skill']} ({skill['count']})")
+    except Exception as e:
+        st.warning(f"Could not load match statistics: {e}")
+
+    col_csv, col_ndjson = st.columns(2)
+    col_csv.link_button("⬇️ Export CSV", f"{BASE_URL}match-results/export.csv")
+    col_ndjson.link_button("⬇️ Export NDJSON", f"{BASE_URL}match-results/export.ndjson")
+
+    # Fetch one page of match results, newest first
+    cursors = st.session_state.setdefault('match_result_cursors', [])
+    try:
+        params = {'limit': 50}
+        if cursors:
+            params['cursor'] = cursors[-1]
+        response = requests.get(f"{BASE_URL}match-results/", params=params)
         
         if response.status_code == 200:
             match_results = response.json()
+            next_cursor = response.headers.get('X-Next-Cursor')
             
             if not match_results:
                 st.info("No match results available yet.")
                 return
             
+            col_prev, col_next = st.columns(2)
+            if cursors and col_prev.button("⬅️ Newer results"):
+                cursors.pop()
+                st.rerun()
+            if next_cursor and col_next.button("Older results ➡️"):
+                cursors.append(next_cursor)
+                st.rerun()
+            
             # Display match results
             for result in match_results:
                 with st.expander(f"Match Result for {result.get('candidate_name', 'Unknown')} - {result.get('job_title', 'Unknown')}"):
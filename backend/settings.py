@@ -1,4 +1,5 @@
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'matcher.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,11 +67,52 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default, in WAL mode (see matcher/database.py). Write
+# transactions take the lock up front and wait up to `timeout` seconds for
+# it instead of failing with "database is locked".
+# Set POSTGRES_DB (with POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST and
+# POSTGRES_PORT) to use PostgreSQL; this needs `pip install "psycopg[binary,pool]"`.
+# Connections persist for CONN_MAX_AGE seconds, or with POSTGRES_POOL=1 come
+# from a psycopg pool in each process (Django does not allow both).
+
+if os.getenv('POSTGRES_DB'):
+    POSTGRES_POOL = os.getenv('POSTGRES_POOL', '') not in ('', '0', 'false')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB'),
+            'USER': os.getenv('POSTGRES_USER', ''),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', ''),
+            'PORT': os.getenv('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pool': {'min_size': 2, 'max_size': 20, 'timeout': 10}} if POSTGRES_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
     }
+
+
+# Pragmas for every SQLite connection (see matcher/database.py)
+
+DATABASE_TUNING = {
+    'SQLITE_PRAGMAS': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'cache_size': -20000,
+        'temp_store': 'memory',
+        'mmap_size': 134217728,
+    },
 }
 
 
@@ -113,3 +156,155 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# LLM result cache (see matcher/cache.py)
+
+LLM_CACHE = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,
+    'TTL': 7 * 24 * 60 * 60,
+    'PERSISTENT_BACKEND': 'sqlite',  # 'sqlite', 'django' or None
+    'PERSISTENT_MAX_ENTRIES': 100_000,
+    'PATH': BASE_DIR / 'llm_cache.sqlite3',
+}
+
+
+# Candidate/job matching (see matcher/scoring.py)
+# 'local' never calls the LLM, 'llm' always does, 'hybrid' only for
+# local scores inside MATCH_BORDERLINE.
+
+MATCH_MODE = 'hybrid'
+MATCH_BORDERLINE = (40, 70)
+MATCH_LLM_SUMMARY = False
+
+# Prompt compaction (see matcher/prompts.py): token budgets for free text
+# sent to the model.
+PROMPTS = {
+    'DESCRIPTION_TOKENS': 250,
+    'EXPERIENCE_TOKENS': 300,
+    'MAX_LIST_ITEMS': 30,
+}
+
+# Several jobs are scored per LLM call when matching one candidate against
+# many (see match_candidate_to_jobs in matcher/utils.py).
+MATCH_BATCH = {
+    'TOKEN_BUDGET': 8000,  # estimated prompt + completion tokens per call
+    'MAX_JOBS': 20,
+    'OUTPUT_TOKENS_PER_JOB': 90,
+    'WORKERS': 4,
+}
+
+
+# Background re-scoring of stale match results (see matcher/rescoring.py)
+# MAX_RATE is in candidate/job pairs per second.
+
+RESCORING = {
+    'IN_PROCESS': True,
+    'DEBOUNCE': 30,
+    'MAX_RATE': 2.0,
+    'BATCH_SIZE': 20,
+}
+
+
+# Semantic search index (see matcher/embeddings.py)
+
+EMBEDDINGS = {
+    'EMBEDDER': 'matcher.embeddings.HashingEmbedder',
+    'DIM': 256,
+    'DIR': BASE_DIR / 'embeddings',
+}
+
+
+# Full-text job search (see matcher/search.py)
+# WEIGHTS are the BM25 weights of title, company and description matches.
+
+JOB_SEARCH = {
+    'WEIGHTS': [10.0, 5.0, 1.0],
+    'SNIPPET_TOKENS': 16,
+    'SNIPPET_MARKERS': ['**', '**'],
+}
+
+
+# Bulk job posting import (see matcher/imports.py)
+# Requests to /api/jobs/import/ take at most MAX_API_ROWS postings; use
+# "manage.py import_jobs" for larger files.
+
+JOB_IMPORT = {
+    'CONCURRENCY': 16,
+    'BATCH_SIZE': 500,
+    'MAX_API_ROWS': 10000,
+}
+
+
+# Background resume parsing (see matcher/resume_queue.py)
+
+RESUME_QUEUE = {
+    'WORKERS': 4,
+    'IN_PROCESS': True,
+    'STALE_AFTER': 600,
+    'MAX_ATTEMPTS': 3,
+}
+
+
+# PDF text extraction (see matcher/extraction.py)
+# 'auto' uses pypdfium2 and falls back to pdfplumber for pages without a text layer.
+
+PDF_EXTRACTION = {
+    'ENGINE': 'auto',
+    'MAX_PAGES': 50,
+}
+
+
+# Keep a copy of every uploaded resume, stored once per distinct file
+# under resumes/<sha256>.<ext>. Parsing never needs it.
+
+STORE_RESUME_UPLOADS = False
+
+
+# OpenAI gateway (see matcher/llm.py)
+# API_KEY and BASE_URL default to the OPENAI_API_KEY and OPENAI_BASE_URL
+# environment variables.
+
+LLM_GATEWAY = {
+    'TIMEOUT': 60.0,
+    'CONNECT_TIMEOUT': 5.0,
+    'MAX_RETRIES': 4,
+    'MAX_CONNECTIONS': 64,
+    'MAX_CONCURRENCY': 16,
+    'ASYNC_MAX_CONCURRENCY': 256,  # per event loop (async views)
+    'RATE_LIMIT': None,  # requests per second
+    'BURST': 10,
+}
+
+
+# LLM token budgets and usage ledger (see matcher/usage.py)
+# Budgets are counted in the Django cache; None means unlimited. Calls that
+# would overrun them wait up to MAX_WAIT seconds, then fall back to a local
+# score or a short cover letter, or get a 429.
+# No CACHES are configured, so the default per-process memory cache holds
+# the counters and each worker process gets the whole budget. To share them
+# between processes, configure a cache with atomic increments, e.g.
+#     CACHES = {'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }}
+# DatabaseCache is shared too, but increments there can lose concurrent
+# updates.
+
+LLM_BUDGET = {
+    'TOKENS_PER_MINUTE': None,
+    'TOKENS_PER_DAY': None,
+    'MAX_WAIT': 10,
+    'LEDGER': True,
+}
+
+
+# Request metrics and the /metrics endpoint (see matcher/metrics.py)
+# LOG_REQUESTS writes one JSON line per request to the "matcher.metrics"
+# logger at INFO level.
+
+METRICS = {
+    'ENABLED': True,
+    'LOG_REQUESTS': True,
+}
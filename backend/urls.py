@@ -2,8 +2,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from matcher.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("api/", include("matcher.urls"))
+    path("api/", include("matcher.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
 
@@ -0,0 +1,61 @@
+"""Measure time-to-first-byte and total time for buffered vs streamed cover letters.
+
+Start the stub LLM and the app, then run the client:
+
+    python benchmarks/stub_llm.py --port 8100 --latency 0.3 --token-delay 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 python manage.py runserver
+    python benchmarks/bench_cover_letter_stream.py --url http://127.0.0.1:8000
+
+Each request uses a new candidate so the letter cache is missed; --cached
+repeats one pair instead.
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def payload(tag):
+    return {
+        "candidate": {"name": f"Bench {tag}", "skills": ["Python", "Django"], "work_experience": []},
+        "job": {"title": "Backend Engineer", "company": "Bench Co", "required_skills": ["Python", "Kubernetes"]},
+    }
+
+
+def timed_request(client, path, body, stream):
+    started = time.perf_counter()
+    first_byte = None
+    with client.stream("POST", path, json=dict(body, stream=stream)) as response:
+        response.raise_for_status()
+        for _ in response.iter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+    return first_byte, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/generate_cover_letter/")
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--cached", action="store_true", help="Repeat one candidate/job pair.")
+    args = parser.parse_args()
+
+    fixed = uuid.uuid4().hex[:12]
+    with httpx.Client(base_url=args.url, timeout=120) as client:
+        print(f"{'mode':<10}{'ttfb p50 ms':>13}{'total p50 ms':>14}")
+        for stream in (False, True):
+            ttfb, total = [], []
+            for _ in range(args.requests):
+                tag = fixed if args.cached else uuid.uuid4().hex[:12]
+                first_byte, elapsed = timed_request(client, args.path, payload(tag), stream)
+                ttfb.append(first_byte)
+                total.append(elapsed)
+            mode = "stream" if stream else "buffered"
+            print(f"{mode:<10}{statistics.median(ttfb) * 1000:>13.0f}{statistics.median(total) * 1000:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
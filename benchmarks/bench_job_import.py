@@ -0,0 +1,116 @@
+"""Benchmark bulk job import against adding postings one request at a time.
+
+Imports synthetic postings into a throwaway SQLite database, parsing the raw
+ones through the local stub LLM (started in-process), so neither the real
+database nor an API key is needed:
+
+    python benchmarks/bench_job_import.py
+    python benchmarks/bench_job_import.py --rows 10000 --raw-share 0.2 --latency 0.8
+
+"one by one" is /api/add_job/ for each structured posting and
+/api/parse_job/ plus /api/add_job/ for each raw one, timed on the first
+--baseline-rows postings and extrapolated. The stub answers every parse
+with the same posting, so raw rows carry their own title to stay distinct.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import IntegrityError, transaction  # noqa: E402
+
+from benchmarks.corpus import job_posting, job_text  # noqa: E402
+from benchmarks.stub_llm import serve_in_background  # noqa: E402
+
+
+def synthetic_rows(count, raw_share, duplicate_share, rng):
+    rows = []
+    for index in range(count):
+        if rows and rng.random() < duplicate_share:
+            rows.append(dict(rng.choice(rows)))
+        elif rng.random() < raw_share:
+            rows.append({"job_text": job_text(rng), "title": f"Parsed posting {index}"})
+        else:
+            rows.append(job_posting(rng, title=f"Posting {index}"))
+    return rows
+
+
+def one_by_one(rows):
+    from matcher.serializers import JobPostingSerializer
+    from matcher.utils import parse_job_posting
+
+    for row in rows:
+        data = {**json.loads(parse_job_posting(row["job_text"])), "title": row["title"]} if "job_text" in row else row
+        serializer = JobPostingSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            pass  # a repeated posting
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--raw-share", type=float, default=0.1, help="Share of postings sent as raw text.")
+    parser.add_argument("--duplicate-share", type=float, default=0.05, help="Share of postings repeating an earlier one.")
+    parser.add_argument("--latency", type=float, default=0.8, help="Stub seconds per request.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--baseline-rows", type=int, default=200, help="Postings timed one by one (0 to skip).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-import-")
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+    settings.EMBEDDINGS = {**getattr(settings, "EMBEDDINGS", {}), "DIR": os.path.join(directory, "embeddings")}
+    settings.LLM_CACHE = {"ENABLED": False}
+    call_command("migrate", verbosity=0)
+    server, url = serve_in_background(port=0, latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = url
+
+    from matcher.imports import JobImporter, read_postings
+    from matcher.models import JobPosting
+
+    rows = synthetic_rows(args.rows, args.raw_share, args.duplicate_share, random.Random(args.seed))
+    source = Path(directory) / "postings.ndjson"
+    source.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    raw = sum(1 for row in rows if "job_text" in row)
+    print(f"{len(rows)} postings, {raw} raw, stub latency {args.latency}s")
+
+    if args.baseline_rows:
+        sample = rows[:args.baseline_rows]
+        started = time.perf_counter()
+        one_by_one(sample)
+        elapsed = time.perf_counter() - started
+        estimate = elapsed / len(sample) * len(rows)
+        print(f"{'one by one':<12}{elapsed:>9.2f}s for {len(sample)} postings, ~{estimate / 60:.1f} min for {len(rows)}")
+        JobPosting.objects.all().delete()
+
+    started = time.perf_counter()
+    with source.open() as lines:
+        report = JobImporter(concurrency=args.concurrency).run(read_postings(lines, "ndjson"))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'bulk import':<12}{elapsed:>9.2f}s: {report['created']} created, {report['duplicates']} duplicates, "
+        f"{report['invalid']} invalid ({len(rows) / elapsed:.0f} postings/s)"
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
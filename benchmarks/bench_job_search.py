@@ -0,0 +1,134 @@
+"""Benchmark job full-text search: FTS5, the in-memory fallback and substring scans.
+
+Builds a throwaway SQLite database with synthetic job postings, so the real
+database is untouched:
+
+    python benchmarks/bench_job_search.py
+    python benchmarks/bench_job_search.py --rows 10000 100000 --repeat 20
+
+"python scan" is what the Streamlit page did before (download every job and
+check substrings); "icontains" is the same check done in SQL, unranked and
+stopping at the first 20 hits.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from benchmarks.corpus import SKILLS  # noqa: E402
+
+TITLES = ["Backend Engineer", "Data Scientist", "Platform Engineer", "Frontend Developer", "SRE", "ML Engineer", "Analyst"]
+
+
+def timed(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="Distinct description words.")
+    parser.add_argument("--words", type=int, default=120, help="Words per description.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scan", action="store_true", help="Also time the Python scan (slow).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-search-")
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+    call_command("migrate", verbosity=0)
+
+    from matcher import search
+    from matcher.models import JobPosting
+    from matcher.versions import bump_version
+
+    rng = random.Random(args.seed)
+    # Zipf-like word frequencies: a few very common words and a long tail.
+    vocabulary = [f"w{i}" for i in range(args.vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(args.vocabulary)]
+    queries = {
+        "rare word": "w15000",
+        "common word": "w3",
+        "two words": "w40 w900",
+        "prefix": "w123*",
+        "title+skill": "platform kubernetes",
+    }
+
+    def python_scan(text):
+        words = text.replace("*", "").lower().split()
+        rows = JobPosting.objects.values_list("id", "title", "company", "description")
+        return [row[0] for row in rows if all(any(word in field.lower() for field in row[1:]) for word in words)]
+
+    def icontains(text):
+        jobs = JobPosting.objects.all()
+        for word in text.replace("*", "").split():
+            jobs = jobs.filter(Q(title__icontains=word) | Q(company__icontains=word) | Q(description__icontains=word))
+        return list(jobs.values_list("id", flat=True)[:20])
+
+    def fallback(text):
+        available = search.fts_available
+        search.fts_available = lambda: False
+        try:
+            return search.search_jobs(text)
+        finally:
+            search.fts_available = available
+
+    engines = {"fts5": lambda text: search.search_jobs(text), "in-memory": fallback, "icontains": icontains}
+    if args.scan:
+        engines["python scan"] = python_scan
+
+    created = 0
+    for rows in args.rows:
+        batch = []
+        for index in range(created, rows):
+            skills = rng.sample(SKILLS, 4)
+            batch.append(JobPosting(
+                title=rng.choice(TITLES),
+                company=f"Company {index % 500}",
+                required_skills=skills,
+                description=" ".join(rng.choices(vocabulary, weights, k=args.words) + skills),
+            ))
+            if len(batch) == 5000:
+                JobPosting.objects.bulk_create(batch)
+                batch = []
+        JobPosting.objects.bulk_create(batch)
+        created = rows
+        # bulk_create skips the signal that marks the in-memory index stale.
+        bump_version("jobs")
+
+        started = time.perf_counter()
+        search.get_search_index()
+        build = time.perf_counter() - started
+        print(f"\n{rows:,} postings (in-memory index built in {build:.1f}s), p50 ms:")
+        print(f"{'query':<14}" + "".join(f"{name:>13}" for name in engines))
+        for label, text in queries.items():
+            line = f"{label:<14}"
+            for name, engine in engines.items():
+                median, _ = timed(lambda: engine(text), args.repeat if name != "python scan" else 1)
+                line += f"{median:>13.2f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare one LLM call per job with batched multi-job matching.
+
+Runs against the local stub LLM (started in-process), so no API key is needed:
+
+    python benchmarks/bench_match_batch.py --jobs 10 50 --latency 0.8
+
+Reports wall time, requests and the prompt/completion tokens the stub saw.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from benchmarks.corpus import SKILLS  # noqa: E402
+from benchmarks.stub_llm import serve_in_background  # noqa: E402
+
+
+def synthetic_jobs(count, rng):
+    return [
+        {
+            "title": f"Engineer {index}",
+            "company": f"Company {index % 7}",
+            "required_skills": rng.sample(SKILLS, 5),
+            "description": " ".join(rng.choices(["Build", "scale", "APIs", "services", "data", "pipelines", "for", "customers"], k=60)),
+        }
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--latency", type=float, default=0.8, help="Stub seconds per request.")
+    args = parser.parse_args()
+
+    server, url = serve_in_background(port=0, latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = url
+    settings.LLM_CACHE = {"ENABLED": False}
+
+    from matcher.utils import llm_match_candidate_to_job, llm_match_candidate_to_jobs
+
+    stats = server.RequestHandlerClass.stats
+    rng = random.Random(0)
+    candidate = {"name": "Bench Candidate", "skills": rng.sample(SKILLS, 8), "education": ["BSc"], "work_experience": ["5 years backend"]}
+
+    print(f"{'jobs':>5} {'mode':<9}{'seconds':>9}{'requests':>10}{'prompt tok':>12}{'output tok':>12}")
+    for count in args.jobs:
+        jobs = synthetic_jobs(count, rng)
+        runs = {
+            "per-job": lambda: [llm_match_candidate_to_job(candidate, job) for job in jobs],
+            "batched": lambda: llm_match_candidate_to_jobs(candidate, jobs),
+        }
+        for mode, run in runs.items():
+            before = dict(stats)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            delta = {key: stats[key] - before[key] for key in stats}
+            print(f"{count:>5} {mode:<9}{elapsed:>9.2f}{delta['requests']:>10}{delta['prompt_tokens']:>12}{delta['completion_tokens']:>12}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
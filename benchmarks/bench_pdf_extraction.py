@@ -0,0 +1,65 @@
+"""Compare PDF text extraction engines on a corpus of PDFs.
+
+    python benchmarks/bench_pdf_extraction.py path/to/pdfs/
+    python benchmarks/bench_pdf_extraction.py --synthetic 200 --pages 3
+
+Without a directory a synthetic corpus is generated in memory.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from benchmarks.corpus import resume_pdfs  # noqa: E402
+from matcher.extraction import PDF_ENGINES, iter_pdf_pages  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", help="Directory of sample PDFs.")
+    parser.add_argument("--synthetic", type=int, default=100, help="Synthetic PDFs when no directory is given.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic PDF.")
+    parser.add_argument("--max-pages", type=int, default=None, help="Page cap (default: PDF_EXTRACTION setting).")
+    parser.add_argument("--engines", nargs="+", default=list(PDF_ENGINES), choices=PDF_ENGINES)
+    args = parser.parse_args()
+
+    if args.directory:
+        corpus = [(path.name, path.read_bytes()) for path in sorted(Path(args.directory).rglob("*.pdf"))]
+    else:
+        corpus = list(resume_pdfs(args.synthetic, pages=args.pages))
+    if not corpus:
+        parser.error("no PDFs found")
+
+    print(f"{len(corpus)} documents")
+    print(f"{'engine':>11} {'total s':>8} {'docs/s':>8} {'pages/s':>8} {'p50 ms':>8} {'max ms':>8} {'chars':>10}")
+    for engine in args.engines:
+        timings, pages, chars = [], 0, 0
+        for name, data in corpus:
+            started = time.perf_counter()
+            try:
+                texts = list(iter_pdf_pages(data, engine=engine, max_pages=args.max_pages))
+            except Exception as e:
+                print(f"  {engine}: {name} failed: {e}")
+                continue
+            timings.append(time.perf_counter() - started)
+            pages += len(texts)
+            chars += sum(len(text) for text in texts)
+        total = sum(timings)
+        print(
+            f"{engine:>11} {total:>8.2f} {len(timings) / total:>8.1f} {pages / total:>8.1f} "
+            f"{statistics.median(timings) * 1000:>8.2f} {max(timings) * 1000:>8.2f} {chars:>10,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
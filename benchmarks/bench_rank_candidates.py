@@ -0,0 +1,64 @@
+"""Benchmark reverse ranking (top candidates for a job) from 1k to 1M candidates.
+
+Builds a synthetic CandidateIndex in memory, so no database rows are needed:
+
+    python benchmarks/bench_rank_candidates.py
+    python benchmarks/bench_rank_candidates.py --sizes 1000 10000 --queries 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from matcher.ranking import CandidateIndex  # noqa: E402
+
+
+def synthetic_skill_lists(count, vocabulary, skills_per_candidate, rng):
+    for _ in range(count):
+        yield rng.sample(vocabulary, rng.randint(3, skills_per_candidate))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--vocabulary", type=int, default=5_000, help="Distinct skills in the corpus.")
+    parser.add_argument("--skills", type=int, default=15, help="Maximum skills per candidate.")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [f"skill-{i}" for i in range(args.vocabulary)]
+    jobs = [rng.sample(vocabulary, 8) for _ in range(args.queries)]
+
+    print(f"{'candidates':>12} {'build s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for size in args.sizes:
+        started = time.perf_counter()
+        index = CandidateIndex(range(size), synthetic_skill_lists(size, vocabulary, args.skills, rng))
+        build = time.perf_counter() - started
+
+        timings = []
+        for required_skills in jobs:
+            started = time.perf_counter()
+            index.rank(required_skills, args.page_size)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{size:>12,} {build:>9.2f} {statistics.median(timings):>8.2f} {p95:>8.2f} {timings[-1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark skill containment queries: JSON list scan vs the normalized skill tables.
+
+Builds a throwaway SQLite database with synthetic job postings, so the real
+database is untouched:
+
+    python benchmarks/bench_skill_search.py
+    python benchmarks/bench_skill_search.py --rows 10000 100000 --queries 20
+
+"Scan" is what a caller had to do before: load every row's JSON skill list
+and filter in Python. "any"/"all" are `JobPosting.objects.with_any_skills` and
+`with_all_skills`, answered from the indexed `JobSkill` table.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+
+def timed(run, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        result = run(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--vocabulary", type=int, default=2_000, help="Distinct skills in the corpus.")
+    parser.add_argument("--skills", type=int, default=12, help="Maximum skills per job.")
+    parser.add_argument("--query-skills", type=int, default=2, help="Skills per query.")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-skills-")
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+    call_command("migrate", verbosity=0)
+
+    from matcher.models import JobPosting, JobSkill
+    from matcher.scoring import normalize_skills
+    from matcher.skills import backfill_skill_links
+
+    rng = random.Random(args.seed)
+    vocabulary = [f"Skill {i}" for i in range(args.vocabulary)]
+    # Popular skills (low ids) show up far more often, as in real postings.
+    weights = [1 / (rank + 1) for rank in range(args.vocabulary)]
+
+    def scan_any(query):
+        wanted = set(normalize_skills(query))
+        rows = JobPosting.objects.values_list("id", "required_skills")
+        return [job_id for job_id, skills in rows if wanted & normalize_skills(skills).keys()]
+
+    def scan_all(query):
+        wanted = set(normalize_skills(query))
+        rows = JobPosting.objects.values_list("id", "required_skills")
+        return [job_id for job_id, skills in rows if wanted <= normalize_skills(skills).keys()]
+
+    runs = {
+        "scan any": scan_any,
+        "index any": lambda query: list(JobPosting.objects.with_any_skills(query).values_list("id", flat=True)),
+        "scan all": scan_all,
+        "index all": lambda query: list(JobPosting.objects.with_all_skills(query).values_list("id", flat=True)),
+    }
+
+    print(f"{'rows':>9} {'build s':>8} " + "".join(f"{name + ' ms':>14}" for name in runs) + f"{'hits any/all':>16}")
+    created = 0
+    for rows in args.rows:
+        batch = [
+            JobPosting(
+                title=f"Engineer {index}",
+                company=f"Company {index % 50}",
+                required_skills=list(dict.fromkeys(rng.choices(vocabulary, weights, k=rng.randint(3, args.skills)))),
+                description="",
+            )
+            for index in range(created, rows)
+        ]
+        JobPosting.objects.bulk_create(batch, batch_size=1000)
+        created = rows
+
+        started = time.perf_counter()
+        backfill_skill_links(JobPosting, "required_skills", JobSkill, "job")
+        build = time.perf_counter() - started
+
+        queries = [rng.choices(vocabulary[:200], k=args.query_skills) for _ in range(args.queries)]
+        medians, hits = {}, {}
+        for name, run in runs.items():
+            medians[name], result = timed(run, queries)
+            hits[name] = len(result)
+        assert hits["scan any"] == hits["index any"] and hits["scan all"] == hits["index all"]
+        print(
+            f"{rows:>9,} {build:>8.2f} " + "".join(f"{medians[name]:>14.2f}" for name in runs)
+            + f"{hits['index any']:>10}/{hits['index all']}"
+        )
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Synthetic documents for the benchmarks."""
+import random
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Margaret", "Dennis", "Barbara", "Ken", "Radia", "Guido"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Hamilton", "Ritchie", "Liskov", "Thompson", "Perlman", "Rossum"]
+SKILLS = [
+    "Python", "Django", "PostgreSQL", "Docker", "Kubernetes", "AWS", "React", "TypeScript", "Go", "Rust",
+    "Machine Learning", "PyTorch", "SQL", "Redis", "Kafka", "Terraform", "Java", "Spring", "GraphQL", "CI/CD",
+]
+TITLES = ["Backend Engineer", "Data Scientist", "Platform Engineer", "Frontend Developer", "SRE", "ML Engineer", "Analyst"]
+WORDS = (
+    "designed built shipped maintained scaled migrated led owned improved automated services pipelines "
+    "platform customers latency throughput reliability team features production data api backend frontend"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def resume_lines(rng, lines_per_page=40, pages=2):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, "Skills: " + ", ".join(rng.sample(SKILLS, 6)), "Experience"]
+    while len(lines) < lines_per_page * pages:
+        lines.append(sentence(rng))
+    return [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+
+def candidate_profile(rng, name=None):
+    return {
+        "name": name or f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "skills": rng.sample(SKILLS, 6),
+        "education": ["BSc Computer Science"],
+        "work_experience": [sentence(rng) for _ in range(3)],
+    }
+
+
+def job_posting(rng, title=None, company=None):
+    return {
+        "title": title or rng.choice(TITLES),
+        "company": company or f"Company {rng.randrange(500)}",
+        "required_skills": rng.sample(SKILLS, 5),
+        "description": " ".join(sentence(rng) for _ in range(5)),
+    }
+
+
+def job_text(rng):
+    """A job posting as the free text /api/parse_job/ expects."""
+    job = job_posting(rng)
+    return f"{job['title']} at {job['company']}\nRequirements: {', '.join(job['required_skills'])}\n{job['description']}"
+
+
+def candidate_profiles(count, seed=0):
+    rng = random.Random(seed)
+    return [candidate_profile(rng, name=f"Candidate {index}") for index in range(count)]
+
+
+def job_postings(count, seed=0):
+    rng = random.Random(seed)
+    return [job_posting(rng, title=f"{rng.choice(TITLES)} {index}") for index in range(count)]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """Build a minimal text PDF; ``pages`` is a list of lists of lines."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def resume_pdfs(count, pages=2, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield f"resume-{i}.pdf", make_pdf(resume_lines(rng, pages=pages))
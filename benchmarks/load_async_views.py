@@ -0,0 +1,94 @@
+"""Load-test the sync and async match/cover-letter endpoints side by side.
+
+Start the stub LLM and the app under an ASGI server, then run the client:
+
+    python benchmarks/stub_llm.py --port 8100 --latency 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 uvicorn backend.asgi:application --port 8000
+    python benchmarks/load_async_views.py --url http://127.0.0.1:8000 --concurrency 10 50 200
+
+Every request uses a unique payload and mode "llm", so none is answered from
+the result cache and each one waits on the (stub) model.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+import uuid
+
+import httpx
+
+CLIENT_CONNECTIONS = 16
+
+ENDPOINTS = {
+    "match": ("/api/match/", "/api/async/match/"),
+    "cover_letter": ("/api/generate_cover_letter/", "/api/async/generate_cover_letter/"),
+}
+
+
+def payload(endpoint):
+    tag = uuid.uuid4().hex[:12]
+    candidate = {"name": f"Load Test {tag}", "skills": ["Python", "Django", tag], "education": [], "work_experience": []}
+    job = {"title": f"Engineer {tag}", "company": "Load Co", "required_skills": ["Python", "Kubernetes"], "description": tag}
+    if endpoint == "match":
+        return {"candidate": candidate, "job": job, "mode": "llm"}
+    return {"candidate": candidate, "job": job}
+
+
+async def run(clients, path, endpoint, concurrency, requests):
+    latencies, errors = [], {}
+    counter = itertools.count()
+
+    async def worker(client):
+        while next(counter) < requests:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload(endpoint))
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                errors[e.response.text[:80]] = errors.get(e.response.text[:80], 0) + 1
+                continue
+            except httpx.HTTPError as e:
+                errors[repr(e)] = errors.get(repr(e), 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(clients[i % len(clients)]) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoints", nargs="+", default=["match"], choices=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=None, help="Requests per run (default: 4x concurrency).")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    # Small pools per client: one large httpx pool is itself a bottleneck.
+    clients = [
+        httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=httpx.Limits(max_connections=CLIENT_CONNECTIONS))
+        for _ in range(-(-max(args.concurrency) // CLIENT_CONNECTIONS))
+    ]
+    try:
+        print(f"{'endpoint':<14}{'view':<7}{'conc':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                for view, path in zip(("sync", "async"), ENDPOINTS[endpoint]):
+                    requests = args.requests or concurrency * 4
+                    latencies, errors, elapsed = await run(clients, path, endpoint, concurrency, requests)
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+                    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else float("nan")
+                    print(f"{endpoint:<14}{view:<7}{concurrency:>6}{len(latencies) / elapsed:>9.1f}{p50:>9.0f}{p95:>9.0f}{sum(errors.values()):>8}")
+                    for message, count in errors.items():
+                        print(f"    {count} x {message}")
+    finally:
+        for client in clients:
+            await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
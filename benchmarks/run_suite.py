@@ -0,0 +1,323 @@
+"""Benchmark the API endpoints end to end against the stub LLM.
+
+Starts the stub LLM and the app (Django's threaded WSGI server) in-process
+on a throwaway SQLite database seeded with synthetic jobs, candidates and
+match results, so neither the real database nor the OpenAI API is touched:
+
+    python benchmarks/run_suite.py
+    python benchmarks/run_suite.py --endpoints match job_listings --concurrency 1 8 32 --latency 0.3
+    python benchmarks/run_suite.py --responses benchmarks/recorded_responses.json --error-rate 0.05
+    python benchmarks/run_suite.py --output before.json
+    python benchmarks/run_suite.py --compare before.json
+
+Each endpoint is driven at every --concurrency level and reported as p50,
+p95 and p99 latency and requests per second. Results are written as JSON
+(by default to benchmarks/results/) so later runs can be compared against
+them with --compare. LLM payloads are unique per request, so nothing is
+answered from the result cache and every LLM call reaches the stub.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler  # noqa: E402
+
+from benchmarks.corpus import candidate_profile, candidate_profiles, job_posting, job_postings, job_text, make_pdf, resume_lines  # noqa: E402
+from benchmarks.stub_llm import serve_in_background  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+CLIENT_CONNECTIONS = 16
+
+
+def _tag():
+    return uuid.uuid4().hex[:12]
+
+
+def upload_resume(rng):
+    lines = resume_lines(rng, pages=1)
+    lines[0].append(_tag())
+    return {"method": "POST", "url": "/api/upload_resume/", "files": {"resume": ("resume.pdf", make_pdf(lines), "application/pdf")}}
+
+
+def parse_job(rng):
+    return {"method": "POST", "url": "/api/parse_job/", "json": {"job_text": f"{job_text(rng)}\n{_tag()}"}}
+
+
+def match(rng):
+    tag = _tag()
+    candidate = candidate_profile(rng, name=f"Bench {tag}")
+    job = job_posting(rng, title=f"Engineer {tag}")
+    return {"method": "POST", "url": "/api/match/", "json": {"candidate": candidate, "job": job, "mode": "llm"}}
+
+
+def cover_letter(rng):
+    tag = _tag()
+    candidate = candidate_profile(rng, name=f"Bench {tag}")
+    return {"method": "POST", "url": "/api/generate_cover_letter/", "json": {"candidate": candidate, "job": job_posting(rng, title=f"Engineer {tag}")}}
+
+
+def job_listings(rng):
+    return {"method": "GET", "url": "/api/job_listings/", "params": {"limit": 100}}
+
+
+def job_search(rng):
+    return {"method": "GET", "url": "/api/job_search/", "params": {"q": rng.choice(["python", "platform", "kafka", "backend engineer", "terra*"])}}
+
+
+def match_results(rng):
+    return {"method": "GET", "url": "/api/match-results/", "params": {"limit": 100}}
+
+
+def match_stats(rng):
+    return {"method": "GET", "url": "/api/match-results/stats/"}
+
+
+# Endpoint name -> function building one request from a random.Random.
+ENDPOINTS = {
+    "upload_resume": upload_resume,
+    "parse_job": parse_job,
+    "match": match,
+    "cover_letter": cover_letter,
+    "job_listings": job_listings,
+    "job_search": job_search,
+    "match_results": match_results,
+    "match_stats": match_stats,
+}
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # Small responses otherwise wait on delayed ACKs (~40 ms each).
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchServer(ThreadedWSGIServer):
+    # The default listen backlog drops connections at high concurrency.
+    request_queue_size = 1024
+
+
+def serve_app():
+    """Serve the Django app on a background thread; returns ``(server, base_url)``."""
+    from django.core.wsgi import get_wsgi_application
+
+    server = BenchServer(("127.0.0.1", 0), QuietRequestHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def seed_database(jobs, candidates, results):
+    """Migrate a fresh database and fill it with synthetic rows."""
+    directory = tempfile.mkdtemp(prefix="bench-suite-")
+    settings.DATABASES["default"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+    call_command("migrate", verbosity=0)
+
+    from matcher.models import CandidateProfile, JobPosting, MatchResult
+    from matcher.versions import bump_version
+
+    JobPosting.objects.bulk_create([JobPosting(**job) for job in job_postings(jobs)], batch_size=2000)
+    CandidateProfile.objects.bulk_create(
+        [CandidateProfile(**candidate, resume_file="") for candidate in candidate_profiles(candidates)], batch_size=2000
+    )
+    bump_version("jobs")
+    bump_version("candidates")
+
+    rng = random.Random(0)
+    job_ids = list(JobPosting.objects.values_list("id", flat=True))
+    candidate_ids = list(CandidateProfile.objects.values_list("id", flat=True))
+    MatchResult.objects.bulk_create(
+        [
+            MatchResult(
+                candidate_id=rng.choice(candidate_ids),
+                job_id=rng.choice(job_ids),
+                match_score=rng.randint(0, 100),
+                missing_skills=rng.sample(["Kubernetes", "Go", "Rust", "AWS", "Kafka"], 2),
+                summary="Synthetic result.",
+                input_hash=str(index),
+            )
+            for index in range(results)
+        ],
+        batch_size=2000,
+    )
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))]
+
+
+async def drive(clients, build, concurrency, requests, seed):
+    """Send ``requests`` requests from ``concurrency`` workers; returns latencies, errors and wall time."""
+    rng = random.Random(seed)
+    latencies, errors = [], {}
+    counter = itertools.count()
+
+    async def worker(client):
+        while next(counter) < requests:
+            request = build(rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                key = f"{e.response.status_code} {e.response.text[:80]}"
+                errors[key] = errors.get(key, 0) + 1
+                continue
+            except httpx.HTTPError as e:
+                errors[repr(e)] = errors.get(repr(e), 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(clients[i % len(clients)]) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(endpoint, concurrency, latencies, errors, elapsed):
+    latencies.sort()
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+def _change(new, old):
+    if new is None or not old:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def print_row(row, previous=None):
+    def num(value, width):
+        return f"{value:>{width}.1f}" if value is not None else "-".rjust(width)
+
+    line = (
+        f"{row['endpoint']:<15}{row['concurrency']:>6}{num(row['rps'], 9)}"
+        f"{num(row['p50_ms'], 10)}{num(row['p95_ms'], 10)}{num(row['p99_ms'], 10)}{row['errors']:>8}"
+    )
+    if previous:
+        line += f"   rps {_change(row['rps'], previous['rps']):>6}  p50 {_change(row['p50_ms'], previous['p50_ms']):>6}  p95 {_change(row['p95_ms'], previous['p95_ms']):>6}"
+    print(line)
+
+
+async def run(args, base_url, meta):
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {(row["endpoint"], row["concurrency"]): row for row in json.load(f)["results"]}
+
+    clients = [
+        httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=httpx.Limits(max_connections=CLIENT_CONNECTIONS))
+        for _ in range(-(-max(args.concurrency) // CLIENT_CONNECTIONS))
+    ]
+    rows = []
+    try:
+        print(f"{'endpoint':<15}{'conc':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                requests = args.requests or max(concurrency * 4, 20)
+                latencies, errors, elapsed = await drive(clients, ENDPOINTS[endpoint], concurrency, requests, args.seed)
+                row = summarize(endpoint, concurrency, latencies, errors, elapsed)
+                rows.append(row)
+                print_row(row, previous.get((endpoint, concurrency)))
+                for message, count in errors.items():
+                    print(f"    {count} x {message}")
+    finally:
+        for client in clients:
+            await client.aclose()
+    return {"meta": meta, "results": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=None, help="Requests per run (default: 4x concurrency, at least 20).")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per LLM request.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub requests answered with 429/500.")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Stub seconds per word of generated text.")
+    parser.add_argument("--responses", help="Recorded function-call arguments for the stub to replay.")
+    parser.add_argument("--jobs", type=int, default=5000, help="Seeded job postings.")
+    parser.add_argument("--candidates", type=int, default=500, help="Seeded candidates.")
+    parser.add_argument("--results", type=int, default=20000, help="Seeded match results.")
+    parser.add_argument("--url", help="Benchmark an already running server instead (its LLM must be the stub).")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/suite-<time>.json).")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against.")
+    args = parser.parse_args()
+
+    meta = {
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "args": vars(args),
+    }
+    if args.url:
+        base_url = args.url
+    else:
+        stub, llm_url = serve_in_background(
+            port=0, latency=args.latency, error_rate=args.error_rate, token_delay=args.token_delay, responses=args.responses
+        )
+        os.environ["OPENAI_BASE_URL"] = llm_url
+        settings.LLM_CACHE = {"ENABLED": False}
+        settings.RESCORING = {"IN_PROCESS": False}
+        # Failed requests are counted in the report; skip their tracebacks.
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        seed_database(args.jobs, args.candidates, args.results)
+        server, base_url = serve_app()
+
+    report = asyncio.run(run(args, base_url, meta))
+
+    if args.url is None:
+        report["meta"]["stub"] = dict(stub.RequestHandlerClass.stats)
+        server.shutdown()
+        stub.shutdown()
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"suite-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
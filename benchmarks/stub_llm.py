@@ -0,0 +1,255 @@
+"""Local OpenAI-compatible stub for offline testing and benchmarks.
+
+Answers POST /v1/chat/completions with canned function-call arguments for
+the functions defined in matcher/utils.py, after a configurable delay and
+with a configurable share of 429/500 errors. Plain completions return a
+canned cover letter, written out at --token-delay seconds per word, and
+honour "stream": true:
+
+    python benchmarks/stub_llm.py --port 8100 --latency 0.8 --error-rate 0.05
+    python benchmarks/stub_llm.py --responses benchmarks/recorded_responses.json
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 python manage.py runserver
+
+--responses replays recorded function-call arguments instead of the canned
+ones: a JSON object mapping each function name to a list of argument objects,
+which are handed out in turn.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ARGUMENTS = {
+    "parse_resume": {
+        "name": "Ada Lovelace",
+        "skills": ["Python", "Django", "PostgreSQL", "Docker"],
+        "education": ["BSc Mathematics"],
+        "work_experience": ["Backend engineer, 5 years"],
+    },
+    "parse_job_posting": {
+        "title": "Backend Engineer",
+        "company": "Analytical Engines",
+        "required_skills": ["Python", "Django", "Kubernetes"],
+        "description": "Build and run our matching APIs.",
+    },
+    "match_candidate_to_job": {
+        "match_score": 72,
+        "missing_skills": ["Kubernetes"],
+        "summary": "Strong backend fit; lacks container orchestration experience.",
+    },
+}
+
+CANNED_CONTENT = (
+    "Dear Hiring Manager,\n\n"
+    "I am excited to apply for the Backend Engineer role. Over the past five years I have built and "
+    "operated Python and Django services backed by PostgreSQL, packaged with Docker and deployed "
+    "through automated pipelines. I enjoy turning loosely specified problems into reliable APIs, and "
+    "I care about the details that keep them fast under load: careful queries, caching and clear "
+    "monitoring.\n\n"
+    "Your team's work on matching candidates to jobs is close to what I have been doing, and I would "
+    "welcome the chance to bring that experience to your platform while growing my skills with "
+    "Kubernetes.\n\n"
+    "Thank you for your time and consideration. I look forward to hearing from you.\n\n"
+    "Sincerely,\nAda Lovelace"
+)
+
+
+class Replay:
+    """Hands out recorded function-call arguments in turn, per function."""
+
+    def __init__(self, recorded):
+        self._cycles = {name: itertools.cycle(arguments) for name, arguments in recorded.items() if arguments}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def arguments(self, name):
+        if name not in self._cycles:
+            return CANNED_ARGUMENTS.get(name, {})
+        with self._lock:
+            return next(self._cycles[name])
+
+
+# Numbered job lines in a batched match prompt.
+JOB_LINE = re.compile(r"^\[\d+\] ", re.MULTILINE)
+
+
+def content_tokens(content):
+    """Split content into word-sized deltas that join back to the original."""
+    return re.findall(r"\S+\s*|\s+", content)
+
+
+def chunk(completion_id, model, delta, finish_reason=None):
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def completion(body, replay=None):
+    """Build a chat.completion response for a request body."""
+    replay = replay or Replay({})
+    message = {"role": "assistant", "content": None}
+    functions = body.get("functions") or []
+    if functions:
+        name = functions[0]["name"]
+        if name == "match_candidate_to_jobs":
+            arguments = {"matches": [
+                {"job_index": index, **replay.arguments("match_candidate_to_job")}
+                for index in range(len(JOB_LINE.findall(body["messages"][-1]["content"])))
+            ]}
+        else:
+            arguments = replay.arguments(name)
+        message["function_call"] = {"name": name, "arguments": json.dumps(arguments)}
+        finish_reason = "function_call"
+    else:
+        message["content"] = CANNED_CONTENT
+        finish_reason = "stop"
+
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    error_rate = 0.0
+    token_delay = 0.0
+    replay = None
+    # Per configured server: requests answered and tokens reported.
+    stats = None
+    stats_lock = threading.Lock()
+
+    def record(self, response):
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            for key in ("prompt_tokens", "completion_tokens"):
+                self.stats[key] += response["usage"][key]
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            status = random.choice([429, 500])
+            self.send_json(status, {"error": {"message": "stub error", "type": "stub", "code": status}})
+            return
+        if body.get("stream") and not body.get("functions"):
+            self.send_stream(body)
+            return
+        if not body.get("functions"):
+            time.sleep(self.token_delay * len(content_tokens(CANNED_CONTENT)))
+        response = completion(body, self.replay)
+        self.record(response)
+        self.send_json(200, response)
+
+    def send_stream(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "stub")
+        events = [chunk(completion_id, model, {"role": "assistant", "content": ""})]
+        for token in content_tokens(CANNED_CONTENT):
+            events.append(chunk(completion_id, model, {"content": token}))
+        events.append(chunk(completion_id, model, {}, finish_reason="stop"))
+        for index, event in enumerate(events):
+            if index > 1:
+                time.sleep(self.token_delay)
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under load tests.
+    request_queue_size = 1024
+
+
+def make_server(host="127.0.0.1", port=8100, latency=0.0, error_rate=0.0, token_delay=0.0, responses=None):
+    """``responses`` is the path of recorded function-call arguments to replay."""
+    handler = type(
+        "ConfiguredStubHandler",
+        (StubHandler,),
+        {
+            "latency": latency,
+            "error_rate": error_rate,
+            "token_delay": token_delay,
+            "replay": Replay.load(responses) if responses else None,
+            "stats": {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0},
+        },
+    )
+    server = StubServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_background(**kwargs):
+    """Start a stub server on a thread; returns ``(server, base_url)``.
+
+    ``server.RequestHandlerClass.stats`` counts requests and tokens.
+    """
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to wait before answering.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429/500.")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds per word of generated text.")
+    parser.add_argument("--responses", help="JSON file of recorded function-call arguments to replay.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.error_rate, args.token_delay, args.responses)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .streaming import asse_events, event_stream_response, wants_stream
+from .usage import BudgetExceeded
+from .utils import (
+    aparse_job_posting, amatch_candidate_to_job, agenerate_cover_letter, astream_cover_letter, find_stored_match,
+    match_request_error, match_response, store_match,
+)
+
+# Async counterparts of the parse, match and cover-letter views.
+#
+# DRF's APIView is synchronous, so these are plain Django views with async
+# handlers. Served under ASGI (for example `uvicorn backend.asgi:application`)
+# a waiting LLM call no longer holds a thread, so one worker process can keep
+# hundreds of requests in flight. Request and response bodies match the sync
+# endpoints.
+
+logger = logging.getLogger(__name__)
+
+
+def json_body(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def budget_exceeded_response(exc):
+    """The 429 DRF sends for BudgetExceeded in the sync views."""
+    response = JsonResponse({"detail": str(exc.detail)}, status=429)
+    if exc.wait:
+        response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncJobParsingView(View):
+    async def post(self, request):
+        data = json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+        job_text = data.get("job_text", "")
+        if not job_text:
+            return JsonResponse({"error": "Job description missing"}, status=400)
+
+        try:
+            parsed_job = await aparse_job_posting(job_text)
+        except BudgetExceeded as exc:
+            return budget_exceeded_response(exc)
+        return JsonResponse(parsed_job, safe=False)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncMatchView(View):
+    async def post(self, request):
+        data = json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+        candidate_data = data.get("candidate", {})
+        job_data = data.get("job", {})
+        match_mode = data.get("mode")
+
+        error = match_request_error(candidate_data, job_data, match_mode)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+
+        try:
+            force_rescore = bool(data.get("force_rescore"))
+            candidate, job, input_hash, match_entry = await sync_to_async(find_stored_match)(
+                candidate_data, job_data, match_mode, force_rescore
+            )
+            reused = match_entry is not None
+
+            if not reused:
+                match_result = await amatch_candidate_to_job(candidate_data, job_data, mode=match_mode, refresh=force_rescore)
+                match_entry = await sync_to_async(store_match)(candidate, job, input_hash, match_result, match_mode)
+        except json.JSONDecodeError as e:
+            return JsonResponse({"error": f"JSON Decode Error: {str(e)}"}, status=500)
+        except Exception as e:
+            logger.exception("Matching failed")
+            return JsonResponse({"error": f"Unexpected error: {str(e)}"}, status=500)
+
+        return JsonResponse(match_response(candidate, job, match_entry, reused))
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncCoverLetterView(View):
+    async def post(self, request):
+        data = json_body(request)
+        if data is None:
+            return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+        candidate = data.get("candidate")
+        job = data.get("job")
+
+        if not candidate or not job:
+            return JsonResponse({"error": "Candidate and job data are required."}, status=400)
+
+        if wants_stream(request, data):
+            return event_stream_response(asse_events(astream_cover_letter(candidate, job)))
+
+        try:
+            cover_letter = await agenerate_cover_letter(candidate, job)
+        except BudgetExceeded as exc:
+            return budget_exceeded_response(exc)
+        return JsonResponse({"cover_letter": cover_letter})
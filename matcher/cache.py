@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .metrics import record_cache
+
+# Result cache for LLM calls.
+#
+# Results are keyed by a hash of the normalized input, the model name and the
+# function schema, so changing the prompt contract invalidates old entries.
+# Lookups go through an in-process LRU first and then a persistent tier
+# (a standalone SQLite file by default, or any configured Django cache).
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 1024,
+    "TTL": 7 * 24 * 60 * 60,
+    "PERSISTENT_BACKEND": "sqlite",
+    "PERSISTENT_MAX_ENTRIES": 100_000,
+    "PATH": None,
+    "DJANGO_CACHE_ALIAS": "default",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "LLM_CACHE", {}))
+    if options["PATH"] is None:
+        options["PATH"] = settings.BASE_DIR / "llm_cache.sqlite3"
+    return options
+
+
+def normalize_text(text):
+    """Collapse whitespace so cosmetic differences don't miss the cache."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_key(namespace, payload, model, schema=None):
+    if isinstance(payload, str):
+        payload = normalize_text(payload)
+    else:
+        payload = normalize_text(json.dumps(payload, sort_keys=True, default=str))
+
+    digest = hashlib.sha256()
+    for part in (namespace, model, json.dumps(schema, sort_keys=True), payload):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU tier with per-entry expiry."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Persistent tier stored in its own SQLite file, evicted by age and size."""
+
+    # Size-based eviction runs once every this many writes.
+    EVICT_EVERY = 100
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        with conn:
+            if expires_at is not None and expires_at < now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def delete(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def evict(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+class DjangoCache:
+    """Persistent tier backed by one of the project's configured Django caches."""
+
+    def __init__(self, alias, ttl):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, timeout=self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResultCache:
+    """Two-tier cache for LLM results with hit/miss counters per namespace."""
+
+    def __init__(self, memory, persistent=None, enabled=True):
+        self.memory = memory
+        self.persistent = persistent
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, namespace, outcome):
+        with self._lock:
+            counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+        record_cache(namespace, outcome)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        if self.persistent is not None:
+            self.persistent.set(key, value, ttl)
+
+    def get_or_compute(self, namespace, payload, model, schema, compute, refresh=False):
+        """Return the cached result for this input, calling ``compute`` on a miss.
+
+        ``None`` results are never stored, so failed calls are retried next time.
+        ``refresh`` skips the lookup and replaces the cached result.
+        """
+        if not self.enabled:
+            return compute()
+
+        key = make_key(namespace, payload, model, schema)
+        value = None if refresh else self.get(key)
+        if value is not None:
+            self._count(namespace, "hits")
+            return value
+
+        self._count(namespace, "misses")
+        value = compute()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    async def aget_or_compute(self, namespace, payload, model, schema, compute, refresh=False):
+        """Async version of :meth:`get_or_compute`; ``compute`` is a coroutine function.
+
+        The persistent tier is blocking, so it is consulted in a worker thread.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = make_key(namespace, payload, model, schema)
+        value = None if refresh else self.memory.get(key)
+        if value is None and not refresh and self.persistent is not None:
+            value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            self._count(namespace, "hits")
+            return value
+
+        self._count(namespace, "misses")
+        value = await compute()
+        if value is not None:
+            await asyncio.to_thread(self.set, key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {namespace: dict(counters) for namespace, counters in self._stats.items()}
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+        with self._lock:
+            self._stats.clear()
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def build_result_cache(options):
+    memory = LRUCache(options["MAX_ENTRIES"], options["TTL"])
+
+    backend = options["PERSISTENT_BACKEND"]
+    if backend == "sqlite":
+        persistent = SQLiteCache(options["PATH"], options["PERSISTENT_MAX_ENTRIES"], options["TTL"])
+    elif backend == "django":
+        persistent = DjangoCache(options["DJANGO_CACHE_ALIAS"], options["TTL"])
+    elif backend is None:
+        persistent = None
+    else:
+        raise ValueError(f"Unknown LLM_CACHE persistent backend: {backend!r}")
+
+    return ResultCache(memory, persistent, enabled=options["ENABLED"])
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = build_result_cache(cache_settings())
+    return _result_cache
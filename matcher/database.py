@@ -0,0 +1,63 @@
+from django.conf import settings
+
+# Database tuning per backend.
+#
+# SQLite (the single-node setup) runs in WAL mode, so readers never block the
+# writer and the writer never blocks readers, with the pragmas below applied
+# to every new connection. The connection settings in backend/settings.py
+# add IMMEDIATE write transactions and a busy timeout, so concurrent writers
+# queue for the lock instead of failing with "database is locked".
+#
+# On PostgreSQL the JSON skill lists (jsonb) get GIN indexes for containment
+# queries such as ``JobPosting.objects.filter(required_skills__contains=["Python"])``.
+# jsonb_path_ops indexes only support @>, but are smaller and faster for it.
+
+DEFAULTS = {
+    "SQLITE_PRAGMAS": {
+        "journal_mode": "wal",
+        # Safe in WAL mode: a power cut can lose the last commits, never corrupt.
+        "synchronous": "normal",
+        # Page cache per connection, in KiB when negative.
+        "cache_size": -20000,
+        "temp_store": "memory",
+        "mmap_size": 128 * 1024 * 1024,
+    },
+}
+
+GIN_INDEXES = {
+    "job_required_skills_gin": ("matcher_jobposting", "required_skills"),
+    "candidate_skills_gin": ("matcher_candidateprofile", "skills"),
+}
+
+
+def database_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "DATABASE_TUNING", {}))
+    return options
+
+
+def tune_sqlite(connection):
+    """Apply SQLITE_PRAGMAS to a new SQLite connection; does nothing on other databases."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in database_settings()["SQLITE_PRAGMAS"].items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def install_gin_indexes(schema_connection):
+    """Create the jsonb GIN indexes on PostgreSQL; returns False elsewhere."""
+    if schema_connection.vendor != "postgresql":
+        return False
+    with schema_connection.cursor() as cursor:
+        for name, (table, column) in GIN_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} jsonb_path_ops)")
+    return True
+
+
+def uninstall_gin_indexes(schema_connection):
+    if schema_connection.vendor != "postgresql":
+        return
+    with schema_connection.cursor() as cursor:
+        for name in GIN_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
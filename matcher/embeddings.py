@@ -0,0 +1,369 @@
+import os
+import re
+import secrets
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .scoring import normalize_skill
+
+# Semantic index over job postings and candidate profiles.
+#
+# Documents are embedded by a pluggable embedder (a deterministic hashing
+# embedder by default, so everything works offline) and stored as (id,
+# float32 vector) records in one file per index that is memory-mapped for
+# search. Saves append a record under a file lock shared by all processes;
+# the latest record for an id wins, and deletions append a tombstone.
+# "manage.py build_embeddings" rewrites the file without superseded records.
+#
+# Search is approximate: every row also gets a 256-bit random-hyperplane
+# signature, the closest signatures by Hamming distance are shortlisted and
+# only that shortlist is scored exactly.
+
+DEFAULTS = {
+    "EMBEDDER": "matcher.embeddings.HashingEmbedder",
+    "DIM": 256,
+    "DIR": None,
+    # Below this many rows search is exact.
+    "EXACT_SEARCH_LIMIT": 5000,
+    # Signature shortlist size per requested neighbour.
+    "SHORTLIST_FACTOR": 20,
+}
+
+# Signature width, in 64-bit words.
+SIGNATURE_WORDS = 4
+
+# Data file header: magic, vector width and a generation number that is new
+# for every rebuilt file.
+MAGIC = 0x43455650  # "PVEC"
+HEADER = np.dtype([("magic", "<u4"), ("dim", "<u4"), ("generation", "<u8")])
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def embedding_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "EMBEDDINGS", {}))
+    if options["DIR"] is None:
+        options["DIR"] = settings.BASE_DIR / "embeddings"
+    return options
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over words, skill aliases and character trigrams.
+
+    Deterministic across processes and machines (crc32, not ``hash()``), so
+    vectors written by one worker can be searched by another.
+    """
+
+    MAX_MEMOIZED_FEATURES = 500_000
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self._slots = {}
+
+    def slot(self, feature):
+        slot = self._slots.get(feature)
+        if slot is None:
+            if len(self._slots) > self.MAX_MEMOIZED_FEATURES:
+                self._slots.clear()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            slot = self._slots[feature] = (digest % self.dim, 1.0 if digest & 0x80000000 else -1.0)
+        return slot
+
+    def features(self, text):
+        for token in _TOKEN.findall(text.lower()):
+            token = token.rstrip(".")
+            yield "w:" + normalize_skill(token), 1.0
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.5
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vector = vectors[row]
+            for feature, weight in self.features(text):
+                column, sign = self.slot(feature)
+                vector[column] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class VectorStore:
+    """Append-only file of (id, float32 vector) records, searched through a memmap."""
+
+    def __init__(self, path, dim, exact_search_limit=5000, shortlist_factor=20):
+        self.path = Path(path)
+        self.dim = dim
+        self.exact_search_limit = exact_search_limit
+        self.shortlist_factor = shortlist_factor
+        self.data_path = self.path.with_suffix(".vec")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.record = np.dtype([("id", "<i8"), ("vector", "<f4", (dim,))])
+
+        planes = np.random.default_rng(0).standard_normal((dim, SIGNATURE_WORDS * 64))
+        self.planes = planes.astype(np.float32)
+
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self, generation=None):
+        self._generation = generation
+        self._rows = 0
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._signatures = np.empty((0, SIGNATURE_WORDS), dtype=np.uint64)
+        self._row_of = {}
+        self._live = np.empty(0, dtype=bool)
+
+    def signatures(self, vectors):
+        bits = (np.asarray(vectors) @ self.planes) > 0
+        return np.packbits(bits, axis=1).view(np.uint64)
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the store's lock file, against threads and other processes alike."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a+b") as handle:
+                _lock_file(handle)
+                try:
+                    yield
+                finally:
+                    _unlock_file(handle)
+
+    def _header(self, generation):
+        return np.array([(MAGIC, self.dim, generation)], dtype=HEADER).tobytes()
+
+    def _stored_state(self):
+        """``(generation, rows)`` of the data file, or ``(None, 0)`` if there is none yet."""
+        try:
+            with open(self.data_path, "rb") as handle:
+                header = handle.read(HEADER.itemsize)
+                size = os.fstat(handle.fileno()).st_size
+        except FileNotFoundError:
+            return None, 0
+        if len(header) < HEADER.itemsize:
+            return None, 0
+        magic, dim, generation = np.frombuffer(header, dtype=HEADER)[0].tolist()
+        if magic != MAGIC or dim != self.dim:
+            raise ValueError(f"{self.data_path} does not hold {self.dim}-dimensional vectors; run manage.py build_embeddings.")
+        return generation, (size - HEADER.itemsize) // self.record.itemsize
+
+    def refresh(self):
+        """Pick up rows appended since the last call, by this or any other process.
+
+        A rebuild replaces the file under a new generation number, which
+        starts the in-memory state over.
+        """
+        generation, rows = self._stored_state()
+        if generation != self._generation:
+            self._reset(generation)
+        if rows == self._rows:
+            return
+
+        start = self._rows
+        records = np.memmap(self.data_path, dtype=self.record, mode="r", offset=HEADER.itemsize, shape=(rows,))
+        self._vectors = records["vector"]
+        self._ids = ids = np.asarray(records["id"])
+        self._signatures = np.concatenate([self._signatures, self.signatures(self._vectors[start:rows])])
+        for row in range(start, rows):
+            doc_id = int(ids[row])
+            if doc_id < 0:
+                self._row_of.pop(-doc_id, None)
+            else:
+                self._row_of[doc_id] = row
+        self._live = np.zeros(rows, dtype=bool)
+        self._live[list(self._row_of.values())] = True
+        self._rows = rows
+
+    def _records(self, ids, vectors):
+        records = np.empty(len(ids), dtype=self.record)
+        records["id"] = ids
+        records["vector"] = vectors
+        return records.tobytes()
+
+    def _append(self, ids, vectors):
+        # One write per batch of whole records, so readers never see an id
+        # without its vector.
+        with self._exclusive():
+            with open(self.data_path, "ab") as handle:
+                if os.fstat(handle.fileno()).st_size < HEADER.itemsize:
+                    handle.truncate(0)
+                    handle.write(self._header(secrets.randbits(63)))
+                handle.write(self._records(ids, vectors))
+
+    def add(self, ids, vectors):
+        self._append(ids, vectors)
+
+    def remove(self, ids):
+        self._append([-doc_id for doc_id in ids], np.zeros((len(ids), self.dim), dtype=np.float32))
+
+    def rebuild(self, batches):
+        """Replace every stored row with the ``(ids, vectors)`` batches.
+
+        The new file is written next to the old one and swapped in, so other
+        processes keep searching the old rows until then. Rows they append
+        while the batches are written are carried over.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        start_generation, start_rows = self._stored_state()
+        temp_path = self.data_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as handle:
+                handle.write(self._header(secrets.randbits(63)))
+                for ids, vectors in batches:
+                    handle.write(self._records(ids, vectors))
+            with self._exclusive():
+                generation, rows = self._stored_state()
+                if generation is not None and start_generation in (None, generation) and rows > start_rows:
+                    appended = np.memmap(self.data_path, dtype=self.record, mode="r", offset=HEADER.itemsize, shape=(rows,))
+                    with open(temp_path, "ab") as handle:
+                        handle.write(appended[start_rows:rows].tobytes())
+                    del appended
+                os.replace(temp_path, self.data_path)
+                self._reset()
+        finally:
+            temp_path.unlink(missing_ok=True)
+        # Files of the earlier two-file layout.
+        for suffix in (".f32", ".ids"):
+            self.path.with_suffix(suffix).unlink(missing_ok=True)
+
+    def compact(self):
+        """Rewrite the file with only the latest row of every live id."""
+
+        def live_rows():
+            with self._lock:
+                self.refresh()
+                live = np.flatnonzero(self._live)
+                yield self._ids[live], self._vectors[live]
+
+        self.rebuild(live_rows())
+
+    def clear(self):
+        self.rebuild([])
+
+    def stored_rows(self):
+        """Rows in the file, superseded ones and tombstones included."""
+        return self._stored_state()[1]
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._row_of)
+
+    def search(self, vector, k=10):
+        """Return ``(ids, similarities)`` of the ``k`` nearest stored documents."""
+        with self._lock:
+            self.refresh()
+            live = np.flatnonzero(self._live)
+            if not len(live) or k <= 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+            shortlist_size = max(k * self.shortlist_factor, self.exact_search_limit)
+            if len(live) > shortlist_size:
+                signature = self.signatures(vector[None, :])[0]
+                distances = np.bitwise_count(self._signatures[live] ^ signature).sum(axis=1, dtype=np.int32)
+                live = live[np.argpartition(distances, shortlist_size - 1)[:shortlist_size]]
+
+            similarities = self._vectors[live] @ vector
+            k = min(k, len(live))
+            best = np.argpartition(-similarities, k - 1)[:k]
+            best = best[np.argsort(-similarities[best], kind="stable")]
+            return self._ids[live[best]], similarities[best]
+
+
+def job_document(job):
+    """Text embedded for a job posting (a dict of JobPosting fields)."""
+    skills = ", ".join(str(skill) for skill in job.get("required_skills") or [])
+    return f"{job.get('title', '')}\n{job.get('company', '')}\n{skills}\n{job.get('description', '')}"
+
+
+def candidate_document(candidate):
+    """Text embedded for a candidate (a dict of CandidateProfile fields)."""
+    parts = [
+        ", ".join(str(skill) for skill in candidate.get("skills") or []),
+        "\n".join(str(item) for item in candidate.get("education") or []),
+        "\n".join(str(item) for item in candidate.get("work_experience") or []),
+    ]
+    return "\n".join(parts)
+
+
+class SemanticIndex:
+    """An embedder plus a vector store for one kind of document."""
+
+    def __init__(self, name, embedder, options):
+        self.embedder = embedder
+        self.store = VectorStore(
+            Path(options["DIR"]) / name,
+            embedder.dim,
+            exact_search_limit=options["EXACT_SEARCH_LIMIT"],
+            shortlist_factor=options["SHORTLIST_FACTOR"],
+        )
+
+    def add(self, ids, texts):
+        if ids:
+            self.store.add(ids, self.embedder.embed(texts))
+
+    def remove(self, ids):
+        self.store.remove(ids)
+
+    def rebuild(self, batches):
+        """Replace the stored vectors with those of ``(ids, texts)`` batches."""
+        self.store.rebuild((ids, self.embedder.embed(texts)) for ids, texts in batches)
+
+    def search(self, text, k=10):
+        return self.store.search(self.embedder.embed([text])[0], k)
+
+
+_embedder = None
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        options = embedding_settings()
+        _embedder = import_string(options["EMBEDDER"])(dim=options["DIM"])
+    return _embedder
+
+
+def get_semantic_index(name):
+    """Return the shared semantic index for ``"jobs"`` or ``"candidates"``."""
+    index = _indexes.get(name)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(name)
+            if index is None:
+                index = _indexes[name] = SemanticIndex(name, get_embedder(), embedding_settings())
+    return index
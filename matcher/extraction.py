@@ -0,0 +1,112 @@
+import io
+import logging
+import threading
+
+import pdfplumber
+import pypdfium2
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# PDF text extraction engines.
+#
+# "pdfium" (pypdfium2) reads the text layer directly and is an order of
+# magnitude faster than pdfplumber, whose layout analysis copes better with
+# unusual layouts. "auto" uses pdfium and falls back to pdfplumber for pages
+# where pdfium finds no text, or for the whole file if pdfium cannot open it.
+
+PDF_ENGINES = ("auto", "pdfium", "pdfplumber")
+
+DEFAULTS = {
+    "ENGINE": "auto",
+    # Stop after this many pages; None reads everything.
+    "MAX_PAGES": 50,
+}
+
+# PDFium is not thread-safe; every call into it is serialized.
+_pdfium_lock = threading.Lock()
+
+
+def extraction_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "PDF_EXTRACTION", {}))
+    return options
+
+
+def _as_bytes(source):
+    """Read file-like sources once so every engine can re-open them."""
+    if hasattr(source, "read"):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return source.read()
+    return source
+
+
+def _pdfplumber_source(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def iter_pdfplumber_pages(source, max_pages=None):
+    with pdfplumber.open(_pdfplumber_source(source)) as pdf:
+        for page in pdf.pages[:max_pages]:
+            yield page.extract_text() or ""
+            page.close()
+
+
+def iter_pdfium_pages(source, max_pages=None, fallback=False):
+    with _pdfium_lock:
+        pdf = pypdfium2.PdfDocument(source)
+    plumber = None
+    try:
+        count = len(pdf) if max_pages is None else min(len(pdf), max_pages)
+        for index in range(count):
+            with _pdfium_lock:
+                page = pdf[index]
+                textpage = page.get_textpage()
+                text = textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+            text = text.replace("\r\n", "\n")
+
+            if fallback and not text.strip():
+                if plumber is None:
+                    plumber = pdfplumber.open(_pdfplumber_source(source))
+                text = plumber.pages[index].extract_text() or ""
+            yield text
+    finally:
+        if plumber is not None:
+            plumber.close()
+        with _pdfium_lock:
+            pdf.close()
+
+
+def iter_pdf_pages(source, engine=None, max_pages=None):
+    """Yield the text of each page of a PDF.
+
+    ``source`` may be a path, bytes or a file-like object. ``engine`` and
+    ``max_pages`` default to ``settings.PDF_EXTRACTION``.
+    """
+    options = extraction_settings()
+    engine = engine or options["ENGINE"]
+    max_pages = options["MAX_PAGES"] if max_pages is None else max_pages
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine!r}")
+
+    source = _as_bytes(source)
+    if engine == "pdfplumber":
+        yield from iter_pdfplumber_pages(source, max_pages)
+        return
+    if engine == "pdfium":
+        yield from iter_pdfium_pages(source, max_pages)
+        return
+
+    try:
+        pages = iter_pdfium_pages(source, max_pages, fallback=True)
+        first = next(pages, None)
+    except pypdfium2.PdfiumError:
+        logger.warning("pdfium could not open the PDF, falling back to pdfplumber", exc_info=True)
+        yield from iter_pdfplumber_pages(source, max_pages)
+        return
+    if first is not None:
+        yield first
+        yield from pages
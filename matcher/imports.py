@@ -0,0 +1,222 @@
+import csv
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .metrics import in_context
+from .models import JobPosting
+from .serializers import JobPostingSerializer
+from .utils import parse_job_posting
+
+logger = logging.getLogger(__name__)
+
+# Bulk job posting import.
+#
+# Postings arrive as NDJSON or CSV, either structured (title, company,
+# required_skills, description) or as raw text in a ``job_text`` field that
+# the LLM parses first; structured fields given next to ``job_text`` win
+# over the parsed ones. Rows are handled BATCH_SIZE at a time: raw postings
+# are parsed CONCURRENCY at once, the batch is validated with
+# JobPostingSerializer, postings whose content hash (normalized title,
+# company and description) is already stored or seen earlier in the import
+# are dropped, and the rest are written with one bulk_create per batch. The
+# hash is unique in the table, so concurrent imports cannot store a posting
+# twice either.
+
+DEFAULTS = {
+    # Concurrent LLM calls for raw postings.
+    "CONCURRENCY": 16,
+    # Postings validated and inserted together.
+    "BATCH_SIZE": 500,
+    # Rows accepted by one /api/jobs/import/ request; larger files go
+    # through "manage.py import_jobs".
+    "MAX_API_ROWS": 10000,
+    # Row errors included in the import report.
+    "MAX_ERRORS": 100,
+}
+
+FORMATS = ("ndjson", "csv")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def import_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "JOB_IMPORT", {}))
+    return options
+
+
+def normalize_text(value):
+    return _WHITESPACE.sub(" ", str(value or "")).strip().casefold()
+
+
+def job_content_hash(job):
+    """SHA-256 of a posting's normalized title, company and description; equal for postings that differ only in case or spacing."""
+    payload = [normalize_text(job.get(field)) for field in ("title", "company", "description")]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def split_skills(value):
+    """``required_skills`` from a CSV cell: a JSON list, or names separated by commas or semicolons."""
+    value = (value or "").strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [skill.strip() for skill in re.split(r"[;,]", value) if skill.strip()]
+
+
+def read_postings(lines, file_format):
+    """Yield ``(row number, posting dict)`` from an iterable of text lines.
+
+    Rows that cannot be read yield ``(row number, ValueError)`` instead.
+    """
+    if file_format == "ndjson":
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+                continue
+            yield number, row if isinstance(row, dict) else ValueError("Each line must be a JSON object.")
+    elif file_format == "csv":
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            row = {key: value for key, value in row.items() if key and value not in (None, "")}
+            if "required_skills" in row:
+                try:
+                    row["required_skills"] = split_skills(row["required_skills"])
+                except json.JSONDecodeError as e:
+                    yield number, ValueError(f"Invalid required_skills: {e}")
+                    continue
+            yield number, row
+    else:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}.")
+
+
+class JobImporter:
+    """Imports postings in batches and counts what happened to them."""
+
+    def __init__(self, concurrency=None, batch_size=None, max_errors=None, on_error=None):
+        options = import_settings()
+        self.concurrency = concurrency or options["CONCURRENCY"]
+        self.batch_size = batch_size or options["BATCH_SIZE"]
+        self.max_errors = options["MAX_ERRORS"] if max_errors is None else max_errors
+        # Called with (row number, errors) for every rejected row.
+        self.on_error = on_error
+        self.counts = {"rows": 0, "created": 0, "duplicates": 0, "invalid": 0, "parsed": 0}
+        self.errors = []
+        # Content hashes of postings created or skipped so far, and hashes
+        # of raw texts already parsed, to drop repeats within the import.
+        self._seen = set()
+        self._seen_texts = set()
+
+    def report(self):
+        return {**self.counts, "errors": self.errors}
+
+    def run(self, rows, progress=None):
+        """Import ``(row number, posting)`` pairs, as yielded by :func:`read_postings`; returns :meth:`report`."""
+        rows = iter(rows)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while batch := list(islice(rows, self.batch_size)):
+                self.counts["rows"] += len(batch)
+                self.import_batch(batch, executor)
+                if progress is not None:
+                    progress(self.counts)
+        return self.report()
+
+    def error(self, number, errors):
+        self.counts["invalid"] += 1
+        if self.on_error is not None:
+            self.on_error(number, errors)
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "errors": errors})
+
+    def parse(self, number, row):
+        try:
+            # parse_job_posting returns the function call arguments as JSON text.
+            parsed = json.loads(parse_job_posting(row["job_text"]))
+        except Exception as e:
+            logger.warning("Parsing posting %d failed", number, exc_info=True)
+            return number, ValueError(f"Parsing failed: {type(e).__name__}: {e}")
+        if not isinstance(parsed, dict):
+            return number, ValueError("The model returned no structured data.")
+        given = {key: value for key, value in row.items() if key != "job_text"}
+        return number, {**parsed, **given}
+
+    def import_batch(self, batch, executor):
+        structured, raw = [], []
+        for number, row in batch:
+            if isinstance(row, Exception):
+                self.error(number, str(row))
+            elif row.get("job_text"):
+                text_hash = hashlib.sha256(normalize_text(row["job_text"]).encode("utf-8")).hexdigest()
+                if text_hash in self._seen_texts:
+                    self.counts["duplicates"] += 1
+                    continue
+                self._seen_texts.add(text_hash)
+                raw.append((number, row))
+            else:
+                structured.append((number, row))
+
+        for number, row in executor.map(in_context(lambda item: self.parse(*item)), raw):
+            if isinstance(row, Exception):
+                self.error(number, str(row))
+            else:
+                self.counts["parsed"] += 1
+                structured.append((number, row))
+        if not structured:
+            return
+
+        structured.sort(key=lambda item: item[0])
+        serializer = JobPostingSerializer(data=[row for _, row in structured], many=True)
+        if not serializer.is_valid():
+            for (number, _), errors in zip(structured, serializer.errors):
+                if errors:
+                    self.error(number, errors)
+            structured = [item for item, errors in zip(structured, serializer.errors) if not errors]
+            serializer = JobPostingSerializer(data=[row for _, row in structured], many=True)
+            serializer.is_valid(raise_exception=True)
+
+        postings = {}
+        for data in serializer.validated_data:
+            posting = JobPosting(**data)
+            posting.content_hash = job_content_hash(data)
+            if posting.content_hash in self._seen or posting.content_hash in postings:
+                self.counts["duplicates"] += 1
+            else:
+                postings[posting.content_hash] = posting
+        self._seen.update(postings)
+        created = self.create(postings)
+        self.counts["created"] += len(created)
+        self.counts["duplicates"] += len(postings) - len(created)
+
+    def create(self, postings):
+        """Insert ``postings`` (``{content hash: JobPosting}``) whose hash is not stored; returns the created rows.
+
+        The unique constraint on content_hash also skips postings another
+        import stores at the same time. Where such imports run concurrently
+        (not on SQLite), a posting both insert at once may be counted as
+        created by both; it is stored once.
+        """
+        if not postings:
+            return []
+        with transaction.atomic():
+            stored = set(JobPosting.objects.filter(content_hash__in=list(postings)).values_list("content_hash", flat=True))
+            new = [posting for content_hash, posting in postings.items() if content_hash not in stored]
+            # Rows skipped as conflicts get no id, so read the created ones back.
+            JobPosting.objects.bulk_create(new, batch_size=self.batch_size, ignore_conflicts=True)
+            created = list(JobPosting.objects.filter(content_hash__in=[posting.content_hash for posting in new]).order_by("id"))
+
+        # signals imports this module for job_content_hash.
+        from .signals import jobs_bulk_created
+
+        jobs_bulk_created(created)
+        return created
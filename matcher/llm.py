@@ -0,0 +1,314 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import openai
+from django.conf import settings
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from .metrics import record_llm_usage, timed
+from .prompts import estimate_tokens
+from .usage import areserve, estimate_prompt_tokens, record_usage, release, reserve
+
+load_dotenv()
+
+# Single gateway for every chat completion.
+#
+# One OpenAI client (and so one httpx connection pool) is shared by the whole
+# process. Calls are bounded by a global semaphore and a client-side token
+# bucket, time out instead of hanging, and are retried with jittered
+# exponential backoff on rate limits, timeouts, connection errors and 5xx.
+# Pointing BASE_URL at a local OpenAI-compatible server (for example
+# benchmarks/stub_llm.py) exercises all of this without the real API.
+#
+# Async code gets an AsyncOpenAI-based gateway per event loop (httpx async
+# pools cannot be shared between loops); it shares the process-wide rate
+# limiter but has its own, larger concurrency cap: a waiting coroutine costs
+# far less than a waiting thread.
+
+DEFAULTS = {
+    "API_KEY": None,
+    "BASE_URL": None,
+    "TIMEOUT": 60.0,
+    "CONNECT_TIMEOUT": 5.0,
+    "MAX_RETRIES": 4,
+    "BACKOFF_MAX": 30.0,
+    "MAX_CONNECTIONS": 64,
+    "MAX_CONCURRENCY": 16,
+    # Per event loop; that loop's connection pools are sized to match.
+    "ASYNC_MAX_CONCURRENCY": 256,
+    # Requests per second; None disables the rate limiter.
+    "RATE_LIMIT": None,
+    "BURST": 10,
+}
+
+
+def gateway_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "LLM_GATEWAY", {}))
+    options["API_KEY"] = options["API_KEY"] or os.getenv("OPENAI_API_KEY")
+    options["BASE_URL"] = options["BASE_URL"] or os.getenv("OPENAI_BASE_URL")
+    return options
+
+
+class TokenBucket:
+    """Client-side rate limiter: ``rate`` requests per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token if one is available; otherwise return seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while wait := self.reserve():
+            time.sleep(wait)
+
+    async def aacquire(self):
+        while wait := self.reserve():
+            await asyncio.sleep(wait)
+
+
+def is_retryable(exc):
+    if isinstance(exc, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+class LLMGateway:
+    retrying_class = Retrying
+
+    def __init__(self, options):
+        self.options = options
+        self.timeout = httpx.Timeout(options["TIMEOUT"], connect=options["CONNECT_TIMEOUT"])
+        self.limits = httpx.Limits(
+            max_connections=options["MAX_CONNECTIONS"],
+            max_keepalive_connections=options["MAX_CONNECTIONS"],
+        )
+        self.client = self.make_client()
+        self.semaphore = self.make_semaphore()
+        self.bucket = get_rate_limiter(options)
+
+    def make_client(self):
+        return OpenAI(
+            api_key=self.options["API_KEY"],
+            base_url=self.options["BASE_URL"],
+            timeout=self.timeout,
+            # Retries are handled here, with backoff shared by every caller.
+            max_retries=0,
+            http_client=httpx.Client(timeout=self.timeout, limits=self.limits),
+        )
+
+    def make_semaphore(self):
+        return threading.BoundedSemaphore(self.options["MAX_CONCURRENCY"])
+
+    def retrying(self):
+        return self.retrying_class(
+            retry=retry_if_exception(is_retryable),
+            wait=wait_random_exponential(multiplier=0.5, max=self.options["BACKOFF_MAX"]),
+            stop=stop_after_attempt(self.options["MAX_RETRIES"] + 1),
+            reraise=True,
+        )
+
+    def next_client(self):
+        return self.client
+
+    def _call(self, **kwargs):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        with self.semaphore:
+            return self.next_client().chat.completions.create(**kwargs)
+
+    def chat_completion(self, operation="completion", **kwargs):
+        """Create a completion; ``operation`` names the caller in the usage ledger."""
+        reservation = reserve(kwargs)
+        try:
+            with timed("llm"):
+                response = self.retrying()(self._call, **kwargs)
+        except BaseException:
+            release(reservation)
+            raise
+        self.record(reservation, operation, kwargs, response)
+        return response
+
+    @staticmethod
+    def record(reservation, operation, request, response):
+        usage = getattr(response, "usage", None)
+        record_llm_usage(request.get("model"), usage)
+        record_usage(
+            reservation, operation, request.get("model"),
+            getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def stream_chat_completion(self, operation="completion", **kwargs):
+        """Yield the content of a streamed completion as it arrives.
+
+        Only opening the stream is retried; the concurrency slot is held until
+        the stream is exhausted or the caller stops iterating. Streams carry
+        no usage, so their tokens are estimated from the text.
+        """
+        reservation = reserve(kwargs)
+        parts = []
+        try:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            with timed("llm.stream"), self.semaphore:
+                create = self.next_client().chat.completions.create
+                with self.retrying()(create, stream=True, **kwargs) as stream:
+                    for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            yield chunk.choices[0].delta.content
+        finally:
+            self.record_stream(reservation, operation, kwargs, parts)
+
+    @staticmethod
+    def record_stream(reservation, operation, request, parts):
+        record_llm_usage(request.get("model"), None)
+        if not parts:
+            release(reservation)
+            return
+        record_usage(
+            reservation, operation, request.get("model"),
+            estimate_prompt_tokens(request), estimate_tokens("".join(parts)), estimated=True,
+        )
+
+
+class AsyncLLMGateway(LLMGateway):
+    retrying_class = AsyncRetrying
+
+    # httpcore scans its whole pool on every request, which turns quadratic
+    # with hundreds of connections, so the pool is split across small clients.
+    CONNECTIONS_PER_CLIENT = 16
+
+    def __init__(self, options):
+        options = dict(
+            options,
+            MAX_CONCURRENCY=options["ASYNC_MAX_CONCURRENCY"],
+            MAX_CONNECTIONS=self.CONNECTIONS_PER_CLIENT,
+        )
+        super().__init__(options)
+        count = -(-options["MAX_CONCURRENCY"] // self.CONNECTIONS_PER_CLIENT)
+        self.clients = itertools.cycle([self.client] + [self.make_client() for _ in range(count - 1)])
+
+    def make_client(self):
+        return AsyncOpenAI(
+            api_key=self.options["API_KEY"],
+            base_url=self.options["BASE_URL"],
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=httpx.AsyncClient(timeout=self.timeout, limits=self.limits),
+        )
+
+    def make_semaphore(self):
+        return asyncio.Semaphore(self.options["MAX_CONCURRENCY"])
+
+    def next_client(self):
+        return next(self.clients)
+
+    async def _call(self, **kwargs):
+        if self.bucket is not None:
+            await self.bucket.aacquire()
+        async with self.semaphore:
+            return await self.next_client().chat.completions.create(**kwargs)
+
+    async def chat_completion(self, operation="completion", **kwargs):
+        reservation = await areserve(kwargs)
+        try:
+            with timed("llm"):
+                response = await self.retrying()(self._call, **kwargs)
+        except BaseException:
+            release(reservation)
+            raise
+        self.record(reservation, operation, kwargs, response)
+        return response
+
+    async def stream_chat_completion(self, operation="completion", **kwargs):
+        reservation = await areserve(kwargs)
+        parts = []
+        try:
+            if self.bucket is not None:
+                await self.bucket.aacquire()
+            with timed("llm.stream"):
+                async with self.semaphore:
+                    create = self.next_client().chat.completions.create
+                    async with await self.retrying()(create, stream=True, **kwargs) as stream:
+                        async for chunk in stream:
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                parts.append(chunk.choices[0].delta.content)
+                                yield chunk.choices[0].delta.content
+        finally:
+            self.record_stream(reservation, operation, kwargs, parts)
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter(options):
+    global _rate_limiter
+    if options["RATE_LIMIT"] and _rate_limiter is None:
+        _rate_limiter = TokenBucket(options["RATE_LIMIT"], options["BURST"])
+    return _rate_limiter if options["RATE_LIMIT"] else None
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+_async_gateways = weakref.WeakKeyDictionary()
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway(gateway_settings())
+    return _gateway
+
+
+def chat_completion(**kwargs):
+    """Create a chat completion through the shared gateway."""
+    return get_gateway().chat_completion(**kwargs)
+
+
+def get_async_gateway():
+    loop = asyncio.get_running_loop()
+    gateway = _async_gateways.get(loop)
+    if gateway is None:
+        gateway = _async_gateways[loop] = AsyncLLMGateway(gateway_settings())
+    return gateway
+
+
+async def achat_completion(**kwargs):
+    """Async counterpart of :func:`chat_completion`, using AsyncOpenAI."""
+    return await get_async_gateway().chat_completion(**kwargs)
+
+
+def stream_chat_completion(**kwargs):
+    """Stream a chat completion through the shared gateway, yielding text deltas."""
+    return get_gateway().stream_chat_completion(**kwargs)
+
+
+def astream_chat_completion(**kwargs):
+    """Async counterpart of :func:`stream_chat_completion`."""
+    return get_async_gateway().stream_chat_completion(**kwargs)
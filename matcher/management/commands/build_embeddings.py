@@ -0,0 +1,32 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from matcher.embeddings import candidate_document, get_semantic_index, job_document
+from matcher.models import CandidateProfile, JobPosting
+
+
+class Command(BaseCommand):
+    help = "Rebuild the semantic (embedding) indexes from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--compact", action="store_true", help="Only drop superseded rows and tombstones, without re-embedding.")
+
+    def handle(self, *args, **options):
+        sources = [
+            ("jobs", JobPosting.objects.values("id", "title", "company", "required_skills", "description"), job_document),
+            ("candidates", CandidateProfile.objects.values("id", "skills", "education", "work_experience"), candidate_document),
+        ]
+        for name, rows, document in sources:
+            index = get_semantic_index(name)
+            if options["compact"]:
+                before = index.store.stored_rows()
+                index.store.compact()
+                self.stdout.write(f"{name}: {before} rows compacted to {index.store.stored_rows()}")
+                continue
+
+            rows = rows.order_by("id").iterator(chunk_size=options["batch_size"])
+            batches = iter(lambda: list(islice(rows, options["batch_size"])), [])
+            index.rebuild(([row["id"] for row in batch], [document(row) for row in batch]) for batch in batches)
+            self.stdout.write(f"{name}: {len(index.store)} documents indexed")
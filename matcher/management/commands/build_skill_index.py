@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from matcher.models import CandidateProfile, CandidateSkill, JobPosting, JobSkill
+from matcher.skills import backfill_skill_links
+
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized skill tables from the JSON skill lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sources = [
+            ("jobs", JobPosting, "required_skills", JobSkill, "job"),
+            ("candidates", CandidateProfile, "skills", CandidateSkill, "candidate"),
+        ]
+        for name, model, column, link_model, owner_field in sources:
+            seen = backfill_skill_links(model, column, link_model, owner_field, batch_size=options["batch_size"])
+            self.stdout.write(f"{name}: {seen} rows, {link_model.objects.count()} skill links")
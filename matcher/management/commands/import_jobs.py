@@ -0,0 +1,54 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from matcher.imports import FORMATS, JobImporter, read_postings
+
+
+class Command(BaseCommand):
+    help = "Bulk-import job postings from an NDJSON or CSV file of structured or raw postings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="NDJSON or CSV file, or - for standard input.")
+        parser.add_argument("--format", choices=FORMATS, default=None, help="Input format (default: from the file extension).")
+        parser.add_argument("--concurrency", type=int, default=None, help="Concurrent LLM parse requests (default: JOB_IMPORT['CONCURRENCY']).")
+        parser.add_argument("--batch-size", type=int, default=None, help="Postings per bulk insert (default: JOB_IMPORT['BATCH_SIZE']).")
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        file_format = options["format"]
+        if file_format is None:
+            suffix = Path(source).suffix.lower().lstrip(".")
+            file_format = {"jsonl": "ndjson"}.get(suffix, suffix)
+        if file_format not in FORMATS:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        if source != "-" and not Path(source).is_file():
+            raise CommandError(f"{source} does not exist.")
+
+        started = time.perf_counter()
+
+        def progress(counts):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"[{counts['rows']} rows] {counts['created']} created, {counts['duplicates']} duplicates, "
+                f"{counts['invalid']} invalid ({counts['rows'] / elapsed:.1f} rows/s)"
+            )
+
+        importer = JobImporter(
+            options["concurrency"], options["batch_size"], max_errors=0,
+            on_error=lambda number, errors: self.stderr.write(f"row {number}: {errors}"),
+        )
+        if source == "-":
+            report = importer.run(read_postings(sys.stdin, file_format), progress)
+        else:
+            with open(source, newline="", encoding="utf-8") as lines:
+                report = importer.run(read_postings(lines, file_format), progress)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} postings ({report['parsed']} parsed by the LLM), skipped "
+            f"{report['duplicates']} duplicates and {report['invalid']} invalid rows in {elapsed:.1f}s"
+        ))
+
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, transaction
+
+from matcher.extraction import iter_pdf_pages
+from matcher.models import CandidateProfile, ResumeJob
+from matcher.resume_queue import SUPPORTED_FILE_TYPES
+from matcher.signals import candidates_bulk_created
+from matcher.storage import file_hash
+from matcher.utils import extract_text_from_docx, parse_resume_text
+
+
+def extract_resume(name, data):
+    """Extract text from one resume in a worker process.
+
+    Returns ``(text, pages, error)``; DOCX files count as one page.
+    """
+    file_type = name.rsplit(".", 1)[-1].lower()
+    try:
+        if file_type == "pdf":
+            pages = list(iter_pdf_pages(data))
+            return "\n".join(pages), len(pages), None
+        return extract_text_from_docx(data), 1, None
+    except Exception as e:
+        return None, 0, f"{type(e).__name__}: {e}"
+
+
+def iter_directory(path):
+    """Yield ``(name, read)`` for every resume under ``path``; ``read()`` returns the file's bytes."""
+    for file in sorted(path.rglob("*")):
+        if file.is_file() and file.suffix.lower().lstrip(".") in SUPPORTED_FILE_TYPES:
+            yield file.name, file.read_bytes
+
+
+def iter_archive(path):
+    """Like :func:`iter_directory`, for a zip archive; ``read()`` is only valid until the next item."""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.rsplit(".", 1)[-1].lower() in SUPPORTED_FILE_TYPES:
+                yield Path(info.filename).name, partial(archive.read, info)
+
+
+def load_file(read):
+    data = read()
+    return data, file_hash(data)
+
+
+def candidate_fields(parsed):
+    """CandidateProfile fields of a parsed resume, with missing or null values defaulted."""
+    if not isinstance(parsed, dict):
+        raise ValueError("The model returned no structured data.")
+    fields = {"name": str(parsed.get("name") or "")[:CandidateProfile._meta.get_field("name").max_length]}
+    for field in ("skills", "education", "work_experience"):
+        value = parsed.get(field)
+        fields[field] = value if isinstance(value, list) else [] if value in (None, "") else [value]
+    return fields
+
+
+def count_files(path):
+    if path.is_dir():
+        return sum(1 for file in path.rglob("*") if file.is_file() and file.suffix.lower().lstrip(".") in SUPPORTED_FILE_TYPES)
+    with zipfile.ZipFile(path) as archive:
+        return sum(1 for info in archive.infolist() if info.filename.rsplit(".", 1)[-1].lower() in SUPPORTED_FILE_TYPES)
+
+
+class Command(BaseCommand):
+    help = "Bulk-ingest resumes from a directory or zip archive into CandidateProfile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip archive of PDF/DOCX resumes.")
+        parser.add_argument("--processes", type=int, default=None, help="Text extraction processes (default: CPU count).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Concurrent LLM parse requests.")
+        parser.add_argument("--batch-size", type=int, default=200, help="Rows per bulk insert.")
+        parser.add_argument("--progress-every", type=int, default=100)
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if source.is_dir():
+            files = iter_directory(source)
+        elif zipfile.is_zipfile(source):
+            files = iter_archive(source)
+        else:
+            raise CommandError(f"{source} is neither a directory nor a zip archive.")
+
+        self.total = count_files(source)
+        # Anything not known to have failed is done or already queued elsewhere.
+        self.done_hashes = set(
+            ResumeJob.objects.exclude(status=ResumeJob.FAILED).values_list("file_hash", flat=True)
+        )
+        self.options = options
+        self.counts = {"ingested": 0, "skipped": 0, "failed": 0, "pages": 0}
+        self.seen = 0
+        self.pending = []
+        self.started = time.perf_counter()
+
+        self.processes = options["processes"] or os.cpu_count() or 1
+        # Workers started with "spawn" import this module afresh, so they set
+        # Django up before running extract_resume.
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=django.setup) as processes:
+            asyncio.run(self.ingest(files, processes))
+
+        elapsed = time.perf_counter() - self.started
+        processed = self.counts["ingested"] + self.counts["failed"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {self.counts['ingested']}, skipped {self.counts['skipped']} already ingested, "
+            f"failed {self.counts['failed']} in {elapsed:.1f}s "
+            f"({processed / elapsed:.1f} files/s, {self.counts['pages'] / elapsed:.1f} pages/s)"
+        ))
+
+    async def ingest(self, files, processes):
+        loop = asyncio.get_running_loop()
+        # Bound files held in memory as well as concurrent LLM requests.
+        in_flight = asyncio.Semaphore(max(self.options["concurrency"], self.processes) * 2)
+        llm_slots = asyncio.Semaphore(self.options["concurrency"])
+        flush_lock = asyncio.Lock()
+        tasks = set()
+
+        async def handle_file(name, data, digest):
+            try:
+                text, pages, error = await loop.run_in_executor(processes, extract_resume, name, data)
+                parsed = fields = None
+                if error is None:
+                    async with llm_slots:
+                        try:
+                            parsed = await asyncio.to_thread(parse_resume_text, text)
+                        except Exception as e:
+                            error = f"{type(e).__name__}: {e}"
+                    if error is None:
+                        try:
+                            fields = candidate_fields(parsed)
+                        except ValueError as e:
+                            error = str(e)
+                self.record(name, digest, parsed, fields, pages, error)
+                if len(self.pending) >= self.options["batch_size"]:
+                    async with flush_lock:
+                        await asyncio.to_thread(self.flush)
+            finally:
+                in_flight.release()
+
+        for name, read in files:
+            data, digest = await asyncio.to_thread(load_file, read)
+            if digest in self.done_hashes:
+                self.counts["skipped"] += 1
+                self.progress()
+                continue
+            self.done_hashes.add(digest)
+            await in_flight.acquire()
+            task = asyncio.create_task(handle_file(name, data, digest))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        async with flush_lock:
+            await asyncio.to_thread(self.flush)
+
+    def record(self, name, digest, parsed, fields, pages, error):
+        self.pending.append((name, digest, parsed, fields, error))
+        self.counts["pages"] += pages
+        self.counts["failed" if error else "ingested"] += 1
+        if error:
+            self.stderr.write(f"{name}: {error}")
+        self.progress()
+
+    def progress(self):
+        self.seen += 1
+        if self.seen % self.options["progress_every"] == 0 or self.seen == self.total:
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(f"[{self.seen}/{self.total}] {self.seen / elapsed:.1f} files/s")
+
+    def flush(self):
+        """Write the buffered results with one bulk insert per table.
+
+        If the batch insert fails, rows are inserted one at a time and the
+        files whose rows are rejected are recorded as failed.
+        """
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        close_old_connections()
+        rows = []
+        for name, digest, parsed, fields, error in batch:
+            profile = CandidateProfile(**fields, resume_file="") if fields is not None else None
+            job = ResumeJob(
+                file_hash=digest,
+                file_name=name,
+                file_type=name.rsplit(".", 1)[-1].lower(),
+                status=ResumeJob.FAILED if error else ResumeJob.DONE,
+                result=parsed,
+                error=error or "",
+                attempts=1,
+            )
+            rows.append((profile, job))
+
+        try:
+            profiles = self.insert(rows)
+        except DatabaseError:
+            profiles = []
+            for profile, job in rows:
+                # Drop ids handed out by the rolled-back insert.
+                if profile is not None:
+                    profile.pk = None
+                job.pk = None
+                try:
+                    profiles += self.insert([(profile, job)])
+                except DatabaseError as e:
+                    error = f"{type(e).__name__}: {e}"
+                    self.stderr.write(f"{job.file_name}: {error}")
+                    if job.status == ResumeJob.DONE:
+                        self.counts["ingested"] -= 1
+                        self.counts["failed"] += 1
+                    job.pk = None
+                    job.status, job.error = ResumeJob.FAILED, error
+                    try:
+                        self.insert([(None, job)])
+                    except DatabaseError:
+                        # Typically another run stored this file meanwhile.
+                        pass
+
+        candidates_bulk_created(profiles)
+        close_old_connections()
+
+    def insert(self, rows):
+        """Insert ``(profile or None, ResumeJob)`` pairs in one transaction; returns the profiles."""
+        profiles = [profile for profile, _ in rows if profile is not None]
+        jobs = [job for _, job in rows]
+        with transaction.atomic():
+            # A failed file from an earlier run is replaced by this attempt.
+            ResumeJob.objects.filter(
+                file_hash__in=[job.file_hash for job in jobs], status=ResumeJob.FAILED
+            ).delete()
+            CandidateProfile.objects.bulk_create(profiles, batch_size=self.options["batch_size"])
+            ResumeJob.objects.bulk_create(jobs, batch_size=self.options["batch_size"])
+        return profiles
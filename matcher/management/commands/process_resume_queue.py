@@ -0,0 +1,29 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from matcher.resume_queue import pending_job_ids, process_job, queue_settings, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Drain the resume parsing queue in a dedicated worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Concurrent parses (default: RESUME_QUEUE['WORKERS']).")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or queue_settings()["WORKERS"]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-worker") as executor:
+            while True:
+                requeue_stale_jobs()
+                job_ids = pending_job_ids()
+                if job_ids:
+                    self.stdout.write(f"Processing {len(job_ids)} queued resumes")
+                    wait([executor.submit(process_job, job_id) for job_id in job_ids])
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["poll"])
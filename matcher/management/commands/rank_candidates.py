@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from matcher.models import JobPosting
+from matcher.ranking import rank_candidates_for_job
+
+
+class Command(BaseCommand):
+    help = "Rank every stored candidate for a job posting."
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument("--page", type=int, default=1)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--rescore-top", type=int, default=0, help="Re-score the best N candidates with the LLM.")
+
+    def handle(self, *args, **options):
+        job = JobPosting.objects.filter(pk=options["job_id"]).first()
+        if job is None:
+            raise CommandError(f"Job {options['job_id']} does not exist.")
+
+        total, results = rank_candidates_for_job(
+            job, page=options["page"], page_size=options["page_size"], rescore_top=options["rescore_top"]
+        )
+
+        self.stdout.write(f"{job.title} at {job.company}: {total} candidates ranked")
+        offset = (options["page"] - 1) * options["page_size"]
+        for position, result in enumerate(results, start=offset + 1):
+            marker = "*" if result["rescored"] else " "
+            missing = ", ".join(result["missing_skills"]) or "-"
+            self.stdout.write(
+                f"{position:>5}. {result['match_score']:>3}%{marker} {result['candidate_name']} (#{result['candidate_id']})  missing: {missing}"
+            )
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from matcher.llm import TokenBucket
+from matcher.rescoring import rescore_results, rescoring_settings, stale_results
+
+
+class Command(BaseCommand):
+    help = "Re-score stored match results whose candidate or job changed since they were scored."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=float, default=None, help="Pairs per second (default: RESCORING['MAX_RATE']; 0 for no limit).")
+        parser.add_argument("--candidate", type=int, action="append", help="Only this candidate's results (repeatable).")
+        parser.add_argument("--job", type=int, action="append", help="Only this job's results (repeatable).")
+        parser.add_argument("--watch", action="store_true", help="Keep running and re-score new stale results as they appear.")
+        parser.add_argument("--poll", type=float, default=10.0, help="Seconds between checks with --watch.")
+
+    def handle(self, *args, **options):
+        rate = rescoring_settings()["MAX_RATE"] if options["rate"] is None else options["rate"]
+        limiter = TokenBucket(rate, max(rate, 1)) if rate else None
+        while True:
+            results = stale_results(options["candidate"], options["job"])
+            if results.exists():
+                scored = rescore_results(results, limiter)
+                self.stdout.write(f"Re-scored {scored} candidate/job pairs")
+            elif not options["watch"]:
+                self.stdout.write("No stale match results")
+            if not options["watch"]:
+                break
+            time.sleep(options["poll"])
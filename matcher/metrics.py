@@ -0,0 +1,349 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Request and stage metrics.
+#
+# Stage timings, LLM token counts, result cache outcomes and database
+# queries are recorded in one in-process registry, which /metrics renders in
+# the Prometheus text format (each worker process keeps its own counters).
+#
+# While a request is handled the same numbers are also gathered per request,
+# in a context variable so they follow async views and sync_to_async
+# threads, and written as one JSON line on the "matcher.metrics" logger when
+# the response is ready. Thread pools do not copy the context, so work
+# handed to one is wrapped with `in_context` to be counted with its request.
+#
+# Stages nest, so a stage's time includes the stages it calls.
+
+DEFAULTS = {
+    "ENABLED": True,
+    # Log one JSON line per request at INFO level.
+    "LOG_REQUESTS": True,
+    # Histogram buckets, in seconds.
+    "BUCKETS": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+}
+
+METRICS = {
+    "matcher_http_requests_total": ("counter", "HTTP requests by view, method and status."),
+    "matcher_http_request_seconds": ("histogram", "Time to build the response, by view."),
+    "matcher_stage_seconds": ("histogram", "Time spent in each instrumented stage."),
+    "matcher_db_queries_total": ("counter", "Database queries, by view."),
+    "matcher_db_query_seconds_total": ("counter", "Time spent executing database queries, by view."),
+    "matcher_llm_requests_total": ("counter", "Completed LLM API calls, by model."),
+    "matcher_llm_tokens_total": ("counter", "LLM tokens reported by the API, by model and kind."),
+    "matcher_llm_cache_total": ("counter", "LLM result cache lookups, by namespace and result."),
+}
+
+
+def metrics_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "METRICS", {}))
+    return options
+
+
+class Registry:
+    """Thread-safe counters and histograms, rendered in the Prometheus text format."""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counters = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(series) for key, series in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (series_name, labels), value in sorted(counters.items()):
+                    if series_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for (series_name, labels), series in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {series[-2]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {series[-2]}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = [
+        f'{key}="' + value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for key, value in labels
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = Registry(metrics_settings()["BUCKETS"])
+    return _registry
+
+
+class RequestMetrics:
+    """Numbers gathered while one request is handled."""
+
+    def __init__(self):
+        self.view = None
+        self.stages = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.llm_tokens = {"prompt": 0, "completion": 0}
+        self.cache = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            count, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (count + 1, total + seconds)
+
+    def as_dict(self):
+        return {
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "stages": {stage: {"calls": count, "ms": round(total * 1000, 2)} for stage, (count, total) in self.stages.items()},
+            "llm_tokens": self.llm_tokens,
+            "cache": self.cache,
+        }
+
+
+_current = contextvars.ContextVar("matcher_request_metrics", default=None)
+
+
+def current_request_metrics():
+    return _current.get()
+
+
+def in_context(func):
+    """``func`` wrapped to run in a copy of the caller's context, for executor threads.
+
+    Each call gets its own copy, so the wrapper can run in several threads at
+    once; the request metrics object itself is shared.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _view_label():
+    current = _current.get()
+    return (current.view or "") if current is not None else ""
+
+
+def record_stage(stage, seconds):
+    get_registry().observe("matcher_stage_seconds", seconds, stage=stage)
+    current = _current.get()
+    if current is not None:
+        current.add_stage(stage, seconds)
+
+
+def record_llm_usage(model, usage):
+    """Count one LLM call and the prompt/completion tokens in its ``response.usage``."""
+    registry = get_registry()
+    registry.inc("matcher_llm_requests_total", model=model)
+    if usage is None:
+        return
+    current = _current.get()
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None) or 0
+        registry.inc("matcher_llm_tokens_total", tokens, model=model, kind=kind)
+        if current is not None:
+            with current._lock:
+                current.llm_tokens[kind] += tokens
+
+
+def record_cache(namespace, outcome):
+    """Count a result cache lookup; ``outcome`` is "hits" or "misses"."""
+    get_registry().inc("matcher_llm_cache_total", namespace=namespace, result="hit" if outcome == "hits" else "miss")
+    current = _current.get()
+    if current is not None:
+        with current._lock:
+            current.cache[outcome] += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper (see ``connection.execute_wrappers``) that counts and times queries."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        view = _view_label()
+        registry = get_registry()
+        registry.inc("matcher_db_queries_total", view=view)
+        registry.inc("matcher_db_query_seconds_total", seconds, view=view)
+        current = _current.get()
+        if current is not None:
+            with current._lock:
+                current.db_queries += 1
+                current.db_seconds += seconds
+
+
+class timed:
+    """Record the time spent in a block or in every call of a function as ``stage``.
+
+    Use as ``with timed("stage"):`` or as a decorator, ``@timed()`` naming the
+    stage after the function. Generators, coroutines and async generators
+    are timed until they finish.
+    """
+
+    def __init__(self, stage=None):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.stage, time.perf_counter() - self.started)
+
+    def __call__(self, func):
+        stage = self.stage or func.__name__
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with timed(stage):
+                    async for item in func(*args, **kwargs):
+                        yield item
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await func(*args, **kwargs)
+        elif inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with timed(stage):
+                    return (yield from func(*args, **kwargs))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with timed(stage):
+                    return func(*args, **kwargs)
+        return wrapper
+
+
+class MetricsMiddleware:
+    """Time each request, count it per view and log its metrics as one JSON line.
+
+    Streaming responses are timed until the response object is returned, not
+    until the last chunk is sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = metrics_settings()
+        self.enabled = options["ENABLED"]
+        self.log_requests = options["LOG_REQUESTS"]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        current, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, current, started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        current, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, current, started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current = _current.get()
+        if current is not None and request.resolver_match:
+            current.view = request.resolver_match.view_name
+
+    def _start(self):
+        current = RequestMetrics()
+        return current, _current.set(current), time.perf_counter()
+
+    def _finish(self, request, response, current, started):
+        seconds = time.perf_counter() - started
+        view = current.view or "unmatched"
+        registry = get_registry()
+        registry.inc("matcher_http_requests_total", view=view, method=request.method, status=response.status_code)
+        registry.observe("matcher_http_request_seconds", seconds, view=view)
+        if self.log_requests:
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "ms": round(seconds * 1000, 2),
+                **current.as_dict(),
+            }))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2025-03-25 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('skills', models.JSONField()),
+                ('education', models.JSONField()),
+                ('work_experience', models.JSONField()),
+                ('resume_file', models.FileField(upload_to='resumes/')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('company', models.CharField(max_length=255)),
+                ('required_skills', models.JSONField()),
+                ('description', models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2025-03-26 03:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_score', models.IntegerField()),
+                ('missing_skills', models.JSONField()),
+                ('summary', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.candidateprofile')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.jobposting')),
+            ],
+        ),
+    ]
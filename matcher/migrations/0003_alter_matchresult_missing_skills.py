@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2025-03-26 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0002_matchresult'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchresult',
+            name='missing_skills',
+            field=models.JSONField(default=list),
+        ),
+    ]
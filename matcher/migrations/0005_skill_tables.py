@@ -0,0 +1,158 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:21
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Skill normalization as of this migration (matcher/scoring.py), inlined so
+# later changes to the app code cannot change what this migration does.
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "cpp": "c++",
+    "csharp": "c#",
+    "c sharp": "c#",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "mssql": "sql server",
+    "ms sql server": "sql server",
+    "k8s": "kubernetes",
+    "gcp": "google cloud",
+    "google cloud platform": "google cloud",
+    "aws": "amazon web services",
+    "azure cloud": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "llm": "large language models",
+    "llms": "large language models",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "drf": "django rest framework",
+    "rest": "rest api",
+    "rest apis": "rest api",
+    "restful api": "rest api",
+    "restful apis": "rest api",
+    "ci cd": "ci/cd",
+    "cicd": "ci/cd",
+    "oop": "object-oriented programming",
+    "object oriented programming": "object-oriented programming",
+}
+
+SEPARATORS = re.compile(r"[\s_]+")
+TRIM = re.compile(r"^[^\w#+.]+|[^\w#+]+$")
+MAX_NAME_LENGTH = 255
+BATCH_SIZE = 1000
+
+
+def skill_keys(skills):
+    if isinstance(skills, str):
+        skills = [skills]
+    keys = {}
+    for skill in skills or []:
+        key = TRIM.sub("", SEPARATORS.sub(" ", str(skill).lower()))
+        key = SKILL_ALIASES.get(key, key)
+        if key and len(key) <= MAX_NAME_LENGTH:
+            keys[key] = None
+    return list(keys)
+
+
+def link_batch(Skill, link_model, owner_field, batch):
+    names = {key for keys in batch.values() for key in keys}
+    Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+    ids = dict(Skill.objects.filter(name__in=names).values_list("name", "id"))
+    link_model.objects.bulk_create(
+        [link_model(**{f"{owner_field}_id": owner_id, "skill_id": ids[key]}) for owner_id, keys in batch.items() for key in keys],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def backfill_links(Skill, owner_model, column, link_model, owner_field):
+    batch = {}
+    for owner_id, skills in owner_model.objects.values_list("id", column).order_by("id").iterator(chunk_size=BATCH_SIZE):
+        batch[owner_id] = skill_keys(skills)
+        if len(batch) >= BATCH_SIZE:
+            link_batch(Skill, link_model, owner_field, batch)
+            batch = {}
+    link_batch(Skill, link_model, owner_field, batch)
+
+
+def backfill_skills(apps, schema_editor):
+    Skill = apps.get_model("matcher", "Skill")
+    backfill_links(Skill, apps.get_model("matcher", "JobPosting"), "required_skills", apps.get_model("matcher", "JobSkill"), "job")
+    backfill_links(Skill, apps.get_model("matcher", "CandidateProfile"), "skills", apps.get_model("matcher", "CandidateSkill"), "candidate")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0004_resumejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.jobposting')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CandidateSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.candidateprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='matcher.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='candidateprofile',
+            name='skill_set',
+            field=models.ManyToManyField(related_name='candidates', through='matcher.CandidateSkill', to='matcher.skill'),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='skill_set',
+            field=models.ManyToManyField(related_name='jobs', through='matcher.JobSkill', to='matcher.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='jobskill',
+            index=models.Index(fields=['skill', 'job'], name='job_skill_lookup'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobskill',
+            constraint=models.UniqueConstraint(fields=('job', 'skill'), name='unique_job_skill'),
+        ),
+        migrations.AddIndex(
+            model_name='candidateskill',
+            index=models.Index(fields=['skill', 'candidate'], name='candidate_skill_lookup'),
+        ),
+        migrations.AddConstraint(
+            model_name='candidateskill',
+            constraint=models.UniqueConstraint(fields=('candidate', 'skill'), name='unique_candidate_skill'),
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
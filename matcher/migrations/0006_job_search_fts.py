@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# matcher/search.py's FTS5 table and triggers as of this migration, inlined
+# so later changes to the app code cannot change what this migration does.
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS matcher_jobposting_fts USING fts5(
+        title, company, description,
+        content='matcher_jobposting', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS matcher_jobposting_fts_insert AFTER INSERT ON matcher_jobposting BEGIN
+        INSERT INTO matcher_jobposting_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS matcher_jobposting_fts_delete AFTER DELETE ON matcher_jobposting BEGIN
+        INSERT INTO matcher_jobposting_fts(matcher_jobposting_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS matcher_jobposting_fts_update AFTER UPDATE OF title, company, description ON matcher_jobposting BEGIN
+        INSERT INTO matcher_jobposting_fts(matcher_jobposting_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+        INSERT INTO matcher_jobposting_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END""",
+]
+FTS_TRIGGERS = ["matcher_jobposting_fts_insert", "matcher_jobposting_fts_delete", "matcher_jobposting_fts_update"]
+
+
+def install_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+        except Exception:
+            # SQLite built without FTS5: job search uses the in-memory index.
+            return
+        cursor.execute("INSERT INTO matcher_jobposting_fts(matcher_jobposting_fts) VALUES ('rebuild')")
+
+
+def uninstall_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS matcher_jobposting_fts")
+
+
+class Migration(migrations.Migration):
+    """FTS5 index over job postings (SQLite only; other databases search in memory)."""
+
+    dependencies = [
+        ('matcher', '0005_skill_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0006_job_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchresult',
+            index=models.Index(fields=['created_at', 'id'], name='match_result_recent'),
+        ),
+    ]
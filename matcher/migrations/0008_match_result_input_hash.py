@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:39
+
+import hashlib
+import json
+
+from django.db import migrations, models
+from django.db.models import Max
+
+# matcher/scoring.py's match_input_hash as of this migration, inlined so
+# later changes to the app code cannot change what this migration does.
+# Stored results are fingerprinted as scored in the default mode; results of
+# other modes are scored again on their next request.
+MATCH_INPUT_FIELDS = {
+    "candidate": ("name", "skills", "education", "work_experience"),
+    "job": ("title", "company", "required_skills", "skill_weights", "description"),
+}
+DEFAULT_MODE = "hybrid"
+
+
+def match_input_hash(candidate, job, mode):
+    payload = {
+        "candidate": {field: candidate.get(field) or None for field in MATCH_INPUT_FIELDS["candidate"]},
+        "job": {field: job.get(field) or None for field in MATCH_INPUT_FIELDS["job"]},
+        "mode": mode,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def deduplicate_match_results(apps, schema_editor):
+    """Keep the newest result per candidate/job pair and fingerprint it from the stored rows."""
+    MatchResult = apps.get_model("matcher", "MatchResult")
+    latest = MatchResult.objects.values("candidate_id", "job_id").annotate(latest=Max("id")).values("latest")
+    MatchResult.objects.exclude(id__in=latest).delete()
+
+    candidate_fields = [f"candidate__{field}" for field in MATCH_INPUT_FIELDS["candidate"]]
+    job_fields = [f"job__{field}" for field in MATCH_INPUT_FIELDS["job"] if field != "skill_weights"]
+    rows = MatchResult.objects.values("id", *candidate_fields, *job_fields).order_by("id")
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        candidate = {field.split("__", 1)[1]: row[field] for field in candidate_fields}
+        job = {field.split("__", 1)[1]: row[field] for field in job_fields}
+        batch.append(MatchResult(id=row["id"], input_hash=match_input_hash(candidate, job, DEFAULT_MODE)))
+        if len(batch) >= 1000:
+            MatchResult.objects.bulk_update(batch, ["input_hash"])
+            batch = []
+    MatchResult.objects.bulk_update(batch, ["input_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0007_match_result_recent_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchresult',
+            name='input_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.RunPython(deduplicate_match_results, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='matchresult',
+            constraint=models.UniqueConstraint(fields=('candidate', 'job', 'input_hash'), name='unique_match_input'),
+        ),
+    ]
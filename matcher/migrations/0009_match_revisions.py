@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0008_match_result_input_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidateprofile',
+            name='revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='matchresult',
+            name='candidate_revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='matchresult',
+            name='job_revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0009_match_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('endpoint', models.CharField(blank=True, max_length=100)),
+                ('operation', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=100)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.FloatField(default=0)),
+                ('estimated', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='usage_recent')],
+            },
+        ),
+    ]
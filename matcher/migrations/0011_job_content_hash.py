@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 06:55
+
+import hashlib
+import json
+import re
+
+from django.db import migrations, models
+
+# matcher/imports.py's job_content_hash as of this migration, inlined so
+# later changes to the app code cannot change what this migration does.
+WHITESPACE = re.compile(r"\s+")
+
+
+def job_content_hash(job):
+    payload = [WHITESPACE.sub(" ", str(job.get(field) or "")).strip().casefold() for field in ("title", "company", "description")]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def hash_job_postings(apps, schema_editor):
+    JobPosting = apps.get_model("matcher", "JobPosting")
+    rows = JobPosting.objects.values("id", "title", "company", "description").order_by("id")
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(JobPosting(id=row["id"], content_hash=job_content_hash(row)))
+        if len(batch) >= 1000:
+            JobPosting.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    JobPosting.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0010_usage_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='content_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(hash_job_postings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['content_hash'], name='job_content_hash'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+# matcher/database.py's GIN indexes as of this migration, inlined so later
+# changes to the app code cannot change what this migration does.
+GIN_INDEXES = {
+    "job_required_skills_gin": ("matcher_jobposting", "required_skills"),
+    "candidate_skills_gin": ("matcher_candidateprofile", "skills"),
+}
+
+
+def install_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name, (table, column) in GIN_INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} jsonb_path_ops)")
+
+
+def uninstall_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in GIN_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    """Index match results per pair by time, plus GIN indexes on the skill lists (PostgreSQL only)."""
+
+    dependencies = [
+        ('matcher', '0011_job_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchresult',
+            index=models.Index(fields=['candidate', 'job', 'created_at'], name='match_pair_recent'),
+        ),
+        migrations.RunPython(install_gin_indexes, uninstall_gin_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def clear_repeated_hashes(apps, schema_editor):
+    # Postings stored before the constraint may repeat each other: the oldest
+    # keeps its hash and the others are left without one, which saving them
+    # does not restore while the oldest is stored (see hash_job_posting).
+    JobPosting = apps.get_model("matcher", "JobPosting")
+    repeated = list(
+        JobPosting.objects.exclude(content_hash="")
+        .values("content_hash")
+        .annotate(first=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for row in repeated:
+        JobPosting.objects.filter(content_hash=row["content_hash"]).exclude(id=row["first"]).update(content_hash="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0013_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_repeated_hashes, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='jobposting',
+            name='job_content_hash',
+        ),
+        migrations.AddConstraint(
+            model_name='jobposting',
+            constraint=models.UniqueConstraint(condition=models.Q(('content_hash', ''), _negated=True), fields=('content_hash',), name='unique_job_content_hash'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:35
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+# matcher/scoring.py's match_input_hash as of this migration, inlined so
+# later changes to the app code cannot change what this migration does.
+MATCH_INPUT_FIELDS = {
+    "candidate": ("name", "skills", "education", "work_experience"),
+    "job": ("title", "company", "required_skills", "skill_weights", "description"),
+}
+MATCH_MODES = ("local", "llm", "hybrid")
+
+
+def match_input_hash(candidate, job, mode):
+    payload = {
+        "candidate": {field: candidate.get(field) or None for field in MATCH_INPUT_FIELDS["candidate"]},
+        "job": {field: job.get(field) or None for field in MATCH_INPUT_FIELDS["job"]},
+        "mode": mode,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def record_match_modes(apps, schema_editor):
+    # The mode is part of a result's input hash: a stored result gets the mode
+    # whose hash of the stored candidate and job it carries. Results scored
+    # from request data that differs from the stored rows keep no mode.
+    MatchResult = apps.get_model("matcher", "MatchResult")
+    candidate_fields = [f"candidate__{field}" for field in MATCH_INPUT_FIELDS["candidate"]]
+    job_fields = [f"job__{field}" for field in MATCH_INPUT_FIELDS["job"] if field != "skill_weights"]
+    rows = MatchResult.objects.values("id", "input_hash", *candidate_fields, *job_fields).order_by("id")
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        candidate = {field.split("__", 1)[1]: row[field] for field in candidate_fields}
+        job = {field.split("__", 1)[1]: row[field] for field in job_fields}
+        for mode in MATCH_MODES:
+            if match_input_hash(candidate, job, mode) == row["input_hash"]:
+                batch.append(MatchResult(id=row["id"], mode=mode))
+                break
+        if len(batch) >= 1000:
+            MatchResult.objects.bulk_update(batch, ["mode"])
+            batch = []
+    MatchResult.objects.bulk_update(batch, ["mode"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matcher', '0014_unique_job_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchresult',
+            name='mode',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.RunPython(record_match_modes, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,52 @@
 from django.db import models
+from django.db.models import Count
+from django.utils import timezone
+
+from .scoring import normalize_skills
+
+
+class Skill(models.Model):
+    """A normalized skill name (see ``scoring.normalize_skill``)."""
+
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SkillQuerySet(models.QuerySet):
+    """Skill containment filters answered from the indexed link tables."""
+
+    # Name of the foreign key back to this model on the ``skill_set`` through table.
+    link_field = None
+
+    def _links(self, skills):
+        keys = list(normalize_skills(skills))
+        link_model = self.model._meta.get_field("skill_set").remote_field.through
+        return keys, link_model.objects.filter(skill__name__in=keys)
+
+    def with_any_skills(self, skills):
+        keys, links = self._links(skills)
+        if not keys:
+            return self.none()
+        return self.filter(id__in=links.values(f"{self.link_field}_id"))
+
+    def with_all_skills(self, skills):
+        keys, links = self._links(skills)
+        if not keys:
+            return self
+        owner = f"{self.link_field}_id"
+        matching = links.values(owner).annotate(matched=Count("skill_id")).filter(matched=len(keys)).values(owner)
+        return self.filter(id__in=matching)
+
+
+class CandidateProfileQuerySet(SkillQuerySet):
+    link_field = "candidate"
+
+
+class JobPostingQuerySet(SkillQuerySet):
+    link_field = "job"
+
 
 class CandidateProfile(models.Model):
     name = models.CharField(max_length=255)
@@ -6,6 +54,11 @@ class CandidateProfile(models.Model):
     education = models.JSONField()
     work_experience = models.JSONField()
     resume_file = models.FileField(upload_to="resumes/")
+    skill_set = models.ManyToManyField(Skill, through="CandidateSkill", related_name="candidates")
+    # Goes up whenever a field the matcher reads changes (see matcher/rescoring.py).
+    revision = models.PositiveIntegerField(default=1)
+
+    objects = CandidateProfileQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -15,9 +68,46 @@ class JobPosting(models.Model):
     company = models.CharField(max_length=255)
     required_skills = models.JSONField()
     description = models.TextField()
+    skill_set = models.ManyToManyField(Skill, through="JobSkill", related_name="jobs")
+    # Goes up whenever a field the matcher reads changes (see matcher/rescoring.py).
+    revision = models.PositiveIntegerField(default=1)
+    # imports.job_content_hash of the title, company and description, unique
+    # among postings that have one; bulk imports skip postings whose hash is
+    # already stored. Rows inserted with bulk_create outside the importer
+    # have none.
+    content_hash = models.CharField(max_length=64, default="", editable=False)
+
+    objects = JobPostingQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_hash"], condition=~models.Q(content_hash=""), name="unique_job_content_hash"),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class CandidateSkill(models.Model):
+    """One row per (candidate, normalized skill), mirrored from ``CandidateProfile.skills``."""
+
+    candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["candidate", "skill"], name="unique_candidate_skill")]
+        indexes = [models.Index(fields=["skill", "candidate"], name="candidate_skill_lookup")]
+
+
+class JobSkill(models.Model):
+    """One row per (job, normalized skill), mirrored from ``JobPosting.required_skills``."""
+
+    job = models.ForeignKey(JobPosting, on_delete=models.CASCADE)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["job", "skill"], name="unique_job_skill")]
+        indexes = [models.Index(fields=["skill", "job"], name="job_skill_lookup")]
     
 class MatchResult(models.Model):
     candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE)
@@ -25,8 +115,87 @@ class MatchResult(models.Model):
     match_score = models.IntegerField()
     missing_skills = models.JSONField(default=list)
     summary = models.TextField()
+    # scoring.match_input_hash of the candidate/job data and mode that were scored.
+    input_hash = models.CharField(max_length=64, default="")
+    # Scoring mode ("local", "llm" or "hybrid") the result was computed in;
+    # empty for results whose mode was not recorded.
+    mode = models.CharField(max_length=16, blank=True, default="")
+    # Revisions of the candidate and job this result was scored at; behind
+    # either one means the result is stale.
+    candidate_revision = models.PositiveIntegerField(default=1)
+    job_revision = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["candidate", "job", "input_hash"], name="unique_match_input")]
+        # Newest-first listing pages on (created_at, id).
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="match_result_recent"),
+            models.Index(fields=["candidate", "job", "created_at"], name="match_pair_recent"),
+        ]
+
     def __str__(self):
         return f"{self.candidate.name} - {self.job.title} ({self.match_score}%)"
 
+
+
+class ResumeJob(models.Model):
+    """A queued resume parse, keyed by the SHA-256 of the uploaded file."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    file_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=10)
+    resume_file = models.FileField(upload_to="resume_jobs/")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+
+class UsageRecord(models.Model):
+    """One LLM completion: what asked for it, the model, tokens and latency (see matcher/usage.py)."""
+
+    # When the completion finished; rows are written in batches afterwards.
+    created_at = models.DateTimeField(default=timezone.now)
+    # View name of the request that made the call; empty outside requests.
+    endpoint = models.CharField(max_length=100, blank=True)
+    operation = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.FloatField(default=0)
+    # Streamed completions report no usage, so their tokens are estimated.
+    estimated = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at"], name="usage_recent")]
+
+    def __str__(self):
+        return f"{self.operation} ({self.prompt_tokens}+{self.completion_tokens} tokens)"
+
+
+class DataVersion(models.Model):
+    """Change counter for one matcher table, shared by every process (see matcher/versions.py)."""
+
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField()
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,171 @@
+import json
+import logging
+import math
+import re
+
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:  # optional: a regex estimate is used instead
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Compact prompt building.
+#
+# Candidates and jobs are sent to the model as compact JSON holding only the
+# fields that matter for matching, with long free text trimmed to a token
+# budget. Every prompt logs its estimated size next to what the raw Python
+# dict repr would have cost.
+
+DEFAULTS = {
+    "DESCRIPTION_TOKENS": 250,
+    "EXPERIENCE_TOKENS": 300,
+    "MAX_LIST_ITEMS": 30,
+}
+
+# Roughly how GPT tokenizers split text: words, short digit runs, punctuation.
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]+")
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+_encoding = None
+
+
+def prompt_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "PROMPTS", {}))
+    return options
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            logger.warning("tiktoken encoding unavailable, estimating tokens", exc_info=True)
+            _encoding = False
+    return _encoding or None
+
+
+def estimate_tokens(text):
+    """Token count from tiktoken when installed, else a local estimate.
+
+    The estimate counts words, 3-digit runs and punctuation runs, with one
+    extra token per 8 letters of long words.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(1 + (len(piece) - 1) // 8 for piece in _PIECES.findall(text))
+
+
+def trim_text(text, max_tokens):
+    """Collapse whitespace and cut ``text`` to about ``max_tokens``, preferring a sentence end."""
+    text = _clean_text(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Cut by characters in proportion to the token overshoot, then back off
+    # to the last full sentence if one ends in the second half.
+    cut = text[:math.floor(len(text) * max_tokens / estimate_tokens(text))]
+    sentences = [match.start() for match in _SENTENCE_END.finditer(cut)]
+    if sentences and sentences[-1] > len(cut) // 2:
+        return cut[:sentences[-1]] + " …"
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def _clean_text(value):
+    return _WHITESPACE.sub(" ", str(value or "")).strip()
+
+
+def _clean_list(values, limit):
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        values = [values]
+    items, seen = [], set()
+    for value in values:
+        if isinstance(value, dict):
+            value = ", ".join(f"{key}: {item}" for key, item in value.items() if item)
+        value = _clean_text(value)
+        if value and value.lower() not in seen:
+            seen.add(value.lower())
+            items.append(value)
+    return items[:limit]
+
+
+def compact_candidate(candidate, options=None):
+    """The fields of a candidate the model needs, cleaned and trimmed."""
+    options = options or prompt_settings()
+    limit = options["MAX_LIST_ITEMS"]
+    compact = {
+        "name": _clean_text(candidate.get("name")),
+        "skills": _clean_list(candidate.get("skills"), limit),
+        "education": _clean_list(candidate.get("education"), limit),
+        "work_experience": _clean_list(candidate.get("work_experience"), limit),
+    }
+    experience = compact["work_experience"]
+    if experience:
+        # Share the experience budget evenly between entries.
+        per_item = max(options["EXPERIENCE_TOKENS"] // len(experience), 20)
+        compact["work_experience"] = [trim_text(item, per_item) for item in experience]
+    return {key: value for key, value in compact.items() if value}
+
+
+def compact_job(job, options=None):
+    """The fields of a job posting the model needs, cleaned and trimmed."""
+    options = options or prompt_settings()
+    compact = {
+        "title": _clean_text(job.get("title")),
+        "company": _clean_text(job.get("company")),
+        "required_skills": _clean_list(job.get("required_skills"), options["MAX_LIST_ITEMS"]),
+        "description": trim_text(job.get("description") or "", options["DESCRIPTION_TOKENS"]),
+    }
+    return {key: value for key, value in compact.items() if value}
+
+
+def to_json(value):
+    """Compact canonical JSON: no spaces, non-ASCII kept as is."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def log_savings(name, naive, prompt):
+    naive_tokens, prompt_tokens = estimate_tokens(naive), estimate_tokens(prompt)
+    logger.info(
+        "prompt %s: ~%d tokens (raw ~%d, saved ~%d)",
+        name, prompt_tokens, naive_tokens, naive_tokens - prompt_tokens,
+    )
+
+
+def match_prompt(candidate, job):
+    prompt = f"Match this candidate {to_json(compact_candidate(candidate))} with job {to_json(compact_job(job))}."
+    log_savings("match", f"Match this candidate {candidate} with job {job}.", prompt)
+    return prompt
+
+
+def batch_match_prompt(candidate, jobs):
+    numbered = "\n".join(f"[{index}] {to_json(compact_job(job))}" for index, job in enumerate(jobs))
+    prompt = f"Candidate: {to_json(compact_candidate(candidate))}\n\nJobs:\n{numbered}"
+    naive = "\n".join(f"Match this candidate {candidate} with job {job}." for job in jobs)
+    log_savings("batch_match", naive, prompt)
+    return prompt
+
+
+def summary_prompt(candidate, job, result):
+    intro = (
+        f"Summarize how well this candidate fits the job. Score: {result['match_score']}%. "
+        f"Missing skills: {to_json(result['missing_skills'])}."
+    )
+    prompt = f"{intro}\n\nCandidate: {to_json(compact_candidate(candidate))}\n\nJob: {to_json(compact_job(job))}"
+    log_savings("summary", f"{intro}\n\nCandidate: {candidate}\n\nJob: {job}", prompt)
+    return prompt
+
+
+def cover_letter_prompt(candidate, job):
+    intro = "Generate a professional cover letter for the following candidate based on the given job description."
+    prompt = f"{intro}\n\nCandidate: {to_json(compact_candidate(candidate))}\n\nJob: {to_json(compact_job(job))}"
+    log_savings("cover_letter", f"{intro} \n\nCandidate: {candidate}\n\nJob: {job}", prompt)
+    return prompt
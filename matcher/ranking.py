@@ -0,0 +1,287 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .metrics import in_context
+from .models import CandidateProfile, JobPosting
+from .scoring import local_match, normalize_skill, normalize_skills
+from .usage import BudgetExceeded
+from .utils import llm_match_candidate_to_job
+from .versions import get_version
+
+logger = logging.getLogger(__name__)
+
+# Vectorized skill ranking.
+#
+# A SkillIndex keeps the normalized skill lists of every row as a sparse
+# incidence matrix in CSR form (indptr/indices arrays). Scoring a query
+# against all rows is then a single gather plus bincount over the non-zeros,
+# which stays in the low milliseconds for 100k+ rows.
+
+# Concurrent LLM calls when re-scoring the head of a ranking.
+RESCORE_WORKERS = 8
+
+
+class SkillIndex:
+    def __init__(self, ids, skill_lists):
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        for skills in skill_lists:
+            columns = {vocabulary.setdefault(skill, len(vocabulary)) for skill in normalize_skills(skills)}
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+
+        self.vocabulary = vocabulary
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.row_sizes = np.diff(self.indptr)
+        self.rows = np.repeat(np.arange(len(self.ids), dtype=np.int32), self.row_sizes)
+
+        # Column-major copy (CSC) so "rows containing skill X" is a slice.
+        order = np.argsort(self.indices, kind="stable")
+        self.column_rows = self.rows[order]
+        self.column_ptr = np.searchsorted(self.indices[order], np.arange(len(vocabulary) + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def query_vector(self, skills, weights=None):
+        """Dense weight vector over the vocabulary; unknown skills are ignored."""
+        weights = {normalize_skill(skill): float(weight) for skill, weight in (weights or {}).items()}
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for skill in normalize_skills(skills):
+            column = self.vocabulary.get(skill)
+            if column is not None:
+                vector[column] = weights.get(skill, 1.0)
+        return vector
+
+    def overlap(self, vector):
+        """Weighted count of query skills present in every row."""
+        columns = np.flatnonzero(vector)
+        starts, ends = self.column_ptr[columns], self.column_ptr[columns + 1]
+        if (ends - starts).sum() * 4 < len(self.indices):
+            # Few, selective skills: only walk their posting lists.
+            rows = np.concatenate([self.column_rows[start:end] for start, end in zip(starts, ends)] or [self.rows[:0]])
+            weights = np.repeat(vector[columns], ends - starts)
+            return np.bincount(rows, weights=weights, minlength=len(self.ids))
+        return np.bincount(self.rows, weights=vector[self.indices], minlength=len(self.ids))
+
+    def rows_containing(self, skills):
+        """Boolean mask of rows that contain every one of ``skills``."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for skill in normalize_skills(skills):
+            column = self.vocabulary.get(skill)
+            if column is None:
+                return np.zeros(len(self.ids), dtype=bool)
+            rows = np.zeros(len(self.ids), dtype=bool)
+            rows[self.column_rows[self.column_ptr[column]:self.column_ptr[column + 1]]] = True
+            mask &= rows
+        return mask
+
+
+def top_k(scores, k, mask=None):
+    """Indices of the ``k`` best scores (highest first), ignoring masked-out rows."""
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(mask.sum()))
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class JobIndex(SkillIndex):
+    """SkillIndex over every JobPosting, plus the company of each posting."""
+
+    def __init__(self, ids, skill_lists, companies):
+        super().__init__(ids, skill_lists)
+        company_codes = {}
+        self.companies = np.fromiter(
+            (company_codes.setdefault(company.strip().lower(), len(company_codes)) for company in companies),
+            dtype=np.int32,
+            count=len(self.ids),
+        )
+        self.company_codes = company_codes
+
+    @classmethod
+    def from_database(cls):
+        rows = JobPosting.objects.values_list("id", "required_skills", "company").order_by("id")
+        ids, skill_lists, companies = [], [], []
+        for job_id, skills, company in rows.iterator(chunk_size=5000):
+            ids.append(job_id)
+            skill_lists.append(skills)
+            companies.append(company)
+        return cls(ids, skill_lists, companies)
+
+    def company_mask(self, companies):
+        codes = [self.company_codes.get(company.strip().lower(), -1) for company in companies]
+        return np.isin(self.companies, codes)
+
+    def rank(self, candidate_skills, top=10, companies=None, must_have=None, semantic=None, semantic_weight=0.3):
+        """Return ``(job_ids, scores)`` of the best postings for a candidate.
+
+        The score is the percentage of a posting's required skills the
+        candidate covers, as in :func:`matcher.scoring.score_match`. Passing
+        ``semantic=(job_ids, similarities)`` blends in document similarity
+        with ``semantic_weight``; postings outside that neighbourhood count
+        as dissimilar.
+        """
+        matched = self.overlap(self.query_vector(candidate_skills))
+        scores = np.divide(100.0 * matched, self.row_sizes, out=np.zeros(len(self.ids)), where=self.row_sizes > 0)
+
+        if semantic is not None:
+            neighbour_ids, similarities = semantic
+            rows = np.searchsorted(self.ids, neighbour_ids)
+            found = (rows < len(self.ids)) & (self.ids[np.minimum(rows, len(self.ids) - 1)] == neighbour_ids)
+            scores *= 1 - semantic_weight
+            scores[rows[found]] += semantic_weight * 100.0 * np.clip(similarities[found], 0, 1)
+
+        mask = None
+        if companies:
+            mask = self.company_mask(companies)
+        if must_have:
+            required = self.rows_containing(must_have)
+            mask = required if mask is None else mask & required
+
+        best = top_k(scores, top, mask)
+        return self.ids[best], np.rint(scores[best]).astype(int)
+
+
+class CandidateIndex(SkillIndex):
+    """SkillIndex over every CandidateProfile."""
+
+    @classmethod
+    def from_database(cls):
+        rows = CandidateProfile.objects.values_list("id", "skills").order_by("id")
+        ids, skill_lists = [], []
+        for candidate_id, skills in rows.iterator(chunk_size=5000):
+            ids.append(candidate_id)
+            skill_lists.append(skills)
+        return cls(ids, skill_lists)
+
+    def scores(self, required_skills, weights=None):
+        """Percentage of the job's (weighted) required skills each candidate covers."""
+        required = normalize_skills(required_skills)
+        weights = {normalize_skill(skill): float(weight) for skill, weight in (weights or {}).items()}
+        total = sum(weights.get(skill, 1.0) for skill in required)
+        if not total:
+            return np.zeros(len(self.ids))
+        return 100.0 * self.overlap(self.query_vector(required, weights)) / total
+
+    def rank(self, required_skills, limit, weights=None):
+        """Return ``(candidate_ids, scores)`` of the ``limit`` best candidates for a job."""
+        scores = self.scores(required_skills, weights)
+        best = top_k(scores, limit)
+        return self.ids[best], np.rint(scores[best]).astype(int)
+
+
+_job_index = None
+_job_index_version = None
+_job_index_lock = threading.Lock()
+
+
+def get_job_index():
+    """Return the job index, rebuilding it when any JobPosting has changed."""
+    global _job_index, _job_index_version
+    version = get_version("jobs")
+    if _job_index is None or _job_index_version != version:
+        with _job_index_lock:
+            if _job_index is None or _job_index_version != version:
+                _job_index = JobIndex.from_database()
+                _job_index_version = version
+    return _job_index
+
+
+_candidate_index = None
+_candidate_index_version = None
+_candidate_index_lock = threading.Lock()
+
+
+def get_candidate_index():
+    """Return the candidate index, rebuilding it when any CandidateProfile has changed."""
+    global _candidate_index, _candidate_index_version
+    version = get_version("candidates")
+    if _candidate_index is None or _candidate_index_version != version:
+        with _candidate_index_lock:
+            if _candidate_index is None or _candidate_index_version != version:
+                _candidate_index = CandidateIndex.from_database()
+                _candidate_index_version = version
+    return _candidate_index
+
+
+def rank_candidates_for_job(job, page=1, page_size=20, rescore_top=0):
+    """Rank stored candidates for a JobPosting and return one page of results.
+
+    With ``rescore_top`` the best N candidates are re-scored by the LLM matcher
+    and re-ordered among themselves; everyone else keeps the local score, as
+    do head candidates the LLM budget cannot cover. Returns ``(total, results)``.
+    """
+    index = get_candidate_index()
+    offset = (page - 1) * page_size
+    candidate_ids, scores = index.rank(job.required_skills, max(offset + page_size, rescore_top))
+
+    profiles = CandidateProfile.objects.in_bulk(candidate_ids.tolist())
+    job_data = {"title": job.title, "company": job.company, "required_skills": job.required_skills, "description": job.description}
+    results = []
+    for candidate_id, score in zip(candidate_ids.tolist(), scores.tolist()):
+        profile = profiles.get(candidate_id)
+        if profile is None:
+            continue
+        match = local_match({"skills": profile.skills}, job_data)
+        results.append({
+            "candidate_id": profile.id,
+            "candidate_name": profile.name,
+            "match_score": score,
+            "missing_skills": match["missing_skills"],
+            "summary": match["summary"],
+            "rescored": False,
+        })
+
+    if rescore_top:
+        head = results[:rescore_top]
+        candidates = [candidate_payload(profiles[result["candidate_id"]]) for result in head]
+        with ThreadPoolExecutor(max_workers=min(len(head), RESCORE_WORKERS) or 1) as executor:
+            llm_results = list(executor.map(in_context(lambda candidate: rescore(candidate, job_data)), candidates))
+        for result, llm_result in zip(head, llm_results):
+            if llm_result is None:
+                continue
+            result.update(
+                match_score=llm_result.get("match_score", result["match_score"]),
+                missing_skills=llm_result.get("missing_skills", result["missing_skills"]),
+                summary=llm_result.get("summary", result["summary"]),
+                rescored=True,
+            )
+        head.sort(key=lambda result: -result["match_score"])
+        results[:rescore_top] = head
+
+    return len(index), results[offset:offset + page_size]
+
+
+def candidate_payload(profile):
+    return {
+        "name": profile.name,
+        "skills": profile.skills,
+        "education": profile.education,
+        "work_experience": profile.work_experience,
+    }
+
+
+def rescore(candidate, job_data):
+    """LLM match for one head candidate, or None to keep its local score.
+
+    That is when the LLM budget is exhausted or the call fails.
+    """
+    try:
+        llm_result = llm_match_candidate_to_job(candidate, job_data)
+        return json.loads(llm_result) if isinstance(llm_result, str) else llm_result
+    except BudgetExceeded:
+        return None
+    except Exception:
+        logger.warning("LLM re-scoring of %s failed, keeping the local score", candidate.get("name"), exc_info=True)
+        return None
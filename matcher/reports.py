@@ -0,0 +1,159 @@
+import base64
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Min, Q, Value
+from django.db.models.functions import Least
+
+from .models import MatchResult
+
+# Match result listing, export and statistics.
+#
+# Results are listed newest first and paged on (created_at, id), so a page
+# costs the same however deep it is. Exports stream plain rows (values(), no
+# model instances) straight from a database cursor, and statistics are
+# computed with SQL aggregates; none of these load the whole table into
+# Python.
+
+EXPORT_FIELDS = ("id", "candidate_name", "job_title", "company", "match_score", "missing_skills", "summary", "created_at")
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def filter_match_results(results, params):
+    """Apply the ``candidate``, ``job``, ``min_score`` and ``max_score`` query filters."""
+    filters = {}
+    for param, lookup in (("candidate", "candidate_id"), ("job", "job_id"), ("min_score", "match_score__gte"), ("max_score", "match_score__lte")):
+        value = params.get(param, "").strip()
+        if value:
+            try:
+                filters[lookup] = int(value)
+            except ValueError:
+                raise ValueError(f"{param} must be an integer.")
+    return results.filter(**filters)
+
+
+def encode_cursor(created_at, result_id):
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{result_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, result_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(result_id)
+    except ValueError:
+        raise ValueError("Invalid cursor.")
+
+
+def after_cursor(results, cursor):
+    """Results older than the row the cursor points at, in (created_at, id) order."""
+    created_at, result_id = decode_cursor(cursor)
+    # The plain created_at bound lets the database walk the (created_at, id)
+    # index from the cursor instead of sorting every older row.
+    return results.filter(Q(created_at__lt=created_at) | Q(id__lt=result_id), created_at__lte=created_at)
+
+
+def result_values(results):
+    """A values() queryset of MatchResults with the candidate and job names."""
+    return results.values(
+        "id", "match_score", "missing_skills", "summary", "created_at",
+        candidate_name=F("candidate__name"), job_title=F("job__title"), company=F("job__company"),
+    )
+
+
+def format_result(row):
+    return dict(row, created_at=row["created_at"].strftime(CREATED_AT_FORMAT))
+
+
+class _Echo:
+    """The write() target csv.writer needs; returns each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(results, chunk_size=2000):
+    """Iterate ``results`` as exported dicts without caching them, loading only the exported columns."""
+    for row in result_values(results).iterator(chunk_size=chunk_size):
+        yield format_result(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row["missing_skills"] = "; ".join(map(str, row["missing_skills"] or []))
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def score_summary(results, bucket_size=10):
+    """Count, average, min and max score plus a histogram of ``bucket_size``-wide score buckets.
+
+    A score of 100 is counted in the top bucket.
+    """
+    summary = results.aggregate(count=Count("id"), average_score=Avg("match_score"), min_score=Min("match_score"), max_score=Max("match_score"))
+    if summary["average_score"] is not None:
+        summary["average_score"] = round(summary["average_score"], 1)
+
+    top_bucket = max(100 // bucket_size - 1, 0)
+    buckets = (
+        results.order_by()
+        .annotate(bucket=Least(F("match_score") / bucket_size, Value(top_bucket)))
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .order_by("bucket")
+    )
+    summary["histogram"] = []
+    for row in buckets:
+        low = row["bucket"] * bucket_size
+        high = 100 if row["bucket"] == top_bucket else low + bucket_size - 1
+        summary["histogram"].append({"min_score": low, "max_score": high, "count": row["count"]})
+    return summary
+
+
+def missing_skill_counts(results, top=20):
+    """The ``top`` most common missing skills, ignoring case and surrounding spaces.
+
+    The JSON lists are unnested and counted in SQL with ``json_each`` on
+    SQLite and ``jsonb_array_elements_text`` on PostgreSQL, grouped by exact
+    value; only the few distinct values are merged in Python. Other databases
+    stream the lists and count them in Python.
+    """
+    if connection.vendor == "sqlite":
+        unnest = "json_each(m.missing_skills) AS skill"
+    elif connection.vendor == "postgresql":
+        unnest = "jsonb_array_elements_text(m.missing_skills) AS skill(value)"
+    else:
+        return _top_skills(
+            (skill, 1)
+            for skills in results.values_list("missing_skills", flat=True).iterator(chunk_size=2000)
+            for skill in skills or []
+        )[:top]
+
+    sql = f"SELECT skill.value, COUNT(*) FROM {MatchResult._meta.db_table} AS m, {unnest}"
+    params = []
+    if results.query.has_filters():
+        subquery, params = results.order_by().values("id").query.sql_with_params()
+        sql += f" WHERE m.id IN ({subquery})"
+    sql += " GROUP BY skill.value"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return _top_skills(cursor.fetchall())[:top]
+
+
+def _top_skills(counts):
+    """Merge ``(skill, count)`` pairs case-insensitively, most common first."""
+    totals, labels = Counter(), {}
+    for skill, count in counts:
+        skill = str(skill)
+        key = skill.strip().lower()
+        totals[key] += count
+        labels[key] = min(labels.get(key, skill), skill)
+    return [{"skill": labels[key], "count": count} for key, count in sorted(totals.items(), key=lambda item: (-item[1], item[0]))]
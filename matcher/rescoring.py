@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from itertools import groupby
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+
+from .llm import TokenBucket
+from .models import CandidateProfile, JobPosting, MatchResult
+from .scoring import MATCH_INPUT_FIELDS, match_input_hash
+from .utils import match_candidate_to_jobs, match_result_fields, resolve_match_mode
+
+logger = logging.getLogger(__name__)
+
+# Background re-scoring of stored match results.
+#
+# CandidateProfile and JobPosting carry a ``revision`` that goes up whenever
+# a field the matcher reads changes, and every MatchResult records the
+# revisions it was scored at, so a stale result is simply one whose recorded
+# revision is behind its candidate's or job's. Saving a profile or posting
+# marks it dirty; once it has gone DEBOUNCE seconds without another edit,
+# only its stale results are re-scored, in a background thread and at most
+# MAX_RATE pairs per second. Nothing is lost on restart: staleness lives in
+# the tables, and "manage.py rescore_stale" re-scores whatever is left.
+
+DEFAULTS = {
+    # Re-score in a thread of the web process; disable when a separate
+    # "manage.py rescore_stale" worker does it.
+    "IN_PROCESS": True,
+    # Seconds to wait after the last edit of a profile or posting.
+    "DEBOUNCE": 30,
+    # Re-scored pairs per second.
+    "MAX_RATE": 2.0,
+    # Jobs scored together for one candidate (see match_candidate_to_jobs).
+    "BATCH_SIZE": 20,
+}
+
+# Model fields read by the matcher, per model.
+SCORED_FIELDS = {
+    CandidateProfile: MATCH_INPUT_FIELDS["candidate"],
+    JobPosting: tuple(field for field in MATCH_INPUT_FIELDS["job"] if field != "skill_weights"),
+}
+
+
+def rescoring_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "RESCORING", {}))
+    return options
+
+
+def scoring_inputs_changed(instance):
+    """Whether saving ``instance`` changes a field the matcher reads."""
+    if instance._state.adding or instance.pk is None:
+        return False
+    fields = SCORED_FIELDS[type(instance)]
+    stored = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    return stored is not None and any(stored[field] != getattr(instance, field) for field in fields)
+
+
+def bump_revision(instance):
+    type(instance).objects.filter(pk=instance.pk).update(revision=F("revision") + 1)
+    instance.refresh_from_db(fields=["revision"])
+
+
+def stale_results(candidate_ids=None, job_ids=None):
+    """MatchResults scored at an older revision of their candidate or job.
+
+    With ``candidate_ids``/``job_ids`` only results of those candidates or jobs
+    are returned.
+    """
+    results = MatchResult.objects.filter(
+        Q(candidate_revision__lt=F("candidate__revision")) | Q(job_revision__lt=F("job__revision"))
+    )
+    if candidate_ids is not None or job_ids is not None:
+        results = results.filter(Q(candidate_id__in=candidate_ids or []) | Q(job_id__in=job_ids or []))
+    return results
+
+
+def _data(instance):
+    return {field: getattr(instance, field) for field in SCORED_FIELDS[type(instance)]}
+
+
+def rescore_results(results, limiter=None, batch_size=None, mode=None):
+    """Re-score ``results`` from the stored candidates and jobs; returns how many pairs were scored.
+
+    Results are scored again in the mode they were scored in, or in ``mode``
+    (default settings.MATCH_MODE) when that was not recorded. Each pair is
+    scored once per mode, however many results it has; they are replaced by a
+    single result at the current revisions.
+    """
+    batch_size = batch_size or rescoring_settings()["BATCH_SIZE"]
+    default_mode = resolve_match_mode(mode)
+    pairs = results.order_by("candidate_id", "mode", "job_id").values_list("candidate_id", "mode", "job_id", "id")
+    scored = 0
+    for (candidate_id, result_mode), rows in groupby(pairs.iterator(), key=lambda row: row[:2]):
+        job_ids = {}
+        for row in rows:
+            job_ids.setdefault(row[2], []).append(row[3])
+        candidate = CandidateProfile.objects.filter(pk=candidate_id).first()
+        if candidate is None:
+            continue
+        job_list = list(job_ids)
+        for start in range(0, len(job_list), batch_size):
+            jobs = list(JobPosting.objects.in_bulk(job_list[start:start + batch_size]).values())
+            if limiter is not None:
+                for _ in jobs:
+                    limiter.acquire()
+            result_ids = [result_id for job in jobs for result_id in job_ids[job.id]]
+            scored += _rescore(candidate, jobs, result_ids, result_mode or default_mode)
+    return scored
+
+
+def _rescore(candidate, jobs, result_ids, mode):
+    candidate_data = _data(candidate)
+    job_data = [_data(job) for job in jobs]
+    entries = []
+    for job, data, match_result in zip(jobs, job_data, match_candidate_to_jobs(candidate_data, job_data, mode=mode)):
+        match_score, missing_skills, summary = match_result_fields(match_result)
+        entries.append(MatchResult(
+            candidate=candidate,
+            job=job,
+            match_score=match_score,
+            missing_skills=missing_skills,
+            summary=summary,
+            input_hash=match_input_hash(candidate_data, data, mode),
+            mode=mode,
+            candidate_revision=candidate.revision,
+            job_revision=job.revision,
+        ))
+    with transaction.atomic():
+        MatchResult.objects.filter(id__in=result_ids).delete()
+        MatchResult.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["candidate", "job", "input_hash"],
+            update_fields=["match_score", "missing_skills", "summary", "mode", "candidate_revision", "job_revision", "created_at"],
+        )
+    return len(entries)
+
+
+class Rescorer:
+    """Collects edited candidates and jobs and re-scores their stale results once the edits settle."""
+
+    def __init__(self, options):
+        self.debounce = options["DEBOUNCE"]
+        self.batch_size = options["BATCH_SIZE"]
+        self.limiter = TokenBucket(options["MAX_RATE"], max(options["MAX_RATE"], 1)) if options["MAX_RATE"] else None
+        # (model, pk) -> monotonic time at which it is re-scored
+        self._due = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def mark(self, instance):
+        """Re-score ``instance``'s stale results after DEBOUNCE quiet seconds."""
+        with self._condition:
+            self._due[(type(instance), instance.pk)] = time.monotonic() + self.debounce
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rescorer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _take_due(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due = [key for key, at in self._due.items() if at <= now]
+                if due:
+                    for key in due:
+                        del self._due[key]
+                    return due
+                self._condition.wait(min(self._due.values()) - now if self._due else None)
+
+    def _run(self):
+        while True:
+            due = self._take_due()
+            candidate_ids = [pk for model, pk in due if model is CandidateProfile]
+            job_ids = [pk for model, pk in due if model is JobPosting]
+            close_old_connections()
+            try:
+                scored = rescore_results(stale_results(candidate_ids, job_ids), self.limiter, self.batch_size)
+                if scored:
+                    logger.info("Re-scored %d stale match results", scored)
+            except Exception:
+                logger.exception("Re-scoring stale match results failed")
+            finally:
+                close_old_connections()
+
+
+_rescorer = None
+_rescorer_lock = threading.Lock()
+
+
+def get_rescorer():
+    global _rescorer
+    if _rescorer is None:
+        with _rescorer_lock:
+            if _rescorer is None:
+                _rescorer = Rescorer(rescoring_settings())
+    return _rescorer
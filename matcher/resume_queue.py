@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ResumeJob
+from .storage import file_hash, read_upload, store_resume_file
+from .utils import parse_resume
+
+logger = logging.getLogger(__name__)
+
+# Background resume parsing.
+#
+# Uploads are written to storage and recorded as ResumeJob rows, which are
+# the durable queue: a worker claims a pending row with a conditional UPDATE,
+# so several processes can drain the same table. Rows left "running" by a
+# process that died are put back to "pending" once they go stale. With
+# IN_PROCESS the pool starts on the first request a process serves, so work
+# queued before a restart is picked up without waiting for a new upload.
+
+DEFAULTS = {
+    # Concurrent parses per process.
+    "WORKERS": 4,
+    # Run workers inside the web process; disable when a separate
+    # "manage.py process_resume_queue" worker drains the table.
+    "IN_PROCESS": True,
+    # Seconds before a "running" job is considered abandoned.
+    "STALE_AFTER": 600,
+    "MAX_ATTEMPTS": 3,
+}
+
+SUPPORTED_FILE_TYPES = ("pdf", "docx")
+
+
+def queue_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "RESUME_QUEUE", {}))
+    return options
+
+
+def submit_resume(uploaded_file):
+    """Queue an uploaded resume for parsing and return its ResumeJob.
+
+    Uploading the same file again returns the existing job instead of parsing
+    it twice; a failed job is retried.
+    """
+    data = read_upload(uploaded_file)
+    digest = file_hash(data)
+    file_type = uploaded_file.name.rsplit(".", 1)[-1].lower()
+
+    job = ResumeJob.objects.filter(file_hash=digest).first()
+    if job is None:
+        # Store the file before the row exists so no worker can claim a job without one.
+        name = store_resume_file(data, file_type, prefix="resume_jobs")
+        job, created = ResumeJob.objects.get_or_create(
+            file_hash=digest,
+            defaults={"file_name": uploaded_file.name, "file_type": file_type, "resume_file": name},
+        )
+        if not created:
+            return job
+    elif job.status == ResumeJob.FAILED:
+        ResumeJob.objects.filter(pk=job.pk).update(status=ResumeJob.PENDING, error="", attempts=0, updated_at=timezone.now())
+        job.refresh_from_db()
+    else:
+        return job
+
+    if queue_settings()["IN_PROCESS"]:
+        get_worker_pool().enqueue(job.pk)
+    return job
+
+
+def claim(job_id):
+    """Atomically move a pending job to running; False if another worker got it."""
+    claimed = ResumeJob.objects.filter(pk=job_id, status=ResumeJob.PENDING).update(
+        status=ResumeJob.RUNNING, updated_at=timezone.now()
+    )
+    return claimed == 1
+
+
+def process_job(job_id):
+    """Parse one queued resume. Safe to call for jobs that are no longer pending."""
+    close_old_connections()
+    try:
+        if not claim(job_id):
+            return
+        job = ResumeJob.objects.get(pk=job_id)
+        job.attempts += 1
+        try:
+            with default_storage.open(job.resume_file.name, "rb") as resume:
+                result = parse_resume(resume, job.file_type)
+        except Exception as e:
+            logger.exception("Parsing resume job %s failed", job_id)
+            retry = job.attempts < queue_settings()["MAX_ATTEMPTS"]
+            job.status = ResumeJob.PENDING if retry else ResumeJob.FAILED
+            job.error = str(e)
+        else:
+            if result is None:
+                job.status = ResumeJob.FAILED
+                job.error = f"Could not parse a {job.file_type} resume."
+            else:
+                job.status = ResumeJob.DONE
+                job.result = result
+                job.error = ""
+        job.save(update_fields=["status", "result", "error", "attempts", "updated_at"])
+
+        if job.status == ResumeJob.PENDING and queue_settings()["IN_PROCESS"]:
+            get_worker_pool().enqueue(job.pk)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs():
+    """Return abandoned "running" jobs to the queue; returns how many were reset."""
+    cutoff = timezone.now() - timedelta(seconds=queue_settings()["STALE_AFTER"])
+    return ResumeJob.objects.filter(status=ResumeJob.RUNNING, updated_at__lt=cutoff).update(
+        status=ResumeJob.PENDING, updated_at=timezone.now()
+    )
+
+
+def pending_job_ids():
+    return list(ResumeJob.objects.filter(status=ResumeJob.PENDING).order_by("created_at").values_list("pk", flat=True))
+
+
+class WorkerPool:
+    """Thread pool that parses queued resumes with bounded concurrency."""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-worker")
+        self._recovered_at = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_id):
+        self.recover()
+        self.executor.submit(process_job, job_id)
+
+    def recover(self):
+        """Pick up work left over from before a restart or by a worker that died.
+
+        Called on every request (see matcher/signals.py) and every enqueue,
+        but runs at most once every STALE_AFTER seconds, on the pool's threads.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._recovered_at is not None and now - self._recovered_at < queue_settings()["STALE_AFTER"]:
+                return
+            self._recovered_at = now
+        self.executor.submit(self._recover)
+
+    def _recover(self):
+        close_old_connections()
+        try:
+            requeue_stale_jobs()
+            job_ids = pending_job_ids()
+        except Exception:
+            logger.exception("Recovering queued resume jobs failed")
+            return
+        finally:
+            close_old_connections()
+        for job_id in job_ids:
+            self.executor.submit(process_job, job_id)
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    global _worker_pool
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = WorkerPool(queue_settings()["WORKERS"])
+    return _worker_pool
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import re
+
+# Deterministic local matching.
+#
+# Scores a candidate against a job from the two skill lists alone, so the
+# common case never has to wait on a chat completion. Skills are normalized
+# (case, punctuation, whitespace) and folded through an alias table before
+# they are compared.
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "cpp": "c++",
+    "csharp": "c#",
+    "c sharp": "c#",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "mssql": "sql server",
+    "ms sql server": "sql server",
+    "k8s": "kubernetes",
+    "gcp": "google cloud",
+    "google cloud platform": "google cloud",
+    "aws": "amazon web services",
+    "azure cloud": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "llm": "large language models",
+    "llms": "large language models",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "drf": "django rest framework",
+    "rest": "rest api",
+    "rest apis": "rest api",
+    "restful api": "rest api",
+    "restful apis": "rest api",
+    "ci cd": "ci/cd",
+    "cicd": "ci/cd",
+    "oop": "object-oriented programming",
+    "object oriented programming": "object-oriented programming",
+}
+
+_SEPARATORS = re.compile(r"[\s_]+")
+_TRIM = re.compile(r"^[^\w#+.]+|[^\w#+]+$")
+
+MATCH_MODES = ("local", "llm", "hybrid")
+
+
+def normalize_skill(skill):
+    """Return the canonical form of a skill name, e.g. ``"Postgres "`` -> ``"postgresql"``."""
+    skill = _SEPARATORS.sub(" ", str(skill).lower())
+    skill = _TRIM.sub("", skill)
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def normalize_skills(skills):
+    """Normalize a list of skills, dropping blanks and duplicates but keeping order."""
+    if isinstance(skills, str):
+        skills = [skills]
+    normalized = {}
+    for skill in skills or []:
+        key = normalize_skill(skill)
+        if key and key not in normalized:
+            normalized[key] = skill
+    return normalized
+
+
+def score_match(candidate_skills, required_skills, weights=None):
+    """Score candidate skills against required skills with weighted overlap.
+
+    ``weights`` optionally maps required skills to their relative importance
+    (default 1.0 each). Returns the same keys as the LLM matcher plus the
+    matched skills.
+    """
+    candidate = normalize_skills(candidate_skills)
+    required = normalize_skills(required_skills)
+    weights = {normalize_skill(skill): float(weight) for skill, weight in (weights or {}).items()}
+
+    total = matched_weight = 0.0
+    matched, missing = [], []
+    for key, original in required.items():
+        weight = weights.get(key, 1.0)
+        total += weight
+        if key in candidate:
+            matched_weight += weight
+            matched.append(original)
+        else:
+            missing.append(original)
+
+    match_score = round(100 * matched_weight / total) if total else 0
+    return {
+        "match_score": match_score,
+        "missing_skills": missing,
+        "matched_skills": matched,
+    }
+
+
+def local_summary(result, required_count):
+    if not required_count:
+        return "The job lists no required skills, so no skill-based assessment was made."
+    matched = len(result["matched_skills"])
+    summary = f"Candidate covers {matched} of {required_count} required skills ({result['match_score']}% weighted)."
+    if result["missing_skills"]:
+        summary += " Missing: " + ", ".join(result["missing_skills"]) + "."
+    return summary
+
+
+def local_match(candidate, job):
+    """Match a candidate dict to a job dict without calling the LLM."""
+    required_skills = job.get("required_skills") or []
+    result = score_match(
+        candidate.get("skills") or [],
+        required_skills,
+        weights=job.get("skill_weights"),
+    )
+    result["summary"] = local_summary(result, len(normalize_skills(required_skills)))
+    return result
+
+
+def is_borderline(result, low, high):
+    """Borderline scores (and jobs without skills to compare) are worth an LLM opinion."""
+    no_skills = not result["matched_skills"] and not result["missing_skills"]
+    return no_skills or low <= result["match_score"] <= high
+
+
+MATCH_INPUT_FIELDS = {
+    "candidate": ("name", "skills", "education", "work_experience"),
+    "job": ("title", "company", "required_skills", "skill_weights", "description"),
+}
+
+
+def match_input_hash(candidate, job, mode):
+    """SHA-256 of everything a match result depends on: the scored candidate and job fields and the mode.
+
+    Missing and empty fields hash the same, so request data and stored rows agree.
+    """
+    payload = {
+        "candidate": {field: candidate.get(field) or None for field in MATCH_INPUT_FIELDS["candidate"]},
+        "job": {field: job.get(field) or None for field in MATCH_INPUT_FIELDS["job"]},
+        "mode": mode,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
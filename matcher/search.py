@@ -0,0 +1,322 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import JobPosting
+from .ranking import top_k
+from .versions import get_version
+
+logger = logging.getLogger(__name__)
+
+# Full-text job search.
+#
+# On SQLite, title, company and description are indexed in an FTS5 table
+# (`matcher_jobposting_fts`) that reads its text from `matcher_jobposting`
+# and is kept up to date by triggers, so bulk_create and queryset updates are
+# indexed too. Results are ranked by BM25 with per-column weights and come
+# with a highlighted snippet of the description.
+#
+# Other databases, or SQLite builds without FTS5, use `InvertedIndex`: the
+# same tokenizer, query syntax and BM25 formula over an in-memory index that is
+# rebuilt when the jobs version changes. The version is kept in the database,
+# so postings written by other processes are picked up too.
+#
+# Queries are plain words, all of which must match. A word ending in `*`
+# matches as a prefix, and `prefix=True` makes the last word a prefix too
+# (search as you type).
+
+DEFAULTS = {
+    # BM25 weight of a match in title, company and description.
+    "WEIGHTS": [10.0, 5.0, 1.0],
+    "SNIPPET_TOKENS": 16,
+    "SNIPPET_MARKERS": ["**", "**"],
+}
+
+FTS_TABLE = "matcher_jobposting_fts"
+FTS_COLUMNS = ("title", "company", "description")
+
+# BM25 parameters, the same as FTS5 uses.
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[^\W_]+")
+_QUERY_TERM = re.compile(r"([^\W_]+)(\*?)")
+
+FTS_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, company, description,
+        content='matcher_jobposting', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON matcher_jobposting BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON matcher_jobposting BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF title, company, description ON matcher_jobposting BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END""",
+]
+FTS_TRIGGERS = {f"{FTS_TABLE}_insert", f"{FTS_TABLE}_delete", f"{FTS_TABLE}_update"}
+
+
+def search_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "JOB_SEARCH", {}))
+    return options
+
+
+def tokenize(text):
+    """Lower-cased words with accents removed, split like FTS5's unicode61 tokenizer."""
+    text = unicodedata.normalize("NFKD", str(text or "").casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN.findall(text)
+
+
+def parse_query(query, prefix=False):
+    """``[(term, is_prefix), ...]`` for a user query; punctuation is ignored."""
+    terms = []
+    for word, star in _QUERY_TERM.findall(str(query or "")):
+        for token in tokenize(word):
+            terms.append((token, bool(star)))
+    if terms and prefix:
+        terms[-1] = (terms[-1][0], True)
+    return terms
+
+
+def fts_query(terms):
+    """The FTS5 MATCH expression for parsed ``terms``; every token is quoted."""
+    return " ".join(f'"{term}"*' if is_prefix else f'"{term}"' for term, is_prefix in terms)
+
+
+def install_fts(schema_connection=None, repair_only=False):
+    """Create the FTS5 table and triggers if missing; returns False where FTS5 is unavailable.
+
+    The index is rebuilt when anything had to be created, e.g. on first
+    install or after a migration re-created `matcher_jobposting` (which drops
+    its triggers). With ``repair_only`` nothing is created unless the table
+    already exists.
+    """
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor != "sqlite":
+        return False
+    with schema_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = 'matcher_jobposting')", [FTS_TABLE])
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TRIGGERS | {FTS_TABLE} <= existing:
+            return True
+        if repair_only and FTS_TABLE not in existing:
+            return False
+        try:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+        except Exception:
+            logger.warning("SQLite FTS5 is unavailable, job search uses the in-memory index", exc_info=True)
+            return False
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def uninstall_fts(schema_connection=None):
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor != "sqlite":
+        return
+    with schema_connection.cursor() as cursor:
+        for trigger in sorted(FTS_TRIGGERS):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def fts_available():
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+class InvertedIndex:
+    """In-memory BM25 index over job title, company and description.
+
+    Postings are numpy arrays per term (row numbers and the column-weighted
+    term frequency), so a query costs one bincount per query term.
+    """
+
+    def __init__(self, ids, documents, weights):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        postings = {}
+        lengths = np.zeros(len(self.ids), dtype=np.float64)
+        for row, fields in enumerate(documents):
+            counts = {}
+            for weight, text in zip(weights, fields):
+                tokens = tokenize(text)
+                lengths[row] += len(tokens)
+                for token in tokens:
+                    counts[token] = counts.get(token, 0.0) + weight
+            for token, frequency in counts.items():
+                rows, frequencies = postings.setdefault(token, ([], []))
+                rows.append(row)
+                frequencies.append(frequency)
+
+        self.postings = {
+            token: (np.asarray(rows, dtype=np.int64), np.asarray(frequencies, dtype=np.float64))
+            for token, (rows, frequencies) in postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+        self.length_norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1.0)) if len(lengths) else lengths
+
+    @classmethod
+    def from_database(cls):
+        rows = list(JobPosting.objects.values_list("id", *FTS_COLUMNS).order_by("id"))
+        return cls([row[0] for row in rows], [row[1:] for row in rows], search_settings()["WEIGHTS"])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def expand(self, term, is_prefix):
+        if not is_prefix:
+            return [term] if term in self.postings else []
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + "\U0010ffff")
+        return self.vocabulary[start:end]
+
+    def search(self, terms, limit, offset=0, allowed_ids=None):
+        """``(ids, scores)`` of the best matches for parsed ``terms``, highest score first."""
+        count = len(self.ids)
+        if not terms or not count:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        scores = np.zeros(count)
+        matched = np.ones(count, dtype=bool)
+        for term, is_prefix in terms:
+            tokens = self.expand(term, is_prefix)
+            if not tokens:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            rows = np.concatenate([self.postings[token][0] for token in tokens])
+            frequencies = np.bincount(rows, np.concatenate([self.postings[token][1] for token in tokens]), minlength=count)
+            present = frequencies > 0
+            documents = np.count_nonzero(present)
+            idf = max(math.log((count - documents + 0.5) / (documents + 0.5)), 1e-6)
+            scores += idf * frequencies * (K1 + 1) / (frequencies + self.length_norm)
+            matched &= present
+
+        if allowed_ids is not None:
+            matched &= np.isin(self.ids, np.fromiter(allowed_ids, dtype=np.int64))
+        rows = top_k(scores, offset + limit, matched)[offset:]
+        return self.ids[rows], scores[rows]
+
+
+def highlight(text, terms, size, markers):
+    """A window of about ``size`` words from ``text`` around the first match, matches wrapped in ``markers``."""
+    text = str(text or "")
+    words = list(re.finditer(r"\S+", text))
+    if not words:
+        return ""
+
+    def matches(word):
+        return any(
+            token.startswith(term) if is_prefix else token == term
+            for token in tokenize(word)
+            for term, is_prefix in terms
+        )
+
+    hits = [index for index, word in enumerate(words) if matches(word.group())]
+    start = max(min(hits[0] - size // 4, len(words) - size), 0) if hits else 0
+    hits = set(hits)
+    window = words[start:start + size]
+    opening, closing = markers
+    parts = [f"{opening}{word.group()}{closing}" if index in hits else word.group() for index, word in enumerate(window, start)]
+    return ("…" if start > 0 else "") + " ".join(parts) + ("…" if start + size < len(words) else "")
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the in-memory index, rebuilding it when any JobPosting has changed."""
+    global _index, _index_version
+    version = get_version("jobs")
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = InvertedIndex.from_database()
+                _index_version = version
+    return _index
+
+
+def search_jobs(query, limit=20, offset=0, prefix=False, jobs=None):
+    """Full-text search over job postings, best match first.
+
+    ``jobs`` optionally restricts the search to a filtered JobPosting queryset.
+    Returns dicts with id, title, company, required_skills, a highlighted
+    description ``snippet`` and the BM25 ``score`` (higher is better).
+    """
+    terms = parse_query(query, prefix)
+    if not terms:
+        return []
+    options = search_settings()
+    if fts_available():
+        hits = _fts_search(terms, limit, offset, jobs, options)
+    else:
+        hits = _index_search(terms, limit, offset, jobs, options)
+
+    postings = JobPosting.objects.in_bulk([job_id for job_id, _, _ in hits])
+    return [
+        {
+            "id": job_id,
+            "title": postings[job_id].title,
+            "company": postings[job_id].company,
+            "required_skills": postings[job_id].required_skills,
+            "snippet": snippet,
+            "score": round(score, 4),
+        }
+        for job_id, snippet, score in hits
+        if job_id in postings
+    ]
+
+
+def _fts_search(terms, limit, offset, jobs, options):
+    opening, closing = options["SNIPPET_MARKERS"]
+    sql = f"""
+        SELECT rowid, snippet({FTS_TABLE}, 2, %s, %s, '…', %s), bm25({FTS_TABLE}, %s, %s, %s) AS rank
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH %s
+    """
+    params = [opening, closing, options["SNIPPET_TOKENS"], *options["WEIGHTS"], fts_query(terms)]
+    if jobs is not None:
+        subquery, subquery_params = jobs.values("id").query.sql_with_params()
+        # The unary + keeps SQLite from handing the rowid list to FTS5, which
+        # would re-run the MATCH once per listed row.
+        sql += f" AND +rowid IN ({subquery})"
+        params.extend(subquery_params)
+    sql += " ORDER BY rank LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # FTS5's bm25() is negative, lower is better.
+        return [(job_id, snippet, -rank) for job_id, snippet, rank in cursor.fetchall()]
+
+
+def _index_search(terms, limit, offset, jobs, options):
+    allowed_ids = jobs.values_list("id", flat=True) if jobs is not None else None
+    job_ids, scores = get_search_index().search(terms, limit, offset, allowed_ids)
+    descriptions = dict(JobPosting.objects.filter(id__in=job_ids.tolist()).values_list("id", "description"))
+    return [
+        (job_id, highlight(descriptions.get(job_id), terms, options["SNIPPET_TOKENS"], options["SNIPPET_MARKERS"]), score)
+        for job_id, score in zip(job_ids.tolist(), scores.tolist())
+    ]
@@ -1,7 +1,15 @@
 from rest_framework import serializers
-from .models import JobPosting
+from .models import JobPosting, ResumeJob
 
 class JobPostingSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobPosting
         fields = '__all__'
+
+
+class ResumeJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source="id", read_only=True)
+
+    class Meta:
+        model = ResumeJob
+        fields = ["job_id", "file_name", "status", "result", "error", "attempts", "created_at", "updated_at"]
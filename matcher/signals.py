@@ -0,0 +1,138 @@
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .database import tune_sqlite
+from .embeddings import candidate_document, get_semantic_index, job_document
+from .imports import job_content_hash
+from .metrics import metrics_settings, record_query
+from .models import CandidateProfile, JobPosting
+from .rescoring import bump_revision, get_rescorer, rescoring_settings, scoring_inputs_changed
+from .resume_queue import get_worker_pool, queue_settings
+from .search import install_fts
+from .skills import sync_candidate_skills, sync_job_skills
+from .versions import bump_version
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_delete, sender=JobPosting)
+def job_posting_changed(sender, **kwargs):
+    bump_version("jobs")
+
+
+@receiver(post_save, sender=CandidateProfile)
+@receiver(post_delete, sender=CandidateProfile)
+def candidate_profile_changed(sender, **kwargs):
+    bump_version("candidates")
+
+
+@receiver(post_save, sender=JobPosting)
+def embed_job_posting(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_semantic_index("jobs").add([instance.id], [job_document(vars(instance))])
+
+
+@receiver(post_delete, sender=JobPosting)
+def unembed_job_posting(sender, instance, **kwargs):
+    get_semantic_index("jobs").remove([instance.id])
+
+
+@receiver(post_save, sender=CandidateProfile)
+def embed_candidate_profile(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_semantic_index("candidates").add([instance.id], [candidate_document(vars(instance))])
+
+
+@receiver(post_delete, sender=CandidateProfile)
+def unembed_candidate_profile(sender, instance, **kwargs):
+    get_semantic_index("candidates").remove([instance.id])
+
+
+@receiver(post_save, sender=JobPosting)
+def link_job_skills(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_job_skills({instance.id: instance.required_skills})
+
+
+@receiver(post_save, sender=CandidateProfile)
+def link_candidate_skills(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_candidate_skills({instance.id: instance.skills})
+
+
+def jobs_bulk_created(jobs):
+    """Do for ``jobs`` inserted with bulk_create what the post_save handlers above do for a save.
+
+    The full-text index is kept up by its own triggers.
+    """
+    if not jobs:
+        return
+    bump_version("jobs")
+    get_semantic_index("jobs").add([job.pk for job in jobs], [job_document(vars(job)) for job in jobs])
+    sync_job_skills({job.pk: job.required_skills for job in jobs})
+
+
+def candidates_bulk_created(profiles):
+    """Do for ``profiles`` inserted with bulk_create what the post_save handlers above do for a save."""
+    if not profiles:
+        return
+    bump_version("candidates")
+    get_semantic_index("candidates").add(
+        [profile.pk for profile in profiles], [candidate_document(vars(profile)) for profile in profiles]
+    )
+    sync_candidate_skills({profile.pk: profile.skills for profile in profiles})
+
+
+@receiver(pre_save, sender=JobPosting)
+def hash_job_posting(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    content_hash = job_content_hash(vars(instance))
+    if instance.pk and not instance.content_hash:
+        # Stored without a hash, like the repeats the 0014 migration left
+        # blank: it only gets one while no other posting holds it.
+        if JobPosting.objects.filter(content_hash=content_hash).exclude(pk=instance.pk).exists():
+            return
+    instance.content_hash = content_hash
+
+
+@receiver(pre_save, sender=JobPosting)
+@receiver(pre_save, sender=CandidateProfile)
+def detect_scoring_change(sender, instance, raw=False, **kwargs):
+    instance._scoring_changed = not raw and scoring_inputs_changed(instance)
+
+
+@receiver(post_save, sender=JobPosting)
+@receiver(post_save, sender=CandidateProfile)
+def queue_rescoring(sender, instance, **kwargs):
+    if getattr(instance, "_scoring_changed", False):
+        instance._scoring_changed = False
+        bump_revision(instance)
+        if rescoring_settings()["IN_PROCESS"]:
+            transaction.on_commit(lambda: get_rescorer().mark(instance))
+
+
+@receiver(post_migrate)
+def reinstall_job_search(sender, using="default", **kwargs):
+    # Migrations that re-create matcher_jobposting on SQLite drop its FTS triggers.
+    if sender.name == "matcher":
+        install_fts(connections[using], repair_only=True)
+
+
+@receiver(request_started)
+def start_resume_workers(sender, **kwargs):
+    if queue_settings()["IN_PROCESS"]:
+        get_worker_pool().recover()
+
+
+@receiver(connection_created)
+def tune_database_connection(sender, connection, **kwargs):
+    tune_sqlite(connection)
+
+
+@receiver(connection_created)
+def instrument_queries(sender, connection, **kwargs):
+    if metrics_settings()["ENABLED"] and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,83 @@
+from django.db import transaction
+
+from .models import CandidateSkill, JobSkill, Skill
+from .scoring import normalize_skills
+
+# Normalized skill tables.
+#
+# `CandidateProfile.skills` and `JobPosting.required_skills` stay the source of
+# truth; each normalized skill is also stored once in `Skill` and linked to its
+# owners through `CandidateSkill` / `JobSkill`, which are indexed both ways so
+# "jobs requiring X" is an index lookup instead of a scan over every JSON list.
+# The links are rewritten by the post_save signals, and for rows written with
+# bulk_create by jobs_bulk_created / candidates_bulk_created (matcher/signals.py).
+
+MAX_NAME_LENGTH = Skill._meta.get_field("name").max_length
+
+
+def skill_ids(names):
+    """Map normalized skill ``names`` to `Skill` ids, creating any that are missing."""
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(Skill.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - ids.keys()
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Skill.objects.filter(name__in=missing).values_list("name", "id"))
+    return ids
+
+
+def sync_skill_links(link_model, owner_field, skill_lists):
+    """Make the links of each owner in ``skill_lists`` (``{owner_id: skills}``) match its skills.
+
+    Only the difference is written: links for skills that were removed are
+    deleted and links for new skills are inserted.
+    """
+    if not skill_lists:
+        return
+    owner_column = f"{owner_field}_id"
+    keys = {
+        owner_id: [key for key in normalize_skills(skills) if len(key) <= MAX_NAME_LENGTH]
+        for owner_id, skills in skill_lists.items()
+    }
+
+    with transaction.atomic():
+        ids = skill_ids({key for owner_keys in keys.values() for key in owner_keys})
+        wanted = {(owner_id, ids[key]) for owner_id, owner_keys in keys.items() for key in owner_keys}
+        current = {
+            (owner_id, skill_id): link_id
+            for link_id, owner_id, skill_id in link_model.objects.filter(
+                **{f"{owner_column}__in": list(keys)}
+            ).values_list("id", owner_column, "skill_id")
+        }
+
+        stale = [link_id for pair, link_id in current.items() if pair not in wanted]
+        if stale:
+            link_model.objects.filter(id__in=stale).delete()
+        link_model.objects.bulk_create(
+            [link_model(**{owner_column: owner_id, "skill_id": skill_id}) for owner_id, skill_id in wanted - current.keys()],
+            batch_size=1000,
+        )
+
+
+def sync_job_skills(skill_lists):
+    sync_skill_links(JobSkill, "job", skill_lists)
+
+
+def sync_candidate_skills(skill_lists):
+    sync_skill_links(CandidateSkill, "candidate", skill_lists)
+
+
+def backfill_skill_links(owner_model, column, link_model, owner_field, batch_size=1000):
+    """Sync the links of every ``owner_model`` row from its JSON ``column``; returns the rows seen."""
+    seen = 0
+    batch = {}
+    for owner_id, skills in owner_model.objects.values_list("id", column).order_by("id").iterator(chunk_size=batch_size):
+        batch[owner_id] = skills
+        if len(batch) >= batch_size:
+            sync_skill_links(link_model, owner_field, batch)
+            seen += len(batch)
+            batch = {}
+    sync_skill_links(link_model, owner_field, batch)
+    return seen + len(batch)
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .metrics import timed
+
+# Content-addressed storage for uploaded resumes.
+#
+# Files are stored under the SHA-256 of their contents, so uploading the same
+# resume twice writes it once and two different files called "resume.pdf"
+# can never overwrite each other.
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_upload(uploaded_file):
+    """Return the bytes of an uploaded file, whether in memory or spooled to disk."""
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    uploaded_file.seek(0)
+    return data
+
+
+def store_resume_file(data, file_type, prefix="resumes"):
+    """Save resume bytes once per distinct content and return the storage name."""
+    name = f"{prefix}/{file_hash(data)}.{file_type}"
+    with timed("storage.save"):
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def should_store_uploads():
+    return getattr(settings, "STORE_RESUME_UPLOADS", False)
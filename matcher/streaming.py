@@ -0,0 +1,65 @@
+import json
+import logging
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+# Server-sent events for streamed LLM output.
+#
+# Each text delta is sent as `data: {"delta": "..."}`, followed by a final
+# `event: done` (or `event: error` if the model call fails part-way, since the
+# status code has already been sent by then).
+
+
+def sse_event(data, event=None):
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF views accept ``text/event-stream``; plain responses become one error event."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event(data, event="error")
+
+
+def wants_stream(request, data):
+    """Streaming is requested with ``"stream": true`` or ``Accept: text/event-stream``."""
+    return bool(data.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
+
+
+def sse_events(deltas):
+    try:
+        for delta in deltas:
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        logger.exception("Streaming failed")
+        yield sse_event({"error": str(e)}, event="error")
+        return
+    yield sse_event({}, event="done")
+
+
+async def asse_events(deltas):
+    try:
+        async for delta in deltas:
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        logger.exception("Streaming failed")
+        yield sse_event({"error": str(e)}, event="error")
+        return
+    yield sse_event({}, event="done")
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx and similar proxies from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
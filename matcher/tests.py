@@ -1,3 +1,1301 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import json
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import openai
+import pdfplumber
+import pypdfium2
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from docx import Document
+
+from benchmarks import stub_llm
+from benchmarks.corpus import make_pdf
+from benchmarks.stub_llm import serve_in_background
+from matcher import cache as result_cache
+from matcher import database, embeddings, llm, metrics, prompts, ranking, search, usage
+from matcher.extraction import PDF_ENGINES, iter_pdf_pages
+from matcher.imports import JobImporter
+from matcher.metrics import RequestMetrics, in_context, timed
+from matcher.models import CandidateProfile, CandidateSkill, DataVersion, JobPosting, JobSkill, MatchResult, ResumeJob, Skill
+from matcher.resume_queue import WorkerPool, claim, process_job
+from matcher.search import get_search_index, parse_query, search_jobs
+from matcher.signals import instrument_queries, jobs_bulk_created
+from matcher.utils import (
+    extract_text_from_pdf, match_candidate_to_job, match_candidate_to_jobs, parse_job_posting, resume_source,
+)
+from matcher.versions import get_version
+
+STUB = STUB_URL = None
+
+
+def setUpModule():
+    global STUB, STUB_URL
+    STUB, STUB_URL = serve_in_background(port=0)
+
+
+def tearDownModule():
+    STUB.shutdown()
+
+
+class MatcherTestMixin:
+    """Runs each test against the stub LLM, fresh caches and indexes, a
+    temporary embeddings and media directory and no background threads."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overrides = override_settings(
+            LLM_GATEWAY=dict(settings.LLM_GATEWAY, BASE_URL=STUB_URL, API_KEY="test", MAX_RETRIES=0),
+            EMBEDDINGS=dict(settings.EMBEDDINGS, DIR=directory),
+            MEDIA_ROOT=directory,
+            LLM_CACHE=dict(settings.LLM_CACHE, PERSISTENT_BACKEND=None),
+            RESCORING=dict(settings.RESCORING, IN_PROCESS=False),
+            RESUME_QUEUE=dict(settings.RESUME_QUEUE, IN_PROCESS=False),
+            METRICS=dict(settings.METRICS, LOG_REQUESTS=False),
+            LLM_BUDGET=dict(settings.LLM_BUDGET, LEDGER=False),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.reset_singletons()
+        self.addCleanup(self.reset_singletons)
+        cache.clear()
+
+    @staticmethod
+    def reset_singletons():
+        llm._gateway = None
+        llm._async_gateways.clear()
+        llm._rate_limiter = None
+        result_cache._result_cache = None
+        embeddings._embedder = None
+        embeddings._indexes.clear()
+        # Versions restart with every test's rolled-back DataVersion rows.
+        search._index = search._index_version = None
+        ranking._job_index = ranking._job_index_version = None
+        ranking._candidate_index = ranking._candidate_index_version = None
+
+    def llm_requests(self):
+        return STUB.RequestHandlerClass.stats["requests"]
+
+
+class MatcherTestCase(MatcherTestMixin, TestCase):
+    pass
+
+
+class MatcherTransactionTestCase(MatcherTestMixin, TransactionTestCase):
+    """For code that writes to the database from other threads."""
+
+
+class JobSearchTests(MatcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.python = JobPosting.objects.create(
+            title="Senior Python Developer", company="Acme",
+            required_skills=["Python", "Django"], description="Build Django services and REST APIs in Python.",
+        )
+        self.cpp = JobPosting.objects.create(
+            title="C++ Engineer", company="Initech",
+            required_skills=["C++"], description="Low latency trading systems; Python tooling is a plus.",
+        )
+        self.designer = JobPosting.objects.create(
+            title="Product Designer", company="Globex",
+            required_skills=["Figma"], description="Design résumé builders and onboarding flows.",
+        )
+
+    def search_ids(self, query, **kwargs):
+        return [hit["id"] for hit in search_jobs(query, **kwargs)]
+
+    def assert_search_behaviour(self):
+        # A title match outranks a description match.
+        self.assertEqual(self.search_ids("python"), [self.python.id, self.cpp.id])
+        self.assertEqual(self.search_ids("python django"), [self.python.id])
+        self.assertEqual(self.search_ids("pyth*"), [self.python.id, self.cpp.id])
+        self.assertEqual(self.search_ids("pyth"), [])
+        self.assertEqual(self.search_ids("pyth", prefix=True), [self.python.id, self.cpp.id])
+        self.assertEqual(self.search_ids("resume"), [self.designer.id])
+        self.assertEqual(self.search_ids("python", limit=1, offset=1), [self.cpp.id])
+        self.assertEqual(self.search_ids("python", jobs=JobPosting.objects.filter(company="Initech")), [self.cpp.id])
+
+        hit = search_jobs("django")[0]
+        self.assertIn("**Django**", hit["snippet"])
+        self.assertEqual(hit["required_skills"], ["Python", "Django"])
+        self.assertGreater(hit["score"], 0)
+
+        # Punctuation and FTS5 operators are plain words, never query syntax.
+        self.assertEqual(self.search_ids("c++"), [self.cpp.id])
+        self.assertEqual(self.search_ids('"python" OR figma'), [])
+        self.assertEqual(self.search_ids("NEAR(python"), [])
+        self.assertEqual(self.search_ids("python NOT django"), [])
+        self.assertEqual(self.search_ids("title:python"), [])
+        self.assertEqual(self.search_ids("-python ^django"), [self.python.id])
+        self.assertEqual(self.search_ids("*** ::"), [])
+
+    def test_fts(self):
+        self.assertTrue(search.fts_available())
+        self.assert_search_behaviour()
+
+    def test_inverted_index_fallback(self):
+        with mock.patch("matcher.search.fts_available", return_value=False):
+            self.assert_search_behaviour()
+
+    def test_fts_tracks_writes(self):
+        self.cpp.title = "Rust Engineer"
+        self.cpp.save()
+        JobPosting.objects.filter(pk=self.designer.pk).update(title="Python Designer")
+        self.assertCountEqual(self.search_ids("python"), [self.python.id, self.designer.id, self.cpp.id])
+        self.assertEqual(self.search_ids("rust"), [self.cpp.id])
+        self.assertEqual(self.search_ids("c++"), [])
+        self.designer.delete()
+        self.assertEqual(self.search_ids("designer"), [])
+
+    @mock.patch("matcher.search.fts_available", return_value=False)
+    def test_fallback_index_follows_database_version(self, fts_available):
+        index = get_search_index()
+        self.assertIs(get_search_index(), index)
+        self.assertEqual(len(index), 3)
+
+        # A posting written by another process: the row and a version bump,
+        # but no signal in this one.
+        JobPosting.objects.bulk_create([JobPosting(title="Python Intern", company="Hooli", required_skills=[], description="")])
+        self.assertIs(get_search_index(), index)
+        DataVersion.objects.filter(name="jobs").update(version=F("version") + 1)
+        self.assertIsNot(get_search_index(), index)
+        self.assertEqual(len(self.search_ids("python")), 3)
+
+        self.python.delete()
+        self.assertEqual(len(get_search_index()), 3)
+        self.assertEqual(len(self.search_ids("python")), 2)
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query('C++ "Node.js" dev*'), [("c", False), ("node", False), ("js", False), ("dev", True)])
+        self.assertEqual(parse_query("Café", prefix=True), [("cafe", True)])
+
+    def test_view(self):
+        response = self.client.get("/api/job_search/", {"q": "python", "company": "Acme"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([hit["id"] for hit in response.json()], [self.python.id])
+        response = self.client.get("/api/job_search/", {"q": "pyth", "prefix": "true", "limit": 1})
+        self.assertEqual([hit["id"] for hit in response.json()], [self.python.id])
+
+        self.assertEqual(self.client.get("/api/job_search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/job_search/", {"q": "python", "limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/job_search/", {"q": "python", "offset": "x"}).status_code, 400)
+
+    def test_version_bumped_on_save(self):
+        version = get_version("jobs")
+        JobPosting.objects.create(title="QA", company="Acme", required_skills=[], description="")
+        self.assertGreater(get_version("jobs"), version)
+
+
+class SemanticIndexTests(MatcherTestCase):
+    def store(self, **options):
+        return embeddings.VectorStore(f"{settings.EMBEDDINGS['DIR']}/test", 4, **options)
+
+    def test_vector_store(self):
+        store = self.store()
+        store.add([1, 2, 3], np.eye(4, dtype=np.float32)[:3])
+        ids, similarities = store.search(np.array([1, 0.5, 0, 0], dtype=np.float32), k=2)
+        self.assertEqual((ids.tolist(), similarities.tolist()), ([1, 2], [1.0, 0.5]))
+
+        # The latest row of an id wins, and removed ids are left out.
+        store.add([1], np.array([[0, 0, 0, 1]], dtype=np.float32))
+        store.remove([2])
+        query = np.array([0, 1, 1, 0.5], dtype=np.float32)
+        self.assertEqual(store.search(query, k=5)[0].tolist(), [3, 1])
+        self.assertEqual((len(store), store.stored_rows()), (2, 5))
+
+        # Other processes see the same file.
+        self.assertEqual(self.store().search(query, k=5)[0].tolist(), [3, 1])
+
+        store.compact()
+        self.assertEqual((len(store), store.stored_rows()), (2, 2))
+        self.assertEqual(store.search(query, k=5)[0].tolist(), [3, 1])
+
+    def test_shortlisted_search(self):
+        vectors = np.random.default_rng(1).standard_normal((200, 4)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        store = self.store(exact_search_limit=0, shortlist_factor=5)
+        store.add(list(range(1, 201)), vectors)
+        for row in (0, 57, 199):
+            self.assertEqual(store.search(vectors[row], k=1)[0].tolist(), [row + 1])
+
+    def test_postings_are_indexed_on_save(self):
+        postgres = JobPosting.objects.create(title="PostgreSQL administrator", company="Acme", required_skills=["PostgreSQL"], description="Tune databases.")
+        frontend = JobPosting.objects.create(title="Frontend Developer", company="Acme", required_skills=["React"], description="Build web UIs.")
+        response = self.client.get("/api/job_listings/", {"q": "Postgres DBA", "k": 1})
+        self.assertEqual([job["id"] for job in response.json()], [postgres.id])
+
+        postgres.delete()
+        response = self.client.get("/api/job_listings/", {"q": "Postgres DBA"})
+        self.assertEqual([job["id"] for job in response.json()], [frontend.id])
+
+        out = io.StringIO()
+        call_command("build_embeddings", "--compact", stdout=out)
+        self.assertIn("jobs: 3 rows compacted to 1", out.getvalue())
+
+
+class RequestMetricsTests(MatcherTestCase):
+    def test_executor_threads_count_towards_the_request(self):
+        current = RequestMetrics()
+        token = metrics._current.set(current)
+        self.addCleanup(metrics._current.reset, token)
+
+        def work(number):
+            try:
+                with timed("work"), connection.cursor() as cursor:
+                    cursor.execute("SELECT %s", [number])
+                return metrics.current_request_metrics()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            seen = list(executor.map(in_context(work), range(8)))
+            self.assertEqual(list(executor.map(lambda _: metrics.current_request_metrics(), range(2))), [None, None])
+        self.assertEqual(seen, [current] * 8)
+        self.assertEqual(current.stages["work"][0], 8)
+        self.assertEqual(current.db_queries, 8)
+
+    def test_query_wrapper_installed_once(self):
+        with connection.cursor():
+            pass
+        instrument_queries(sender=connection.__class__, connection=connection)
+        self.assertEqual(connection.execute_wrappers.count(metrics.record_query), 1)
+
+
+class UsageLedgerTests(MatcherTestCase):
+    @override_settings(LLM_BUDGET={"LEDGER": True})
+    def test_calls_from_executor_threads_keep_their_endpoint(self):
+        current = RequestMetrics()
+        current.view = "match_batch"
+        token = metrics._current.set(current)
+        self.addCleanup(metrics._current.reset, token)
+        ledger = mock.Mock()
+
+        def call(number):
+            usage.record_usage(usage.reserve({"messages": []}), "match", "gpt-4o-mini", number, 1)
+
+        with mock.patch("matcher.usage.get_ledger", return_value=ledger), ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(in_context(call), range(3)))
+            list(executor.map(call, range(3, 5)))
+        endpoints = {record.prompt_tokens: record.endpoint for (record,), _ in ledger.record.call_args_list}
+        self.assertEqual(endpoints, {0: "match_batch", 1: "match_batch", 2: "match_batch", 3: "", 4: ""})
+
+
+class JobImportTests(MatcherTestCase):
+    def posting(self, title, **fields):
+        return {"title": title, "company": "Acme", "required_skills": ["Python"], "description": f"{title} role.", **fields}
+
+    def test_duplicates_and_errors(self):
+        JobPosting.objects.create(**self.posting("Existing"))
+        rows = [
+            (1, self.posting("New")),
+            (2, self.posting("  existing ", company="ACME")),
+            (3, self.posting("new")),
+            (4, ValueError("Invalid JSON: oops")),
+            (5, {"title": "No company"}),
+            (6, self.posting("Other")),
+        ]
+        errors = []
+        report = JobImporter(batch_size=4, on_error=lambda number, error: errors.append(number)).run(rows)
+        self.assertEqual(report["rows"], 6)
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(report["duplicates"], 2)
+        self.assertEqual(report["invalid"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [4, 5])
+        self.assertEqual(errors, [4, 5])
+        self.assertEqual(sorted(JobPosting.objects.values_list("title", flat=True)), ["Existing", "New", "Other"])
+
+        created = JobPosting.objects.get(title="New")
+        self.assertEqual(list(created.skill_set.values_list("name", flat=True)), ["python"])
+        self.assertEqual(len(embeddings.get_semantic_index("jobs").store), 3)
+
+    def test_concurrent_import_cannot_store_a_posting_twice(self):
+        bulk_create = JobPosting.objects.bulk_create
+
+        def racing_bulk_create(postings, **kwargs):
+            # Another import stores the same posting after this one checked.
+            JobPosting.objects.create(**self.posting("Racing"))
+            return bulk_create(postings, **kwargs)
+
+        with mock.patch.object(JobPosting.objects, "bulk_create", side_effect=racing_bulk_create):
+            JobImporter().run([(1, self.posting("Racing")), (2, self.posting("Calm"))])
+        self.assertEqual(JobPosting.objects.filter(title="Racing").count(), 1)
+        self.assertEqual(JobPosting.objects.filter(title="Calm").count(), 1)
+
+    def test_repeat_left_without_a_hash_can_be_saved(self):
+        first = JobPosting.objects.create(**self.posting("Tester"))
+        # As the 0014 migration leaves a posting stored twice before it.
+        repeat = JobPosting.objects.create(**self.posting("Tester 2"))
+        JobPosting.objects.filter(pk=repeat.pk).update(title="TESTER", description=first.description, content_hash="")
+        repeat.refresh_from_db()
+        repeat.required_skills = ["Python", "Go"]
+        repeat.save()
+        repeat.refresh_from_db()
+        self.assertEqual(repeat.content_hash, "")
+
+        first.delete()
+        repeat.save()
+        repeat.refresh_from_db()
+        self.assertEqual(repeat.content_hash, first.content_hash)
+
+    def test_add_job_rejects_a_stored_posting(self):
+        first = self.client.post("/api/add_job/", self.posting("Tester"), content_type="application/json")
+        self.assertEqual(first.status_code, 201)
+        again = self.client.post("/api/add_job/", self.posting("TESTER"), content_type="application/json")
+        self.assertEqual(again.status_code, 409)
+        self.assertEqual(again.json()["id"], first.json()["id"])
+
+
+CANDIDATE = {"name": "Ada Lovelace", "skills": ["Python", "Django"], "education": ["BSc"], "work_experience": ["Backend"]}
+# Local scores: 100 for STRONG_JOB, 50 (borderline) for BORDERLINE_JOB.
+STRONG_JOB = {"title": "Django Developer", "company": "Acme", "required_skills": ["Python", "Django"], "description": "APIs."}
+BORDERLINE_JOB = {"title": "Platform Engineer", "company": "Acme", "required_skills": ["Python", "Django", "Kubernetes", "Go"], "description": "Infra."}
+# The stub LLM's canned match score.
+LLM_SCORE = 72
+
+
+class LLMGatewayTests(MatcherTestCase):
+    def gateway(self, **options):
+        return llm.LLMGateway(dict(llm.gateway_settings(), BACKOFF_MAX=0.01, **options))
+
+    def failing_stub(self, *draws):
+        """Make the stub answer 500 for every draw below 0.5."""
+        patch_rate = mock.patch.object(STUB.RequestHandlerClass, "error_rate", 0.5)
+        patch_random = mock.patch("benchmarks.stub_llm.random", random=mock.Mock(side_effect=draws), choice=mock.Mock(return_value=500))
+        return patch_rate, patch_random
+
+    def test_retries_server_errors(self):
+        patch_rate, patch_random = self.failing_stub(0.0, 0.0, 0.9)
+        with patch_rate, patch_random as stub_random:
+            response = self.gateway(MAX_RETRIES=2).chat_completion(model="stub", messages=[{"role": "user", "content": "Hi"}])
+        self.assertEqual(stub_random.random.call_count, 3)
+        self.assertTrue(response.choices[0].message.content)
+
+        patch_rate, patch_random = self.failing_stub(0.0, 0.0, 0.9)
+        with patch_rate, patch_random as stub_random, self.assertRaises(openai.InternalServerError):
+            self.gateway(MAX_RETRIES=1).chat_completion(model="stub", messages=[{"role": "user", "content": "Hi"}])
+        self.assertEqual(stub_random.random.call_count, 2)
+
+    def test_shared_gateway(self):
+        self.assertIs(llm.get_gateway(), llm.get_gateway())
+        with override_settings(LLM_GATEWAY=dict(settings.LLM_GATEWAY, RATE_LIMIT=5, MAX_CONCURRENCY=3)):
+            gateway = self.gateway()
+            self.assertIsInstance(gateway.bucket, llm.TokenBucket)
+            self.assertIs(self.gateway().bucket, gateway.bucket)
+            self.assertEqual(gateway.semaphore._value, 3)
+
+    def test_token_bucket(self):
+        clock = [100.0]
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        sleeps = []
+        with mock.patch("matcher.llm.time", monotonic=lambda: clock[0], sleep=sleep):
+            bucket = llm.TokenBucket(rate=4, capacity=2)
+            self.assertEqual([bucket.reserve(), bucket.reserve(), bucket.reserve()], [0, 0, 0.25])
+            clock[0] += 0.125
+            self.assertEqual(bucket.reserve(), 0.125)
+
+            # Bursts never exceed the capacity, however long the bucket was idle.
+            clock[0] += 60
+            self.assertEqual([bucket.reserve(), bucket.reserve(), bucket.reserve()], [0, 0, 0.25])
+            bucket.acquire()
+        self.assertEqual(sleeps, [0.25])
+
+
+class LLMCacheTests(MatcherTestCase):
+    def test_hit_and_miss(self):
+        requests = self.llm_requests()
+        first = parse_job_posting("Backend engineer at Acme, Python required.")
+        self.assertEqual(json.loads(first)["title"], "Backend Engineer")
+        self.assertEqual(parse_job_posting("Backend engineer at Acme,\n  Python required."), first)
+        parse_job_posting("Frontend engineer at Acme.")
+        self.assertEqual(self.llm_requests() - requests, 2)
+        self.assertEqual(result_cache.get_result_cache().stats()["parse_job_posting"], {"hits": 1, "misses": 2})
+
+    @override_settings(LLM_CACHE={"TTL": 60, "PERSISTENT_BACKEND": None})
+    def test_entries_expire(self):
+        requests = self.llm_requests()
+        parse_job_posting("Data engineer.")
+        now = time.time()
+        with mock.patch("matcher.cache.time.time", return_value=now + 59):
+            parse_job_posting("Data engineer.")
+        self.assertEqual(self.llm_requests() - requests, 1)
+        with mock.patch("matcher.cache.time.time", return_value=now + 61):
+            parse_job_posting("Data engineer.")
+        self.assertEqual(self.llm_requests() - requests, 2)
+
+    def test_persistent_tier(self):
+        path = f"{settings.MEDIA_ROOT}/llm_cache.sqlite3"
+        with override_settings(LLM_CACHE={"PERSISTENT_BACKEND": "sqlite", "PATH": path}):
+            requests = self.llm_requests()
+            parse_job_posting("QA engineer.")
+            # A new process starts with an empty in-memory tier.
+            result_cache._result_cache = None
+            parse_job_posting("QA engineer.")
+            self.assertEqual(self.llm_requests() - requests, 1)
+
+    @override_settings(LLM_CACHE={"ENABLED": False})
+    def test_disabled(self):
+        requests = self.llm_requests()
+        parse_job_posting("SRE.")
+        parse_job_posting("SRE.")
+        self.assertEqual(self.llm_requests() - requests, 2)
+
+
+class MatchRoutingTests(MatcherTestCase):
+    def match(self, job, mode=None):
+        requests = self.llm_requests()
+        result = json.loads(match_candidate_to_job(CANDIDATE, job, mode=mode))
+        return result["match_score"], self.llm_requests() - requests
+
+    def test_local_never_calls_the_llm(self):
+        self.assertEqual(self.match(STRONG_JOB, "local"), (100, 0))
+        self.assertEqual(self.match(BORDERLINE_JOB, "local"), (50, 0))
+
+    def test_hybrid_calls_the_llm_for_borderline_scores_only(self):
+        self.assertEqual(self.match(STRONG_JOB, "hybrid"), (100, 0))
+        self.assertEqual(self.match(BORDERLINE_JOB, "hybrid"), (LLM_SCORE, 1))
+        self.assertEqual(self.match(BORDERLINE_JOB, "hybrid"), (LLM_SCORE, 0))
+
+    @override_settings(MATCH_MODE="local")
+    def test_default_mode_from_settings(self):
+        self.assertEqual(self.match(BORDERLINE_JOB), (50, 0))
+
+    def test_llm_always_calls_the_llm(self):
+        self.assertEqual(self.match(STRONG_JOB, "llm"), (LLM_SCORE, 1))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            match_candidate_to_job(CANDIDATE, STRONG_JOB, mode="fast")
+
+
+class MatchBatchTests(MatcherTestCase):
+    jobs = [dict(BORDERLINE_JOB, title=f"Platform Engineer {n}") for n in range(3)]
+
+    def match(self, garble):
+        completion = stub_llm.completion
+
+        def garbled(body, replay=None):
+            response = completion(body, replay)
+            call = response["choices"][0]["message"].get("function_call")
+            if call and call["name"] == "match_candidate_to_jobs":
+                call["arguments"] = garble(json.loads(call["arguments"])["matches"])
+            return response
+
+        requests = self.llm_requests()
+        with mock.patch("benchmarks.stub_llm.completion", garbled), self.assertLogs("matcher.utils", "INFO") as logs:
+            results = match_candidate_to_jobs(CANDIDATE, self.jobs, mode="llm")
+        return [result["match_score"] for result in results], self.llm_requests() - requests, logs.output
+
+    def test_one_call_for_a_well_formed_batch(self):
+        requests = self.llm_requests()
+        results = match_candidate_to_jobs(CANDIDATE, self.jobs, mode="llm")
+        self.assertEqual([result["match_score"] for result in results], [LLM_SCORE] * 3)
+        self.assertEqual(self.llm_requests() - requests, 1)
+
+    def test_garbled_and_missing_items_are_matched_singly(self):
+        def garble(matches):
+            matches[0]["match_score"] = 150
+            del matches[2]
+            matches.append(dict(matches[1], job_index=7))
+            return json.dumps({"matches": matches})
+
+        scores, calls, logs = self.match(garble)
+        self.assertEqual(scores, [LLM_SCORE] * 3)
+        self.assertEqual(calls, 3)
+        self.assertIn("Falling back to single matches for 2 of 3 jobs", logs[-1])
+
+    def test_unparsable_answer_falls_back_for_every_job(self):
+        scores, calls, logs = self.match(lambda matches: "not json")
+        self.assertEqual(scores, [LLM_SCORE] * 3)
+        self.assertEqual(calls, 4)
+        self.assertIn("Falling back to single matches for 3 of 3 jobs", logs[-1])
+
+    def test_failed_batch_call_falls_back_with_a_warning(self):
+        requests = self.llm_requests()
+        with mock.patch("matcher.utils.llm_match_batch", side_effect=RuntimeError("boom")), \
+                self.assertLogs("matcher.utils", "WARNING") as logs:
+            results = match_candidate_to_jobs(CANDIDATE, self.jobs, mode="llm")
+        self.assertEqual([result["match_score"] for result in results], [LLM_SCORE] * 3)
+        self.assertEqual(self.llm_requests() - requests, 3)
+        self.assertIn("Batched match failed", logs.output[0])
+
+
+class DatabaseTuningTests(MatcherTestCase):
+    def connect(self):
+        # A new connection to a database file: the test database lives in
+        # memory, which has no WAL, and inside a transaction that pins
+        # ``synchronous``.
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        new_connection = type(connections["default"])(dict(connection.settings_dict, NAME=f"{directory}/tuned.sqlite3"))
+        self.addCleanup(new_connection.close)
+        new_connection.ensure_connection()
+        return new_connection
+
+    def pragmas(self, tuned, *names):
+        with tuned.cursor() as cursor:
+            return [cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names]
+
+    def test_new_connections_are_tuned(self):
+        self.assertEqual(
+            self.pragmas(self.connect(), "journal_mode", "synchronous", "cache_size", "temp_store", "mmap_size"),
+            ["wal", 1, -20000, 2, 128 * 1024 * 1024],
+        )
+
+    def test_pragmas_come_from_settings(self):
+        with override_settings(DATABASE_TUNING={"SQLITE_PRAGMAS": {"cache_size": -1234, "synchronous": "full"}}):
+            tuned = self.connect()
+        self.assertEqual(self.pragmas(tuned, "journal_mode", "synchronous", "cache_size"), ["delete", 2, -1234])
+
+    def test_other_databases_are_left_alone(self):
+        other = mock.Mock(vendor="postgresql")
+        database.tune_sqlite(other)
+        other.cursor.assert_not_called()
+
+
+class SkillFilterTests(MatcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.django = JobPosting.objects.create(title="Django Developer", company="Acme", required_skills=["Python", "Django"], description="")
+        self.go = JobPosting.objects.create(title="Go Developer", company="Acme", required_skills=["python3", "golang"], description="")
+        self.rust = JobPosting.objects.create(title="Rust Developer", company="Acme", required_skills=["Rust"], description="")
+
+    def ids(self, queryset):
+        return set(queryset.values_list("id", flat=True))
+
+    def test_any_and_all_skills(self):
+        jobs = JobPosting.objects
+        self.assertEqual(self.ids(jobs.with_any_skills(["PYTHON"])), {self.django.id, self.go.id})
+        self.assertEqual(self.ids(jobs.with_any_skills(["django", "rust"])), {self.django.id, self.rust.id})
+        self.assertEqual(self.ids(jobs.with_all_skills(["py", "go"])), {self.go.id})
+        self.assertEqual(self.ids(jobs.with_all_skills(["Python", "Django", "Go"])), set())
+        self.assertEqual(self.ids(jobs.with_any_skills([])), set())
+        self.assertEqual(self.ids(jobs.with_all_skills([" "])), {self.django.id, self.go.id, self.rust.id})
+
+    def test_candidates_are_filtered_too(self):
+        ada = CandidateProfile.objects.create(**CANDIDATE, resume_file="ada.pdf")
+        CandidateProfile.objects.create(name="Grace Hopper", skills=["COBOL"], education=[], work_experience=[], resume_file="grace.pdf")
+        self.assertEqual(self.ids(CandidateProfile.objects.with_all_skills(["django", "python"])), {ada.id})
+        self.assertEqual(Skill.objects.filter(name="python").count(), 1)
+        self.assertEqual(CandidateSkill.objects.filter(candidate=ada).count(), 2)
+
+    def test_links_follow_edits_and_bulk_inserts(self):
+        self.django.required_skills = ["Python", "Flask"]
+        self.django.save()
+        self.assertEqual(self.ids(JobPosting.objects.with_any_skills(["Django"])), set())
+        self.assertEqual(self.ids(JobPosting.objects.with_all_skills(["python", "flask"])), {self.django.id})
+
+        jobs = JobPosting.objects.bulk_create([JobPosting(title="Flask Developer", company="Acme", required_skills=["Flask"], description="")])
+        self.assertEqual(self.ids(JobPosting.objects.with_any_skills(["flask"])), {self.django.id})
+        jobs_bulk_created(jobs)
+        self.assertEqual(self.ids(JobPosting.objects.with_any_skills(["flask"])), {self.django.id, jobs[0].id})
+
+    def test_migration_backfills_the_links(self):
+        links = set(JobSkill.objects.values_list("job_id", "skill__name"))
+        JobSkill.objects.all().delete()
+        importlib.import_module("matcher.migrations.0005_skill_tables").backfill_skills(apps, None)
+        self.assertEqual(set(JobSkill.objects.values_list("job_id", "skill__name")), links)
+        self.assertIn((self.go.id, "go"), links)
+
+
+class PromptTests(MatcherTestCase):
+    def test_compact_candidate_cleans_and_drops_fields(self):
+        candidate = {
+            "name": "  Ada\n Lovelace ",
+            "email": "ada@example.com",
+            "skills": ["Python", " python ", "Django", ""],
+            "education": [{"degree": "BSc", "school": "", "year": 1835}],
+            "work_experience": [],
+        }
+        self.assertEqual(prompts.compact_candidate(candidate), {
+            "name": "Ada Lovelace",
+            "skills": ["Python", "Django"],
+            "education": ["degree: BSc, year: 1835"],
+        })
+
+    @override_settings(PROMPTS={"MAX_LIST_ITEMS": 2, "EXPERIENCE_TOKENS": 40})
+    def test_lists_are_capped_and_experience_shares_the_budget(self):
+        candidate = {"skills": ["Python", "Django", "Go"], "work_experience": ["word " * 100, "other " * 100]}
+        compact = prompts.compact_candidate(candidate)
+        self.assertEqual(compact["skills"], ["Python", "Django"])
+        for item in compact["work_experience"]:
+            self.assertTrue(item.endswith(" …"))
+            self.assertLessEqual(prompts.estimate_tokens(item), 21)
+
+    @override_settings(PROMPTS={"DESCRIPTION_TOKENS": 10})
+    def test_compact_job_trims_the_description(self):
+        job = dict(STRONG_JOB, description="word " * 100, salary="lots")
+        compact = prompts.compact_job(job)
+        self.assertEqual(set(compact), {"title", "company", "required_skills", "description"})
+        self.assertTrue(compact["description"].endswith(" …"))
+        self.assertLessEqual(prompts.estimate_tokens(compact["description"]), 11)
+
+    def test_trim_text_prefers_a_sentence_end(self):
+        text = "Alpha beta gamma delta epsilon zeta eta theta iota kappa. Lambda mu nu xi."
+        self.assertEqual(prompts.trim_text(text, 100), text)
+        self.assertEqual(prompts.trim_text(text, 13), "Alpha beta gamma delta epsilon zeta eta theta iota kappa. …")
+
+    def test_prompt_is_compact_json(self):
+        prompt = prompts.match_prompt(CANDIDATE, STRONG_JOB)
+        self.assertIn('"skills":["Python","Django"]', prompt)
+        self.assertEqual(prompts.to_json({"city": "Zürich"}), '{"city":"Zürich"}')
+
+
+class MatchViewTests(MatcherTestCase):
+    url = "/api/match/"
+
+    def post(self, **data):
+        requests = self.llm_requests()
+        response = self.client.post(self.url, {"candidate": CANDIDATE, "job": BORDERLINE_JOB, **data}, content_type="application/json")
+        return response, self.llm_requests() - requests
+
+    def test_reused_and_force_rescore(self):
+        response, calls = self.post(mode="llm")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["match_score"], response.json()["reused"], calls), (LLM_SCORE, False, 1))
+
+        response, calls = self.post(mode="llm")
+        self.assertEqual((response.json()["reused"], calls), (True, 0))
+
+        response, calls = self.post(mode="llm", force_rescore=True)
+        self.assertEqual((response.json()["reused"], calls), (False, 1))
+        self.assertEqual(MatchResult.objects.count(), 1)
+
+        # Another mode is another input.
+        response, calls = self.post(mode="local")
+        self.assertEqual((response.json()["match_score"], response.json()["reused"], calls), (50, False, 0))
+        self.assertEqual(MatchResult.objects.count(), 2)
+
+    def test_changed_inputs_are_rescored(self):
+        self.post(mode="local")
+        job = dict(BORDERLINE_JOB, required_skills=["Python", "Django", "Go"])
+        response = self.client.post(self.url, {"candidate": CANDIDATE, "job": job, "mode": "local"}, content_type="application/json")
+        self.assertFalse(response.json()["reused"])
+
+    def test_job_stored_in_another_case_is_matched(self):
+        self.post(mode="local")
+        job = dict(BORDERLINE_JOB, title=BORDERLINE_JOB["title"].lower(), company=BORDERLINE_JOB["company"].upper())
+        response = self.client.post(self.url, {"candidate": CANDIDATE, "job": job, "mode": "local"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(JobPosting.objects.count(), 1)
+
+    def test_invalid_requests(self):
+        response, _ = self.post(mode="fast")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, {"candidate": {}, "job": BORDERLINE_JOB}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_view_shares_stored_results(self):
+        self.post(mode="llm")
+        requests = self.llm_requests()
+        response = self.client.post("/api/async/match/", {"candidate": CANDIDATE, "job": BORDERLINE_JOB, "mode": "llm"}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["reused"])
+        response = self.client.post(
+            "/api/async/match/", {"candidate": CANDIDATE, "job": BORDERLINE_JOB, "mode": "llm", "force_rescore": True},
+            content_type="application/json",
+        )
+        self.assertFalse(response.json()["reused"])
+        self.assertEqual(self.llm_requests() - requests, 1)
+
+
+class RankingTests(MatcherTestCase):
+    def create_jobs(self):
+        # Local scores for CANDIDATE: 100, 50, 33 and 0.
+        for title, company, skills in [
+            ("Django Developer", "Acme", ["Python", "Django"]),
+            ("Platform Engineer", "Acme", ["Python", "Django", "Kubernetes", "Go"]),
+            ("Data Engineer", "Globex", ["Python", "Spark", "Airflow"]),
+            ("Rust Developer", "Globex", ["Rust"]),
+        ]:
+            JobPosting.objects.create(title=title, company=company, required_skills=skills, description="")
+
+    def rank_jobs(self, **data):
+        response = self.client.post("/api/rank_jobs/", {"candidate": CANDIDATE, **data}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return [(result["job_title"], result["match_score"]) for result in response.json()]
+
+    def test_rank_jobs(self):
+        self.create_jobs()
+        self.assertEqual(
+            self.rank_jobs(top_k=3),
+            [("Django Developer", 100), ("Platform Engineer", 50), ("Data Engineer", 33)],
+        )
+        candidate = CandidateProfile.objects.create(**CANDIDATE)
+        response = self.client.post("/api/rank_jobs/", {"candidate_id": candidate.id, "top_k": 1}, content_type="application/json")
+        self.assertEqual(response.json()[0]["job_title"], "Django Developer")
+
+        # The index follows new postings.
+        JobPosting.objects.create(title="Python Developer", company="Initech", required_skills=["python", "django", "flask"], description="")
+        self.assertEqual(self.rank_jobs(top_k=2), [("Django Developer", 100), ("Python Developer", 67)])
+
+    def test_rank_jobs_filters(self):
+        self.create_jobs()
+        self.assertEqual(self.rank_jobs(company=" globex "), [("Data Engineer", 33), ("Rust Developer", 0)])
+        self.assertEqual(self.rank_jobs(must_have=["DJANGO"]), [("Django Developer", 100), ("Platform Engineer", 50)])
+        self.assertEqual(self.rank_jobs(company=["Globex"], must_have=["Python"]), [("Data Engineer", 33)])
+        self.assertEqual(self.rank_jobs(must_have=["Cobol"]), [])
+
+    def test_rank_jobs_invalid_requests(self):
+        response = self.client.post("/api/rank_jobs/", {"candidate_id": 999}, content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post("/api/rank_jobs/", {"candidate": CANDIDATE, "top_k": "many"}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def rank_candidates(self, job, **params):
+        response = self.client.get(f"/api/jobs/{job.id}/rank_candidates/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rank_candidates(self):
+        job = JobPosting.objects.create(**BORDERLINE_JOB)
+        # Local scores for BORDERLINE_JOB: 100, 50, 25 and 0.
+        for name, skills in [("Ann", ["Python", "Django", "Kubernetes", "Go"]), ("Ben", ["python", "django"]), ("Cy", ["Go"]), ("Di", [])]:
+            CandidateProfile.objects.create(name=name, skills=skills, education=[], work_experience=[])
+
+        body = self.rank_candidates(job)
+        self.assertEqual(body["count"], 4)
+        self.assertEqual(
+            [(result["candidate_name"], result["match_score"]) for result in body["results"]],
+            [("Ann", 100), ("Ben", 50), ("Cy", 25), ("Di", 0)],
+        )
+        self.assertEqual(body["results"][1]["missing_skills"], ["Kubernetes", "Go"])
+
+        body = self.rank_candidates(job, page=2, page_size=3)
+        self.assertEqual([result["candidate_name"] for result in body["results"]], ["Di"])
+
+        body = self.rank_candidates(job, rescore_top=2)
+        self.assertEqual(
+            [(result["candidate_name"], result["match_score"], result["rescored"]) for result in body["results"]],
+            [("Ann", LLM_SCORE, True), ("Ben", LLM_SCORE, True), ("Cy", 25, False), ("Di", 0, False)],
+        )
+
+    def test_rank_candidates_invalid_requests(self):
+        self.assertEqual(self.client.get("/api/jobs/999/rank_candidates/").status_code, 404)
+        job = JobPosting.objects.create(**BORDERLINE_JOB)
+        self.assertEqual(self.client.get(f"/api/jobs/{job.id}/rank_candidates/", {"page": "x"}).status_code, 400)
+
+    def test_failed_rescore_keeps_the_local_score(self):
+        job = JobPosting.objects.create(**BORDERLINE_JOB)
+        CandidateProfile.objects.create(**CANDIDATE)
+        failing = mock.patch("matcher.ranking.llm_match_candidate_to_job", side_effect=RuntimeError("boom"))
+        with failing, self.assertLogs("matcher.ranking", "WARNING"):
+            response = self.client.get(f"/api/jobs/{job.id}/rank_candidates/", {"rescore_top": 1})
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()["results"]
+        self.assertEqual((result["match_score"], result["rescored"]), (50, False))
+
+
+class CoverLetterStreamTests(MatcherTestCase):
+    body = {"candidate": CANDIDATE, "job": STRONG_JOB, "stream": True}
+
+    @staticmethod
+    def events(content):
+        """``[(event, data), ...]`` of a text/event-stream body."""
+        events = []
+        for block in content.decode().strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines())
+            events.append((fields.get("event", "message"), json.loads(fields["data"])))
+        return events
+
+    def stream(self, **headers):
+        response = self.client.post("/api/generate_cover_letter/", self.body, content_type="application/json", **headers)
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "text/event-stream"))
+        return self.events(b"".join(response.streaming_content))
+
+    def test_event_sequence(self):
+        requests = self.llm_requests()
+        events = self.stream()
+        self.assertGreater(len(events), 2)
+        self.assertEqual(events[-1], ("done", {}))
+        self.assertEqual({event for event, _ in events[:-1]}, {"message"})
+        letter = "".join(data["delta"] for _, data in events[:-1])
+        self.assertTrue(letter.startswith("Dear Hiring Manager"))
+
+        # The finished letter is cached for both kinds of request.
+        self.assertEqual(self.stream(), [("message", {"delta": letter.strip()}), ("done", {})])
+        response = self.client.post("/api/generate_cover_letter/", dict(self.body, stream=False), content_type="application/json")
+        self.assertEqual(response.json()["cover_letter"], letter.strip())
+        self.assertEqual(self.llm_requests(), requests)
+
+    def test_error_events(self):
+        def failing(candidate, job):
+            yield "Dear"
+            raise RuntimeError("connection lost")
+
+        with mock.patch("matcher.views.stream_cover_letter", failing), self.assertLogs("matcher.streaming", "ERROR"):
+            events = self.stream(HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(events, [("message", {"delta": "Dear"}), ("error", {"error": "connection lost"})])
+
+        response = self.client.post(
+            "/api/generate_cover_letter/", {"candidate": CANDIDATE}, content_type="application/json", HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.events(response.content), [("error", {"error": "Candidate and job data are required."})])
+
+    async def test_async_stream(self):
+        response = await self.async_client.post("/api/async/generate_cover_letter/", self.body, content_type="application/json")
+        events = self.events(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(events[-1], ("done", {}))
+        self.assertTrue(events[0][1]["delta"])
+
+
+class LLMBudgetTests(MatcherTestCase):
+    def fill_minute(self, limit):
+        minute_key, _ = usage.TokenBudget.keys(time.time())
+        cache.set(minute_key, limit, timeout=120)
+
+    @override_settings(LLM_BUDGET={"TOKENS_PER_MINUTE": 1000, "MAX_WAIT": 0, "LEDGER": False})
+    def test_exhausted_budget_falls_back_to_the_local_score(self):
+        self.fill_minute(1000)
+        requests = self.llm_requests()
+        with self.assertLogs("matcher.utils", "WARNING"):
+            self.assertEqual(json.loads(match_candidate_to_job(CANDIDATE, BORDERLINE_JOB, mode="hybrid"))["match_score"], 50)
+            self.assertEqual(json.loads(match_candidate_to_job(CANDIDATE, BORDERLINE_JOB, mode="llm"))["match_score"], 50)
+        self.assertEqual(self.llm_requests(), requests)
+
+    @override_settings(LLM_BUDGET={"TOKENS_PER_MINUTE": 1000, "MAX_WAIT": 0, "LEDGER": False})
+    def test_exhausted_budget_is_a_429_without_fallback(self):
+        self.fill_minute(1000)
+        response = self.client.post("/api/parse_job/", {"job_text": "Backend engineer."}, content_type="application/json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    @override_settings(LLM_BUDGET={"TOKENS_PER_MINUTE": 100000, "LEDGER": False})
+    def test_reservations_are_settled_to_the_real_count(self):
+        parse_job_posting("Backend engineer.")
+        budget = usage.get_budget()
+        used = budget.status()["used_this_minute"]
+        self.assertGreater(used, 0)
+        self.assertLess(used, usage.estimate_request_tokens({"messages": []}))
+
+    @override_settings(LLM_BUDGET={"TOKENS_PER_MINUTE": 10, "LEDGER": False})
+    def test_call_that_never_fits(self):
+        with self.assertRaises(usage.BudgetExceeded):
+            parse_job_posting("Backend engineer.")
+
+    def test_call_over_the_day_budget_reserves_nothing(self):
+        budget = usage.TokenBudget(per_minute=1000, per_day=100, max_wait=0)
+        with self.assertRaises(usage.BudgetExceeded):
+            budget.try_reserve(500)
+        self.assertEqual(budget.status()["used_this_minute"], 0)
+
+
+class JobListViewTests(MatcherTestCase):
+    url = "/api/job_listings/"
+
+    def setUp(self):
+        super().setUp()
+        self.jobs = [
+            JobPosting.objects.create(title=f"Job {index}", company="Acme" if index % 2 else "Globex", required_skills=["Python"], description="")
+            for index in range(5)
+        ]
+
+    def test_pagination(self):
+        ids, cursor, pages = [], None, 0
+        while True:
+            response = self.client.get(self.url, {"limit": 2, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            ids += [job["id"] for job in response.json()]
+            pages += 1
+            cursor = response.get("X-Next-Cursor")
+            if cursor is None:
+                self.assertNotIn("Link", response)
+                break
+            self.assertIn(f"cursor={cursor}", response["Link"])
+        self.assertEqual(ids, [job.id for job in self.jobs])
+        self.assertEqual(pages, 3)
+
+    def test_fields_and_filters(self):
+        response = self.client.get(self.url, {"fields": "title", "company": "acme"})
+        self.assertEqual(response.json(), [{"id": job.id, "title": job.title} for job in self.jobs if job.company == "Acme"])
+        self.assertEqual(self.client.get(self.url, {"fields": "salary"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": 0}).status_code, 400)
+
+    def test_etag(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(self.url, {"limit": 2})["ETag"], etag)
+
+        self.jobs[0].delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_follows_writes_by_other_processes(self):
+        etag = self.client.get(self.url)["ETag"]
+        DataVersion.objects.filter(name="jobs").update(version=F("version") + 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class MatchResultReportTests(MatcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ada = CandidateProfile.objects.create(name="Ada", skills=[], education=[], work_experience=[])
+        self.bob = CandidateProfile.objects.create(name="Bob", skills=[], education=[], work_experience=[])
+        self.job = JobPosting.objects.create(**STRONG_JOB)
+        now = timezone.now()
+        self.results = []
+        # The first two share a timestamp, so the cursor has to break the tie on id.
+        for index, (candidate, score, missing, age) in enumerate([
+            (self.ada, 95, [], 0),
+            (self.bob, 40, ["Go", "Kubernetes"], 0),
+            (self.ada, 55, ["go "], 2),
+            (self.bob, 100, [], 3),
+            (self.ada, 10, ["Kubernetes", "GO"], 4),
+        ]):
+            result = MatchResult.objects.create(
+                candidate=candidate, job=self.job, match_score=score, missing_skills=missing, summary="", input_hash=str(index)
+            )
+            MatchResult.objects.filter(pk=result.pk).update(created_at=now - timedelta(minutes=age))
+            self.results.append(result)
+
+    def newest_first(self, results):
+        rows = MatchResult.objects.filter(id__in=[result.id for result in results]).order_by("-created_at", "-id")
+        return list(rows.values_list("id", flat=True))
+
+    def test_cursor_pages(self):
+        ids, params = [], {"limit": 2}
+        while True:
+            response = self.client.get("/api/match-results/", params)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.json()]
+            if "X-Next-Cursor" not in response:
+                break
+            params = {"limit": 2, "cursor": response["X-Next-Cursor"]}
+        self.assertEqual(ids, self.newest_first(self.results))
+        self.assertEqual(self.client.get("/api/match-results/", {"cursor": "nope"}).status_code, 400)
+
+    def test_filters(self):
+        response = self.client.get("/api/match-results/", {"candidate": self.ada.id, "min_score": 50})
+        self.assertEqual([row["id"] for row in response.json()], self.newest_first([self.results[0], self.results[2]]))
+        row = response.json()[0]
+        self.assertEqual((row["candidate_name"], row["job_title"], row["company"]), ("Ada", "Django Developer", "Acme"))
+        self.assertEqual(self.client.get("/api/match-results/", {"max_score": "high"}).status_code, 400)
+
+    def test_export(self):
+        response = self.client.get("/api/match-results/export.ndjson", {"max_score": 55})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], self.newest_first([self.results[1], self.results[2], self.results[4]]))
+
+        response = self.client.get("/api/match-results/export.csv", {"candidate": self.bob.id})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,candidate_name,job_title,company,match_score,missing_skills,summary,created_at")
+        self.assertEqual(len(lines), 3)
+        self.assertIn("Go; Kubernetes", "\n".join(lines))
+        self.assertEqual(self.client.get("/api/match-results/export.xml").status_code, 404)
+
+    def test_stats(self):
+        stats = self.client.get("/api/match-results/stats/", {"bucket_size": 50}).json()
+        self.assertEqual((stats["count"], stats["average_score"], stats["min_score"], stats["max_score"]), (5, 60.0, 10, 100))
+        self.assertEqual(stats["histogram"], [
+            {"min_score": 0, "max_score": 49, "count": 2},
+            {"min_score": 50, "max_score": 100, "count": 3},
+        ])
+        self.assertEqual(stats["missing_skills"], [{"skill": "GO", "count": 3}, {"skill": "Kubernetes", "count": 2}])
+
+        stats = self.client.get("/api/match-results/stats/", {"candidate": self.bob.id, "top_skills": 1}).json()
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["missing_skills"], [{"skill": "Go", "count": 1}])
+        self.assertEqual(self.client.get("/api/match-results/stats/", {"bucket_size": 0}).status_code, 400)
+
+
+class PDFExtractionTests(MatcherTestCase):
+    pdf = make_pdf([[f"Page {number}"] for number in range(1, 6)])
+
+    def pages(self, source=None, **options):
+        return [page.strip() for page in iter_pdf_pages(source or self.pdf, **options)]
+
+    def test_engines_and_page_cap(self):
+        for engine in PDF_ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(self.pages(engine=engine, max_pages=3), ["Page 1", "Page 2", "Page 3"])
+        with override_settings(PDF_EXTRACTION={"ENGINE": "pdfplumber", "MAX_PAGES": 2}):
+            self.assertEqual(self.pages(), ["Page 1", "Page 2"])
+        with override_settings(PDF_EXTRACTION={"MAX_PAGES": None}):
+            self.assertEqual(len(self.pages(io.BytesIO(self.pdf))), 5)
+        with self.assertRaises(ValueError):
+            self.pages(engine="ocr")
+
+    def test_falls_back_to_pdfplumber(self):
+        with mock.patch("matcher.extraction.pypdfium2.PdfDocument", side_effect=pypdfium2.PdfiumError("unreadable")):
+            with self.assertLogs("matcher.extraction", "WARNING"):
+                self.assertEqual(self.pages(max_pages=2), ["Page 1", "Page 2"])
+            with self.assertRaises(pypdfium2.PdfiumError):
+                self.pages(engine="pdfium")
+
+        # Only pages without a text layer are read again.
+        pdf = make_pdf([["Page 1"], [], ["Page 3"]])
+        with mock.patch("matcher.extraction.pdfplumber.open", wraps=pdfplumber.open) as plumber:
+            self.assertEqual(self.pages(pdf), ["Page 1", "", "Page 3"])
+        plumber.assert_called_once()
+        with mock.patch("matcher.extraction.pdfplumber.open", wraps=pdfplumber.open) as plumber:
+            self.pages()
+        plumber.assert_not_called()
+
+
+class ResumeUploadTests(MatcherTestCase):
+    url = "/api/upload_resume/"
+
+    def upload(self, data, name="resume.pdf"):
+        response = self.client.post(self.url, {"resume": ContentFile(data, name=name)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_resume_source(self):
+        in_memory = SimpleUploadedFile("resume.pdf", b"%PDF")
+        in_memory.read()
+        self.assertIs(resume_source(in_memory), in_memory)
+        self.assertEqual(in_memory.tell(), 0)
+        spooled = TemporaryUploadedFile("resume.pdf", "application/pdf", 4, None)
+        self.addCleanup(spooled.close)
+        self.assertEqual(resume_source(spooled), spooled.temporary_file_path())
+
+    def test_uploads_are_parsed_where_they_are(self):
+        pdf = make_pdf([["Ada Lovelace", "Skills: Python, Django"]])
+        with mock.patch("matcher.utils.extract_text_from_pdf", wraps=extract_text_from_pdf) as extract:
+            self.assertEqual(self.upload(pdf)["name"], "Ada Lovelace")
+            with override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=10):
+                self.assertEqual(self.upload(pdf)["name"], "Ada Lovelace")
+        in_memory, spooled = [call.args[0] for call in extract.call_args_list]
+        self.assertIsInstance(in_memory, InMemoryUploadedFile)
+        self.assertIsInstance(spooled, str)
+
+        document = io.BytesIO()
+        docx = Document()
+        docx.add_paragraph("Grace Hopper")
+        docx.save(document)
+        self.assertEqual(self.upload(document.getvalue(), "resume.docx")["name"], "Ada Lovelace")
+        # Nothing is written to storage unless STORE_RESUME_UPLOADS is set.
+        self.assertFalse(default_storage.exists("resumes"))
+
+    @override_settings(STORE_RESUME_UPLOADS=True)
+    def test_stored_uploads(self):
+        pdf = make_pdf([["Ada Lovelace"]])
+        self.upload(pdf)
+        self.upload(pdf, "copy.pdf")
+        self.assertEqual(default_storage.listdir("resumes")[1], [f"{hashlib.sha256(pdf).hexdigest()}.pdf"])
+
+    def test_unsupported_file_type(self):
+        response = self.client.post(self.url, {"resume": ContentFile(b"text", name="resume.txt")})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResumeQueueTests(MatcherTestCase):
+    def queue(self, data=None, status=ResumeJob.PENDING, name="resume.pdf"):
+        data = data or make_pdf([["Ada Lovelace", "Skills: Python, Django"]])
+        path = default_storage.save(f"resume_jobs/{name}", ContentFile(data))
+        return ResumeJob.objects.create(file_hash=name, file_name=name, file_type="pdf", resume_file=path, status=status)
+
+    def test_claim(self):
+        job = self.queue()
+        self.assertTrue(claim(job.pk))
+        self.assertFalse(claim(job.pk))
+
+    def test_process(self):
+        job = self.queue()
+        process_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result["name"]), (ResumeJob.DONE, 1, "Ada Lovelace"))
+        # Jobs that are no longer pending are left alone.
+        process_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+
+    @mock.patch("matcher.resume_queue.parse_resume", side_effect=RuntimeError("model unavailable"))
+    def test_retry_until_max_attempts(self, parse_resume):
+        job = self.queue()
+        for attempt, expected in ((1, ResumeJob.PENDING), (2, ResumeJob.PENDING), (3, ResumeJob.FAILED)):
+            with self.assertLogs("matcher.resume_queue", "ERROR"):
+                process_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual((job.attempts, job.status, job.error), (attempt, expected, "model unavailable"))
+
+    def test_upload_queues_once_and_retries_failures(self):
+        data = make_pdf([["Grace Hopper"]])
+        upload = lambda: self.client.post("/api/resume_jobs/", {"resume": ContentFile(data, name="grace.pdf")})
+        first = upload()
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(upload().json()["job_id"], first.json()["job_id"])
+        ResumeJob.objects.filter(pk=first.json()["job_id"]).update(status=ResumeJob.FAILED, attempts=3)
+        self.assertEqual(upload().json()["status"], ResumeJob.PENDING)
+        self.assertEqual(ResumeJob.objects.count(), 1)
+
+    def test_recover(self):
+        stale = self.queue(status=ResumeJob.RUNNING, name="stale.pdf")
+        ResumeJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        running = self.queue(status=ResumeJob.RUNNING, name="running.pdf")
+        pending = self.queue(name="pending.pdf")
+        self.queue(status=ResumeJob.DONE, name="done.pdf")
+
+        pool = WorkerPool(1)
+        pool.executor.shutdown()
+        pool.executor = mock.Mock()
+        pool.recover()
+        pool.recover()
+        pool.executor.submit.assert_called_once_with(pool._recover)
+
+        pool._recover()
+        self.assertEqual([call.args for call in pool.executor.submit.call_args_list[1:]], [(process_job, stale.pk), (process_job, pending.pk)])
+        self.assertEqual(ResumeJob.objects.get(pk=running.pk).status, ResumeJob.RUNNING)
+
+        process_job(stale.pk)
+        self.assertEqual(ResumeJob.objects.get(pk=stale.pk).status, ResumeJob.DONE)
+
+
+class IngestResumesTests(MatcherTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        files = {
+            "ada.pdf": make_pdf([["Ada Lovelace", "Skills: Python"], ["Page two"]]),
+            "grace.pdf": make_pdf([["Grace Hopper", "Skills: COBOL"]]),
+            "broken.docx": b"not a docx",
+            "notes.txt": b"ignored",
+        }
+        for name, data in files.items():
+            with open(f"{self.directory}/{name}", "wb") as handle:
+                handle.write(data)
+
+    def ingest(self, source):
+        out, err = io.StringIO(), io.StringIO()
+        call_command("ingest_resumes", source, "--processes", "1", "--batch-size", "1", stdout=out, stderr=err)
+        return out.getvalue().splitlines()[-1], err.getvalue()
+
+    def test_ingest(self):
+        summary, errors = self.ingest(self.directory)
+        self.assertTrue(summary.startswith("Ingested 2, skipped 0 already ingested, failed 1 in"), summary)
+        self.assertIn("broken.docx:", errors)
+        self.assertEqual(CandidateProfile.objects.count(), 2)
+        self.assertEqual(
+            sorted(ResumeJob.objects.values_list("file_name", "status")),
+            [("ada.pdf", ResumeJob.DONE), ("broken.docx", ResumeJob.FAILED), ("grace.pdf", ResumeJob.DONE)],
+        )
+        self.assertEqual(len(embeddings.get_semantic_index("candidates").store), 2)
+
+        # Ingested files are skipped on the next run, failed ones tried again.
+        archive = f"{self.directory}/resumes.zip"
+        with zipfile.ZipFile(archive, "w") as handle:
+            for name in ("ada.pdf", "grace.pdf", "broken.docx"):
+                handle.write(f"{self.directory}/{name}", f"batch/{name}")
+        summary, errors = self.ingest(archive)
+        self.assertTrue(summary.startswith("Ingested 0, skipped 2 already ingested, failed 1 in"), summary)
+        self.assertEqual(ResumeJob.objects.count(), 3)
+
+
+class RescoreStaleTests(MatcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.candidate = CandidateProfile.objects.create(**CANDIDATE)
+        self.job = JobPosting.objects.create(**STRONG_JOB)
+        self.other = JobPosting.objects.create(**BORDERLINE_JOB)
+        self.client.post("/api/match_batch/", {"candidate": CANDIDATE, "job_ids": [self.job.id, self.other.id], "mode": "local"}, content_type="application/json")
+
+    def rescore(self, *args):
+        out = io.StringIO()
+        with override_settings(MATCH_MODE="local"):
+            call_command("rescore_stale", "--rate", "0", *args, stdout=out)
+        return out.getvalue().splitlines()
+
+    def test_rescores_only_stale_results(self):
+        self.assertEqual(MatchResult.objects.count(), 2)
+        self.assertEqual(self.rescore(), ["No stale match results"])
+
+        self.job.required_skills = ["Python", "Django", "Rust", "Go"]
+        self.job.save()
+        self.assertEqual(self.job.revision, 2)
+        self.assertEqual(self.rescore(), ["Re-scored 1 candidate/job pairs"])
+
+        result = MatchResult.objects.get(job=self.job)
+        self.assertEqual((result.match_score, result.job_revision), (50, 2))
+        self.assertEqual(MatchResult.objects.count(), 2)
+        self.assertEqual(self.rescore(), ["No stale match results"])
+
+    def test_rescores_in_the_stored_mode(self):
+        batch = {"candidate": CANDIDATE, "job_ids": [self.other.id], "mode": "llm"}
+        self.client.post("/api/match_batch/", batch, content_type="application/json")
+        self.other.description = "Infrastructure."
+        self.other.save()
+        self.assertEqual(self.rescore(), ["Re-scored 2 candidate/job pairs"])
+        results = MatchResult.objects.filter(job=self.other)
+        self.assertEqual(dict(results.values_list("mode", "match_score")), {"local": 50, "llm": LLM_SCORE})
+
+        requests = self.llm_requests()
+        response = self.client.post("/api/match_batch/", batch, content_type="application/json")
+        self.assertTrue(response.json()["results"][0]["reused"])
+        self.assertEqual(self.llm_requests(), requests)
+
+    def test_filters(self):
+        CandidateProfile.objects.filter(pk=self.candidate.pk).update(revision=F("revision") + 1)
+        self.assertEqual(self.rescore("--job", str(self.job.id)), ["Re-scored 1 candidate/job pairs"])
+        self.assertEqual(self.rescore("--candidate", str(self.candidate.id)), ["Re-scored 1 candidate/job pairs"])
+
+    def test_saves_without_scored_changes_keep_results_fresh(self):
+        self.candidate.save()
+        self.job.save()
+        self.assertEqual((self.candidate.revision, self.job.revision), (1, 1))
+        self.assertEqual(self.rescore(), ["No stale match results"])
+
+
+class ThreadedLLMUsageTests(MatcherTestCase):
+    """LLM calls made on executor threads are counted with their request."""
+
+    def setUp(self):
+        super().setUp()
+        self.ledger = mock.Mock()
+        patcher = mock.patch("matcher.usage.get_ledger", return_value=self.ledger)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.jobs = [JobPosting.objects.create(**dict(BORDERLINE_JOB, title=f"Platform Engineer {index}")) for index in range(3)]
+
+    def endpoints(self):
+        return {(record.endpoint, record.operation) for (record,), _ in self.ledger.record.call_args_list}
+
+    @override_settings(LLM_BUDGET={"LEDGER": True})
+    def test_match_batch(self):
+        response = self.client.post(
+            "/api/match_batch/", {"candidate": CANDIDATE, "job_ids": [job.id for job in self.jobs], "mode": "llm"},
+            content_type="application/json",
+        )
+        self.assertEqual([result["match_score"] for result in response.json()["results"]], [LLM_SCORE] * 3)
+        self.assertEqual(self.endpoints(), {("match_batch", "match_batch")})
+
+    @override_settings(LLM_BUDGET={"LEDGER": True})
+    def test_rank_candidates(self):
+        for index in range(3):
+            CandidateProfile.objects.create(**dict(CANDIDATE, name=f"Candidate {index}"))
+        response = self.client.get(f"/api/jobs/{self.jobs[0].id}/rank_candidates/", {"rescore_top": 2})
+        self.assertEqual([result["rescored"] for result in response.json()["results"]], [True, True, False])
+        self.assertEqual(self.endpoints(), {("rank_candidates", "match")})
+
+    @override_settings(LLM_BUDGET={"LEDGER": True})
+    def test_import(self):
+        response = self.client.post("/api/jobs/import/", '{"job_text": "Backend engineer at Analytical Engines."}\n', content_type="application/x-ndjson")
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(self.endpoints(), {("import_jobs", "parse_job_posting")})
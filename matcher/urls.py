@@ -1,13 +1,27 @@
 # matcher/urls.py
 from django.urls import path
-from .views import ResumeUploadView, MatchView, JobParsingView, CoverLetterView, JobListView, AddJobView, MatchResultListView
+from .async_views import AsyncJobParsingView, AsyncMatchView, AsyncCoverLetterView
+from .views import ResumeUploadView, ResumeJobView, ResumeJobStatusView, MatchView, MatchBatchView, JobParsingView, CoverLetterView, JobListView, JobSearchView, AddJobView, JobImportView, MatchResultListView, MatchResultExportView, MatchResultStatsView, RankJobsView, RankCandidatesView, UsageView
 
 urlpatterns = [
     path("upload_resume/", ResumeUploadView.as_view(), name="upload_resume"),
+    path("resume_jobs/", ResumeJobView.as_view(), name="resume_jobs"),
+    path("resume_jobs/<int:job_id>/", ResumeJobStatusView.as_view(), name="resume_job_status"),
     path("match/", MatchView.as_view(), name="match"),
+    path("match_batch/", MatchBatchView.as_view(), name="match_batch"),
     path("parse_job/", JobParsingView.as_view(), name="parse_job"),
     path("generate_cover_letter/", CoverLetterView.as_view(), name="generate_cover_letter"),
     path('job_listings/', JobListView.as_view(), name='job_listings'),
+    path("job_search/", JobSearchView.as_view(), name="job_search"),
     path('add_job/', AddJobView.as_view(), name='add_job'),
+    path("jobs/import/", JobImportView.as_view(), name="import_jobs"),
     path('match-results/', MatchResultListView.as_view(), name='match-results'),
+    path("match-results/export.<str:file_format>", MatchResultExportView.as_view(), name="match-results-export"),
+    path("match-results/stats/", MatchResultStatsView.as_view(), name="match-results-stats"),
+    path("async/match/", AsyncMatchView.as_view(), name="async_match"),
+    path("async/parse_job/", AsyncJobParsingView.as_view(), name="async_parse_job"),
+    path("async/generate_cover_letter/", AsyncCoverLetterView.as_view(), name="async_generate_cover_letter"),
+    path("rank_jobs/", RankJobsView.as_view(), name="rank_jobs"),
+    path("jobs/<int:job_id>/rank_candidates/", RankCandidatesView.as_view(), name="rank_candidates"),
+    path("usage/", UsageView.as_view(), name="usage"),
 ]
@@ -0,0 +1,323 @@
+import asyncio
+import atexit
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import Throttled
+
+from .metrics import current_request_metrics
+from .models import UsageRecord
+from .prompts import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# LLM usage ledger and token budgets.
+#
+# Every completion is written to the UsageRecord ledger with its tokens,
+# latency, model and the endpoint that asked for it. The endpoint comes from
+# the request metrics context (matcher/metrics.py), so calls made from thread
+# pools must be submitted with `in_context`. Rows are buffered and written in
+# batches by a background thread, so the ledger adds no database write to the
+# request.
+#
+# Budgets are token counters per minute and per UTC day in the Django cache
+# (shared between processes when the cache is). Before a call its estimated
+# tokens are reserved; once it finishes the reservation is corrected to the
+# real count. A call that does not fit waits for the next minute for up to
+# MAX_WAIT seconds and then raises BudgetExceeded, which callers turn into a
+# cheaper answer (a local match score, a short cover letter) or a 429.
+
+DEFAULTS = {
+    # None means unlimited.
+    "TOKENS_PER_MINUTE": None,
+    "TOKENS_PER_DAY": None,
+    # Seconds a call may wait for budget before it is degraded or refused.
+    "MAX_WAIT": 10,
+    # Completion tokens reserved for calls without max_tokens.
+    "OUTPUT_TOKENS": 500,
+    "LEDGER": True,
+    # Ledger rows are written every FLUSH_INTERVAL seconds or FLUSH_SIZE rows.
+    "FLUSH_INTERVAL": 2.0,
+    "FLUSH_SIZE": 200,
+}
+
+GROUPS = ("hour", "day", "endpoint", "operation", "model")
+
+
+def usage_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, "LLM_BUDGET", {}))
+    return options
+
+
+class BudgetExceeded(Throttled):
+    """The LLM token budget cannot cover a call; ``wait`` is the seconds until it might."""
+
+    default_detail = "LLM token budget exceeded."
+
+
+def estimate_prompt_tokens(request):
+    """Estimated prompt tokens of a chat completion request (its keyword arguments)."""
+    tokens = sum(estimate_tokens(message.get("content") or "") for message in request.get("messages", []))
+    if request.get("functions"):
+        tokens += estimate_tokens(json.dumps(request["functions"]))
+    return tokens
+
+
+def estimate_request_tokens(request, output_tokens=None):
+    output_tokens = output_tokens or usage_settings()["OUTPUT_TOKENS"]
+    return estimate_prompt_tokens(request) + (request.get("max_tokens") or output_tokens)
+
+
+class TokenBudget:
+    """Per-minute and per-day token budgets kept in the Django cache."""
+
+    def __init__(self, per_minute, per_day, max_wait):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_wait = max_wait
+
+    @staticmethod
+    def keys(now):
+        return f"matcher:llm_tokens:minute:{int(now // 60)}", f"matcher:llm_tokens:day:{int(now // 86400)}"
+
+    def windows(self, now=None):
+        """``(cache key, limit, seconds until reset)`` for each limited window."""
+        now = time.time() if now is None else now
+        minute_key, day_key = self.keys(now)
+        windows = []
+        if self.per_minute:
+            windows.append((minute_key, self.per_minute, 60 - now % 60))
+        if self.per_day:
+            windows.append((day_key, self.per_day, 86400 - now % 86400))
+        return windows
+
+    def try_reserve(self, tokens):
+        """Reserve ``tokens``; returns ``(keys, 0)``, or ``(None, seconds to wait)`` if a window is full."""
+        windows = self.windows()
+        for key, limit, reset_in in windows:
+            if tokens > limit:
+                raise BudgetExceeded(detail=f"A call needing ~{tokens} tokens never fits a budget of {limit}.")
+        keys = []
+        for key, limit, reset_in in windows:
+            cache.add(key, 0, timeout=int(reset_in) + 60)
+            if cache.incr(key, tokens) > limit:
+                for taken in keys + [key]:
+                    cache.decr(taken, tokens)
+                return None, reset_in
+            keys.append(key)
+        return keys, 0
+
+    def acquire(self, tokens):
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            keys, wait = self.try_reserve(tokens)
+            if keys is not None:
+                return keys
+            if time.monotonic() + wait > deadline:
+                raise BudgetExceeded(wait=wait)
+            time.sleep(wait)
+
+    async def aacquire(self, tokens):
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            keys, wait = self.try_reserve(tokens)
+            if keys is not None:
+                return keys
+            if time.monotonic() + wait > deadline:
+                raise BudgetExceeded(wait=wait)
+            await asyncio.sleep(wait)
+
+    def settle(self, keys, reserved, used):
+        """Correct a reservation of ``reserved`` tokens to the ``used`` count."""
+        delta = used - reserved
+        for key in keys:
+            try:
+                if delta >= 0:
+                    cache.incr(key, delta)
+                else:
+                    cache.decr(key, -delta)
+            except ValueError:
+                pass  # the window already expired
+
+    def status(self):
+        minute_key, day_key = self.keys(time.time())
+        usage = cache.get_many([minute_key, day_key])
+        return {
+            "tokens_per_minute": self.per_minute,
+            "used_this_minute": usage.get(minute_key, 0),
+            "tokens_per_day": self.per_day,
+            "used_today": usage.get(day_key, 0),
+        }
+
+
+def get_budget():
+    """The configured TokenBudget, or None when no budget is set."""
+    options = usage_settings()
+    if not options["TOKENS_PER_MINUTE"] and not options["TOKENS_PER_DAY"]:
+        return None
+    return TokenBudget(options["TOKENS_PER_MINUTE"], options["TOKENS_PER_DAY"], options["MAX_WAIT"])
+
+
+class Reservation:
+    """Tokens reserved for one completion, settled by :func:`record_usage`."""
+
+    def __init__(self, budget, request):
+        self.budget = budget
+        self.tokens = estimate_request_tokens(request) if budget is not None else 0
+        self.keys = []
+        self.started = time.perf_counter()
+
+
+def reserve(request):
+    """Reserve budget for a chat completion request, waiting up to MAX_WAIT; raises BudgetExceeded."""
+    reservation = Reservation(get_budget(), request)
+    if reservation.budget is not None:
+        reservation.keys = reservation.budget.acquire(reservation.tokens)
+    reservation.started = time.perf_counter()
+    return reservation
+
+
+async def areserve(request):
+    """Async version of :func:`reserve`."""
+    reservation = Reservation(get_budget(), request)
+    if reservation.budget is not None:
+        reservation.keys = await reservation.budget.aacquire(reservation.tokens)
+    reservation.started = time.perf_counter()
+    return reservation
+
+
+def release(reservation):
+    """Give back the budget of a call that failed."""
+    if reservation.budget is not None:
+        reservation.budget.settle(reservation.keys, reservation.tokens, 0)
+
+
+def record_usage(reservation, operation, model, prompt_tokens, completion_tokens, estimated=False):
+    """Settle the budget to the real token count and add the call to the ledger."""
+    if reservation.budget is not None:
+        reservation.budget.settle(reservation.keys, reservation.tokens, prompt_tokens + completion_tokens)
+    if not usage_settings()["LEDGER"]:
+        return
+    current = current_request_metrics()
+    get_ledger().record(UsageRecord(
+        endpoint=(current.view or "") if current is not None else "",
+        operation=operation,
+        model=model or "",
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_ms=round((time.perf_counter() - reservation.started) * 1000, 2),
+        estimated=estimated,
+    ))
+
+
+class UsageLedger:
+    """Buffers UsageRecords and writes them in batches from a background thread."""
+
+    def __init__(self, flush_interval, flush_size):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def record(self, record):
+        with self._lock:
+            self._pending.append(record)
+            full = len(self._pending) >= self.flush_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+        if records:
+            try:
+                UsageRecord.objects.bulk_create(records)
+            except Exception:
+                logger.exception("Writing %d usage records failed", len(records))
+        return len(records)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                options = usage_settings()
+                _ledger = UsageLedger(options["FLUSH_INTERVAL"], options["FLUSH_SIZE"])
+    return _ledger
+
+
+def _parse_time(params, name, default):
+    value = params.get(name)
+    if not value:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO 8601 date and time.")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def filter_usage(records, params):
+    """Apply the ``since``/``until`` query filters (default: the last 7 days) to a UsageRecord queryset."""
+    until = _parse_time(params, "until", None)
+    since = _parse_time(params, "since", (until or timezone.now()) - timedelta(days=7))
+    records = records.filter(created_at__gte=since)
+    if until is not None:
+        records = records.filter(created_at__lt=until)
+    return records
+
+
+def usage_rollup(records, group_by="day"):
+    """Token, call and latency totals for ``records``, overall and per ``group_by`` value."""
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}.")
+    totals = dict(
+        calls=Count("id"),
+        prompt_tokens=Sum("prompt_tokens", default=0),
+        completion_tokens=Sum("completion_tokens", default=0),
+        average_latency_ms=Avg("latency_ms"),
+    )
+    truncate = {"hour": TruncHour, "day": TruncDay}.get(group_by)
+    groups = records.order_by()
+    if truncate is not None:
+        groups = groups.annotate(group=truncate("created_at", tzinfo=dt_timezone.utc))
+    else:
+        groups = groups.annotate(group=F(group_by))
+    rows = list(groups.values("group").annotate(**totals).order_by("group"))
+    summary = records.aggregate(**totals)
+    for row in [summary, *rows]:
+        row["total_tokens"] = row["prompt_tokens"] + row["completion_tokens"]
+        if row["average_latency_ms"] is not None:
+            row["average_latency_ms"] = round(row["average_latency_ms"], 1)
+    for row in rows:
+        if isinstance(row["group"], datetime):
+            row["group"] = row["group"].isoformat()
+    return {"totals": summary, "groups": rows}
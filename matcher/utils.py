@@ -1,155 +1,708 @@
-import pdfplumber
-from openai import OpenAI
-import os
+import asyncio
+import io
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from docx import Document
-from dotenv import load_dotenv
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .cache import get_result_cache, make_key
+from .extraction import iter_pdf_pages
+from .metrics import in_context, timed
+from .llm import achat_completion, astream_chat_completion, chat_completion, stream_chat_completion
+from .prompts import (
+    batch_match_prompt, compact_candidate, compact_job, cover_letter_prompt, estimate_tokens, match_prompt,
+    summary_prompt, to_json,
+)
+from .scoring import MATCH_MODES, local_match, is_borderline, match_input_hash
+from .usage import BudgetExceeded
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+logger = logging.getLogger(__name__)
 
-# Extract Text from PDF
+MODEL = "gpt-4o-mini"
 
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+PARSE_RESUME_FUNCTION = {
+    "name": "parse_resume",
+    "description": "Parse resume and return structured JSON.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "skills": {"type": "array", "items": {"type": "string"}},
+            "education": {"type": "array", "items": {"type": "string"}},
+            "work_experience": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["name"]
+    }
+}
+
+PARSE_JOB_POSTING_FUNCTION = {
+    "name": "parse_job_posting",
+    "description": "Extract job details into structured format.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "description": "Job title"},
+            "company": {"type": "string", "description": "Company name"},
+            "required_skills": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of required skills for the job."
+            },
+            "description": {"type": "string", "description": "Full job description text"}
+        },
+        "required": ["title", "required_skills", "description"]
+    }
+}
+
+MATCH_CANDIDATE_FUNCTION = {
+    "name": "match_candidate_to_job",
+    "description": "Match a candidate to a job and return relevant details.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "match_score": {"type": "integer", "description": "Percentage score of how well the candidate fits the job."},
+            "missing_skills": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "List of skills missing from the candidate's profile."
+            },
+            "summary": {"type": "string", "description": "Short summary of the match assessment."}
+        },
+        "required": ["match_score", "missing_skills", "summary"]
+    }
+}
+
+MATCH_CANDIDATE_BATCH_FUNCTION = {
+    "name": "match_candidate_to_jobs",
+    "description": "Match a candidate to each of several numbered jobs.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "matches": {
+                "type": "array",
+                "description": "One entry per job, in any order.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "job_index": {"type": "integer", "description": "The number of the job in brackets."},
+                        **MATCH_CANDIDATE_FUNCTION["parameters"]["properties"],
+                    },
+                    "required": ["job_index", "match_score", "missing_skills", "summary"]
+                }
+            }
+        },
+        "required": ["matches"]
+    }
+}
+
+# Batched matching (see match_candidate_to_jobs)
+MATCH_BATCH_DEFAULTS = {
+    # Estimated prompt plus completion tokens per request.
+    "TOKEN_BUDGET": 8000,
+    "MAX_JOBS": 20,
+    # Completion tokens reserved for each job's result.
+    "OUTPUT_TOKENS_PER_JOB": 90,
+    "WORKERS": 4,
+}
+
+
+@timed()
+def extract_text_from_pdf(pdf_path, engine=None, max_pages=None):
+    return "\n".join(iter_pdf_pages(pdf_path, engine=engine, max_pages=max_pages))
 
 # Extract Text from Docs
 
+@timed()
 def extract_text_from_docx(docx_path):
+    if isinstance(docx_path, (bytes, bytearray)):
+        docx_path = io.BytesIO(docx_path)
     doc = Document(docx_path)
     return "\n".join([para.text for para in doc.paragraphs])
 
-def parse_resume(file_path, file_type):
+def resume_source(uploaded_file):
+    """Read an upload where it already is: its temp file on disk, or its in-memory buffer."""
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+    uploaded_file.seek(0)
+    return uploaded_file
+
+@timed()
+def parse_resume(source, file_type):
+    """Parse a resume given as a path, bytes or a file-like object (e.g. an upload)."""
     if file_type == "pdf":
-        resume_text = extract_text_from_pdf(file_path)
+        resume_text = extract_text_from_pdf(source)
     elif file_type == "docx":
-        resume_text = extract_text_from_docx(file_path)
+        resume_text = extract_text_from_docx(source)
     else:
         return None
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    return parse_resume_text(resume_text)
+
+def function_arguments(response):
+    return response.choices[0].message.function_call.arguments
+
+def parse_resume_request(resume_text):
+    return dict(
+        model=MODEL,
         messages=[
             {"role": "system", "content": "Extract structured data from resumes."},
             {"role": "user", "content": resume_text},
         ],
-        functions=[
-            {
-                "name": "parse_resume",
-                "description": "Parse resume and return structured JSON.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "name": {"type": "string"},
-                        "skills": {"type": "array", "items": {"type": "string"}},
-                        "education": {"type": "array", "items": {"type": "string"}},
-                        "work_experience": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["name"]
-                }
-            }
-        ],
+        functions=[PARSE_RESUME_FUNCTION],
         function_call={"name": "parse_resume"}
     )
 
-    function_call = response.choices[0].message.function_call
-    if function_call:
-        parsed_data = function_call.arguments
-        return json.loads(parsed_data)
-    
-    return None
+@timed()
+def parse_resume_text(resume_text):
+    """Extract structured candidate data from plain resume text using LLM."""
 
-def parse_job_posting(job_text):
-    """Extract structured job details from a job posting using LLM."""
-    
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def compute():
+        response = chat_completion(operation="parse_resume", **parse_resume_request(resume_text))
+
+        function_call = response.choices[0].message.function_call
+        if function_call:
+            parsed_data = function_call.arguments
+            return json.loads(parsed_data)
 
+        return None
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    return get_result_cache().get_or_compute("parse_resume", resume_text, MODEL, PARSE_RESUME_FUNCTION, compute)
+
+def parse_job_posting_request(job_text):
+    return dict(
+        model=MODEL,
         messages=[
             {"role": "system", "content": "You are a job description parser."},
             {"role": "user", "content": job_text}
         ],
-        functions=[
-            {
-                "name": "parse_job_posting",
-                "description": "Extract job details into structured format.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string", "description": "Job title"},
-                        "company": {"type": "string", "description": "Company name"},
-                        "required_skills": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of required skills for the job."
-                        },
-                        "description": {"type": "string", "description": "Full job description text"}
-                    },
-                    "required": ["title", "required_skills", "description"]
-                }
-            }
-        ],
+        functions=[PARSE_JOB_POSTING_FUNCTION],
         function_call="auto"
     )
 
-    function_response = response.choices[0].message.function_call.arguments
-    return function_response
+@timed()
+def parse_job_posting(job_text):
+    """Extract structured job details from a job posting using LLM."""
+
+    def compute():
+        return function_arguments(chat_completion(operation="parse_job_posting", **parse_job_posting_request(job_text)))
 
+    return get_result_cache().get_or_compute("parse_job_posting", job_text, MODEL, PARSE_JOB_POSTING_FUNCTION, compute)
 
-def match_candidate_to_job(candidate, job):
-    """Match a candidate to a job and return a match score, missing skills, and summary."""
-    
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+@timed()
+async def aparse_job_posting(job_text):
+    """Async version of :func:`parse_job_posting`."""
 
+    async def compute():
+        return function_arguments(await achat_completion(operation="parse_job_posting", **parse_job_posting_request(job_text)))
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    return await get_result_cache().aget_or_compute("parse_job_posting", job_text, MODEL, PARSE_JOB_POSTING_FUNCTION, compute)
+
+
+def resolve_match_mode(mode=None):
+    return mode or getattr(settings, "MATCH_MODE", "hybrid")
+
+
+def plan_match(candidate, job, mode=None):
+    """Score locally and decide what, if anything, to ask the LLM.
+
+    Returns ``(result, action)`` where action is ``"llm"`` (full LLM match),
+    ``"summary"`` (LLM writes the summary only) or ``None``.
+    """
+    mode = resolve_match_mode(mode)
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown match mode: {mode!r}")
+
+    if mode == "llm":
+        return None, "llm"
+
+    result = local_match(candidate, job)
+    if mode == "hybrid":
+        low, high = getattr(settings, "MATCH_BORDERLINE", (40, 70))
+        if is_borderline(result, low, high):
+            return None, "llm"
+        if getattr(settings, "MATCH_LLM_SUMMARY", False):
+            return result, "summary"
+
+    return result, None
+
+
+@timed()
+def match_candidate_to_job(candidate, job, mode=None, refresh=False):
+    """Match a candidate to a job and return a match score, missing skills, and summary.
+
+    ``mode`` (default ``settings.MATCH_MODE``) picks the engine: ``local`` scores
+    skills without the LLM, ``llm`` always asks the model, and ``hybrid`` only asks
+    the model when the local score is borderline. ``refresh`` bypasses the
+    LLM result cache.
+    """
+    result, action = plan_match(candidate, job, mode)
+    try:
+        if action == "llm":
+            return llm_match_candidate_to_job(candidate, job, refresh)
+        if action == "summary":
+            result["summary"] = summarize_match(candidate, job, result, refresh)
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, using the local match score")
+        result = result or local_match(candidate, job)
+    return json.dumps(result)
+
+
+@timed()
+async def amatch_candidate_to_job(candidate, job, mode=None, refresh=False):
+    """Async version of :func:`match_candidate_to_job`."""
+    result, action = plan_match(candidate, job, mode)
+    try:
+        if action == "llm":
+            return await allm_match_candidate_to_job(candidate, job, refresh)
+        if action == "summary":
+            result["summary"] = await asummarize_match(candidate, job, result, refresh)
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, using the local match score")
+        result = result or local_match(candidate, job)
+    return json.dumps(result)
+
+
+def prompt_payload(candidate, job):
+    """Cache payload for a candidate/job prompt: only what the model actually sees."""
+    return {"candidate": compact_candidate(candidate), "job": compact_job(job)}
+
+
+def match_request(candidate, job):
+    return dict(
+        model=MODEL,
         messages=[
             {"role": "system", "content": "You are a job matching assistant."},
-            {"role": "user", "content": f"Match this candidate {candidate} with job {job}."}
+            {"role": "user", "content": match_prompt(candidate, job)}
         ],
-        functions=[
+        functions=[MATCH_CANDIDATE_FUNCTION],
+        function_call="auto"
+    )
+
+
+@timed()
+def llm_match_candidate_to_job(candidate, job, refresh=False):
+    """Ask the LLM to match a candidate to a job."""
+
+    def compute():
+        return function_arguments(chat_completion(operation="match", **match_request(candidate, job)))
+
+    payload = prompt_payload(candidate, job)
+    return get_result_cache().get_or_compute("match_candidate_to_job", payload, MODEL, MATCH_CANDIDATE_FUNCTION, compute, refresh)
+
+
+@timed()
+async def allm_match_candidate_to_job(candidate, job, refresh=False):
+    async def compute():
+        return function_arguments(await achat_completion(operation="match", **match_request(candidate, job)))
+
+    payload = prompt_payload(candidate, job)
+    return await get_result_cache().aget_or_compute("match_candidate_to_job", payload, MODEL, MATCH_CANDIDATE_FUNCTION, compute, refresh)
+
+
+def match_batch_settings():
+    options = dict(MATCH_BATCH_DEFAULTS)
+    options.update(getattr(settings, "MATCH_BATCH", {}))
+    return options
+
+
+def batch_match_request(candidate, jobs):
+    return dict(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": "You are a job matching assistant. Assess the candidate against every numbered job."},
+            {"role": "user", "content": batch_match_prompt(candidate, jobs)}
+        ],
+        functions=[MATCH_CANDIDATE_BATCH_FUNCTION],
+        function_call={"name": "match_candidate_to_jobs"}
+    )
+
+
+def plan_batches(candidate, jobs, options=None):
+    """Split job indexes into batches whose estimated size fits the token budget."""
+    options = options or match_batch_settings()
+    fixed = estimate_tokens(json.dumps(MATCH_CANDIDATE_BATCH_FUNCTION)) + estimate_tokens(to_json(compact_candidate(candidate)))
+    batches, batch, used = [], [], fixed
+    for index, job in enumerate(jobs):
+        cost = estimate_tokens(to_json(compact_job(job))) + options["OUTPUT_TOKENS_PER_JOB"]
+        if batch and (used + cost > options["TOKEN_BUDGET"] or len(batch) >= options["MAX_JOBS"]):
+            batches.append(batch)
+            batch, used = [], fixed
+        batch.append(index)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def valid_match(item):
+    return (
+        isinstance(item, dict)
+        and isinstance(item.get("match_score"), (int, float))
+        and 0 <= item["match_score"] <= 100
+        and isinstance(item.get("missing_skills"), list)
+        and isinstance(item.get("summary"), str)
+    )
+
+
+@timed()
+def llm_match_batch(candidate, jobs):
+    """Ask the LLM to score one candidate against several jobs in a single call.
+
+    Returns ``{index: result}`` for the well-formed items only.
+    """
+    response = chat_completion(operation="match_batch", **batch_match_request(candidate, jobs))
+    function_call = response.choices[0].message.function_call
+    try:
+        items = json.loads(function_call.arguments).get("matches", []) if function_call else []
+    except (json.JSONDecodeError, AttributeError):
+        items = []
+
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        index = item.get("job_index") if isinstance(item, dict) else None
+        if isinstance(index, int) and 0 <= index < len(jobs) and index not in results and valid_match(item):
+            results[index] = {key: item[key] for key in ("match_score", "missing_skills", "summary")}
+    return results
+
+
+@timed()
+def llm_match_candidate_to_jobs(candidate, jobs, refresh=False):
+    """LLM-match a candidate against many jobs, packing several jobs per completion.
+
+    Results are cached per candidate/job pair under the same key as
+    :func:`llm_match_candidate_to_job`; jobs the batch answer leaves out or
+    garbles are matched one by one, and those the LLM budget cannot cover get
+    their local score. Returns results in the order of ``jobs``. ``refresh``
+    ignores cached results and replaces them.
+    """
+    cache = get_result_cache()
+    keys = [
+        make_key("match_candidate_to_job", prompt_payload(candidate, job), MODEL, MATCH_CANDIDATE_FUNCTION)
+        for job in jobs
+    ]
+    results = [None] * len(jobs)
+    if cache.enabled and not refresh:
+        for index, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None:
+                results[index] = json.loads(cached) if isinstance(cached, str) else cached
+
+    def match_or_local(job):
+        try:
+            return llm_match_candidate_to_job(candidate, job, refresh)
+        except BudgetExceeded:
+            logger.warning("LLM budget exceeded, using the local match score")
+            return local_match(candidate, job)
+
+    todo = [index for index, result in enumerate(results) if result is None]
+    batches = [[todo[i] for i in batch] for batch in plan_batches(candidate, [jobs[i] for i in todo])]
+    options = match_batch_settings()
+
+    def run_batch(batch):
+        try:
+            return batch, llm_match_batch(candidate, [jobs[i] for i in batch])
+        except BudgetExceeded:
+            return batch, {}
+        except Exception:
+            logger.warning("Batched match failed, falling back to single matches", exc_info=True)
+            return batch, {}
+
+    with ThreadPoolExecutor(max_workers=min(len(batches), options["WORKERS"]) or 1) as executor:
+        for batch, batch_results in executor.map(in_context(run_batch), batches):
+            for position, index in enumerate(batch):
+                result = batch_results.get(position)
+                if result is not None:
+                    results[index] = result
+                    if cache.enabled:
+                        cache.set(keys[index], json.dumps(result))
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            logger.info("Falling back to single matches for %d of %d jobs", len(missing), len(jobs))
+        fallbacks = executor.map(in_context(lambda index: match_or_local(jobs[index])), missing)
+        for index, result in zip(missing, fallbacks):
+            results[index] = json.loads(result) if isinstance(result, str) else result
+
+    return results
+
+
+@timed()
+def match_candidate_to_jobs(candidate, jobs, mode=None, refresh=False):
+    """Batched :func:`match_candidate_to_job`: one result dict per job, in order.
+
+    Jobs that need the LLM are scored together by :func:`llm_match_candidate_to_jobs`.
+    """
+    results, llm_jobs = [], []
+    for index, job in enumerate(jobs):
+        result, action = plan_match(candidate, job, mode)
+        if action == "llm":
+            llm_jobs.append(index)
+        elif action == "summary":
+            try:
+                result["summary"] = summarize_match(candidate, job, result, refresh)
+            except BudgetExceeded:
+                logger.warning("LLM budget exceeded, keeping the local summary")
+        results.append(result)
+
+    if llm_jobs:
+        for index, result in zip(llm_jobs, llm_match_candidate_to_jobs(candidate, [jobs[i] for i in llm_jobs], refresh)):
+            results[index] = result
+    return results
+
+
+def summary_request(candidate, job, result):
+    return dict(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": "You are a job matching assistant. Reply with two sentences."},
             {
-                "name": "match_candidate_to_job",
-                "description": "Match a candidate to a job and return relevant details.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "match_score": {"type": "integer", "description": "Percentage score of how well the candidate fits the job."},
-                        "missing_skills": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of skills missing from the candidate's profile."
-                        },
-                        "summary": {"type": "string", "description": "Short summary of the match assessment."}
-                    },
-                    "required": ["match_score", "missing_skills", "summary"]
-                }
+                "role": "user",
+                "content": summary_prompt(candidate, job, result)
             }
         ],
-        function_call="auto"
+        max_tokens=120
     )
 
-    function_response = response.choices[0].message.function_call.arguments
-    return function_response
 
+@timed()
+def summarize_match(candidate, job, result, refresh=False):
+    """Write a short free-text summary for a locally scored match."""
 
-def generate_cover_letter(candidate, job):
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
+    def compute():
+        return chat_completion(operation="summarize_match", **summary_request(candidate, job, result)).choices[0].message.content.strip()
+
+    payload = dict(prompt_payload(candidate, job), score=result["match_score"])
+    return get_result_cache().get_or_compute("summarize_match", payload, MODEL, None, compute, refresh)
+
+
+@timed()
+async def asummarize_match(candidate, job, result, refresh=False):
+    async def compute():
+        response = await achat_completion(operation="summarize_match", **summary_request(candidate, job, result))
+        return response.choices[0].message.content.strip()
+
+    payload = dict(prompt_payload(candidate, job), score=result["match_score"])
+    return await get_result_cache().aget_or_compute("summarize_match", payload, MODEL, None, compute, refresh)
+
+
+# Word and token caps for the short letter written when the LLM budget is low.
+SHORT_COVER_LETTER_WORDS = 120
+SHORT_COVER_LETTER_TOKENS = 200
+
+
+def cover_letter_request(candidate, job, short=False):
+    request = dict(
+        model=MODEL,
         messages=[
             {"role": "system", "content": "You are an expert resume writer and career advisor."},
             {
                 "role": "user",
-                "content": f"Generate a professional cover letter for the following candidate based on the given job description. \n\nCandidate: {candidate}\n\nJob: {job}"
+                "content": cover_letter_prompt(candidate, job)
             }
         ]
     )
+    if short:
+        request["messages"][0]["content"] += f" Keep the letter under {SHORT_COVER_LETTER_WORDS} words."
+        request["max_tokens"] = SHORT_COVER_LETTER_TOKENS
+    return request
+
+
+@timed()
+def generate_cover_letter(candidate, job):
+    """Write a cover letter, cached per candidate/job pair.
+
+    When the LLM budget cannot cover a full letter a short, uncached one is
+    written instead.
+    """
+
+    def compute():
+        return chat_completion(operation="cover_letter", **cover_letter_request(candidate, job)).choices[0].message.content.strip()
+
+    payload = prompt_payload(candidate, job)
+    try:
+        return get_result_cache().get_or_compute("cover_letter", payload, MODEL, None, compute)
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, writing a short cover letter")
+        response = chat_completion(operation="cover_letter_short", **cover_letter_request(candidate, job, short=True))
+        return response.choices[0].message.content.strip()
+
+
+@timed()
+async def agenerate_cover_letter(candidate, job):
+    async def compute():
+        response = await achat_completion(operation="cover_letter", **cover_letter_request(candidate, job))
+        return response.choices[0].message.content.strip()
+
+    payload = prompt_payload(candidate, job)
+    try:
+        return await get_result_cache().aget_or_compute("cover_letter", payload, MODEL, None, compute)
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, writing a short cover letter")
+        response = await achat_completion(operation="cover_letter_short", **cover_letter_request(candidate, job, short=True))
+        return response.choices[0].message.content.strip()
+
+
+@timed()
+def stream_cover_letter(candidate, job):
+    """Yield a cover letter as the model writes it.
+
+    A letter already in the cache is yielded in one piece; a finished stream is
+    cached under the same key as :func:`generate_cover_letter`. When the LLM
+    budget cannot cover a full letter a short, uncached one is streamed.
+    """
+    cache = get_result_cache()
+    key = make_key("cover_letter", prompt_payload(candidate, job), MODEL)
+    letter = cache.get(key) if cache.enabled else None
+    if letter is not None:
+        yield letter
+        return
+
+    parts = []
+    try:
+        # The budget is checked before the first delta, so nothing was sent yet.
+        for delta in stream_chat_completion(operation="cover_letter", **cover_letter_request(candidate, job)):
+            parts.append(delta)
+            yield delta
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, writing a short cover letter")
+        yield from stream_chat_completion(operation="cover_letter_short", **cover_letter_request(candidate, job, short=True))
+        return
+
+    letter = "".join(parts).strip()
+    if letter and cache.enabled:
+        cache.set(key, letter)
+
+
+@timed()
+async def astream_cover_letter(candidate, job):
+    cache = get_result_cache()
+    key = make_key("cover_letter", prompt_payload(candidate, job), MODEL)
+    letter = await asyncio.to_thread(cache.get, key) if cache.enabled else None
+    if letter is not None:
+        yield letter
+        return
+
+    parts = []
+    try:
+        async for delta in astream_chat_completion(operation="cover_letter", **cover_letter_request(candidate, job)):
+            parts.append(delta)
+            yield delta
+    except BudgetExceeded:
+        logger.warning("LLM budget exceeded, writing a short cover letter")
+        async for delta in astream_chat_completion(operation="cover_letter_short", **cover_letter_request(candidate, job, short=True)):
+            yield delta
+        return
+
+    letter = "".join(parts).strip()
+    if letter and cache.enabled:
+        await asyncio.to_thread(cache.set, key, letter)
+
+
+def match_result_fields(match_result):
+    """Normalize a matcher response (JSON string or dict) into score, missing skills and summary."""
+    if isinstance(match_result, str):
+        match_result = json.loads(match_result)
+
+    match_score = match_result.get("match_score", 0)
+    missing_skills = match_result.get("missing_skills", [])
+    summary = match_result.get("summary", "No summary available")
+
+    if not isinstance(missing_skills, list):
+        missing_skills = [missing_skills]
+    return match_score, missing_skills, summary
+
+
+def match_request_error(candidate_data, job_data, mode=None):
+    """Validation error message for a /api/match/ body, or None if it is usable."""
+    if not candidate_data.get("name", "").strip():
+        return "Candidate name is missing!"
+    if not job_data.get("title", "").strip() or not job_data.get("company", "").strip():
+        return "Job title or company name is missing!"
+    if mode and mode not in MATCH_MODES:
+        return f"Unknown match mode: {mode}"
+    return None
+
+
+def find_stored_match(candidate_data, job_data, mode=None, force_rescore=False):
+    """Get or create the candidate and job of a match request and look up its stored result.
+
+    Returns ``(candidate, job, input_hash, match_entry)``; ``match_entry`` is
+    the MatchResult scored from these exact inputs, or None when the pair
+    has to be scored (always with ``force_rescore``).
+    """
+    from .imports import job_content_hash
+    from .models import CandidateProfile, JobPosting, MatchResult
+
+    #  Find Candidate (Use Name as Unique Identifier)
+    candidate, created = CandidateProfile.objects.get_or_create(
+        name=candidate_data["name"].strip(),
+        defaults={
+            "skills": candidate_data.get("skills", []),
+            "education": candidate_data.get("education", []),
+            "work_experience": candidate_data.get("work_experience", []),
+            "resume_file": candidate_data.get("resume_file", None),
+        }
+    )
+
+    #  Find Job (Use Title + Company as Unique Identifier), or the stored
+    #  posting with the same content in another case or spacing
+    content_hash = job_content_hash(job_data)
+    job = JobPosting.objects.filter(content_hash=content_hash).first()
+    if job is None:
+        try:
+            with transaction.atomic():
+                job, created = JobPosting.objects.get_or_create(
+                    title=job_data["title"].strip(),
+                    company=job_data["company"].strip(),
+                    defaults={
+                        "required_skills": job_data.get("required_skills", []),
+                        "description": job_data.get("description", ""),
+                    }
+                )
+        except IntegrityError:
+            # Stored by a concurrent request since the lookup above
+            job = JobPosting.objects.get(content_hash=content_hash)
+
+    #  Reuse the stored result when these exact inputs were scored before
+    input_hash = match_input_hash(candidate_data, job_data, resolve_match_mode(mode))
+    match_entry = None
+    if not force_rescore:
+        match_entry = MatchResult.objects.filter(candidate=candidate, job=job, input_hash=input_hash).first()
+    return candidate, job, input_hash, match_entry
+
+
+def store_match(candidate, job, input_hash, match_result, mode=None):
+    """Save a matcher response as the one MatchResult per candidate, job and inputs."""
+    from .models import MatchResult
+
+    match_score, missing_skills, summary = match_result_fields(match_result)
+    match_entry, created = MatchResult.objects.update_or_create(
+        candidate=candidate,
+        job=job,
+        input_hash=input_hash,
+        defaults={
+            "match_score": match_score,
+            "missing_skills": missing_skills,
+            "summary": summary,
+            "mode": resolve_match_mode(mode),
+            "candidate_revision": candidate.revision,
+            "job_revision": job.revision,
+            "created_at": timezone.now(),
+        }
+    )
+    return match_entry
+
 
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+def match_response(candidate, job, match_entry, reused):
+    """Body of a /api/match/ response."""
+    return {
+        "match_score": match_entry.match_score,
+        "missing_skills": match_entry.missing_skills,
+        "summary": match_entry.summary,
+        "candidate_name": candidate.name,
+        "job_title": job.title,
+        "company": job.company,
+        "reused": reused
+    }
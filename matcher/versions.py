@@ -0,0 +1,46 @@
+import time
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+# Change counters for the matcher tables.
+#
+# The counters are DataVersion rows, so a bump by any process (a worker,
+# "manage.py import_jobs", the rescoring worker) invalidates the in-memory
+# indexes and listing ETags of every other one. Bumps run in the writer's
+# transaction, so readers never see a new version without the new data.
+#
+# Each counter starts from a millisecond timestamp rather than zero so a
+# reset table can never hand out a version that was already seen. The time
+# of the last bump is kept next to it for Last-Modified headers.
+
+
+def _row(name):
+    state = DataVersion.objects.filter(name=name).values_list("version", "modified_at").first()
+    if state is None:
+        row, _ = DataVersion.objects.get_or_create(name=name, defaults={"version": int(time.time() * 1000)})
+        state = row.version, row.modified_at
+    return state
+
+
+def get_version(name):
+    return _row(name)[0]
+
+
+def get_last_modified(name):
+    """Unix time of the last bump (or of the first lookup, if none is recorded)."""
+    return int(_row(name)[1].timestamp())
+
+
+def get_version_and_modified(name):
+    """``(get_version(name), get_last_modified(name))`` from one query."""
+    version, modified_at = _row(name)
+    return version, int(modified_at.timestamp())
+
+
+def bump_version(name):
+    if not DataVersion.objects.filter(name=name).update(version=F("version") + 1, modified_at=timezone.now()):
+        _row(name)
+        DataVersion.objects.filter(name=name).update(version=F("version") + 1, modified_at=timezone.now())
@@ -1,25 +1,78 @@
+import codecs
+import hashlib
+import logging
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import MatchResult, CandidateProfile, JobPosting
+from .models import MatchResult, CandidateProfile, JobPosting, ResumeJob, UsageRecord
 import json 
 from rest_framework import status
-from .utils import parse_resume, match_candidate_to_job, parse_job_posting, generate_cover_letter
-from django.core.files.storage import default_storage
-from .serializers import JobPostingSerializer
+from rest_framework.settings import api_settings
+from .utils import parse_resume, resume_source, match_candidate_to_job, match_candidate_to_jobs, match_result_fields, resolve_match_mode, parse_job_posting, generate_cover_letter, stream_cover_letter, find_stored_match, match_request_error, match_response, store_match
+from .streaming import EventStreamRenderer, event_stream_response, sse_events, wants_stream
+from .storage import read_upload, should_store_uploads, store_resume_file
+from .serializers import JobPostingSerializer, ResumeJobSerializer
+from .resume_queue import SUPPORTED_FILE_TYPES, submit_resume
+from .scoring import MATCH_MODES, local_match, match_input_hash
+from .ranking import get_job_index, rank_candidates_for_job
+from .embeddings import candidate_document, get_semantic_index
+from .reports import after_cursor, csv_lines, encode_cursor, export_rows, filter_match_results, format_result, missing_skill_counts, ndjson_lines, result_values, score_summary
+from .imports import FORMATS, JobImporter, import_settings, job_content_hash, read_postings
+from .metrics import get_registry
+from .usage import filter_usage, get_budget, usage_rollup
+from .search import search_jobs
+from .versions import get_version_and_modified
+
+logger = logging.getLogger(__name__)
 
 class ResumeUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
         file = request.FILES["resume"]
-        file_path = default_storage.save(file.name, file)
-        file_type = file.name.split(".")[-1]
+        file_type = file.name.split(".")[-1].lower()
+        if file_type not in SUPPORTED_FILE_TYPES:
+            return Response({"error": "Only PDF and DOCX resumes are supported."}, status=status.HTTP_400_BAD_REQUEST)
 
-        parsed_data = parse_resume(file_path, file_type)
+        parsed_data = parse_resume(resume_source(file), file_type)
+
+        if should_store_uploads():
+            store_resume_file(read_upload(file), file_type)
         return Response(parsed_data)
 
 
+class ResumeJobView(APIView):
+    """Queue a resume for background parsing and return a job id right away."""
+
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        file = request.FILES.get("resume")
+        if file is None:
+            return Response({"error": "Resume file missing"}, status=status.HTTP_400_BAD_REQUEST)
+        if file.name.rsplit(".", 1)[-1].lower() not in SUPPORTED_FILE_TYPES:
+            return Response({"error": "Only PDF and DOCX resumes are supported."}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = submit_resume(file)
+        return Response(ResumeJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ResumeJobStatusView(APIView):
+    def get(self, request, job_id):
+        job = ResumeJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"error": "Resume job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ResumeJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
 class JobParsingView(APIView):
     def post(self, request):
         job_text = request.data.get("job_text", "")
@@ -35,78 +88,129 @@ class MatchView(APIView):
         try:
             candidate_data = request.data.get("candidate", {})
             job_data = request.data.get("job", {})
+            match_mode = request.data.get("mode")
 
-            candidate_name = candidate_data.get("name", "").strip()
-            job_title = job_data.get("title", "").strip()
-            company_name = job_data.get("company", "").strip()
-
-            if not candidate_name:
-                return Response({"error": "Candidate name is missing!"}, status=status.HTTP_400_BAD_REQUEST)
-            if not job_title or not company_name:
-                return Response({"error": "Job title or company name is missing!"}, status=status.HTTP_400_BAD_REQUEST)
-
-            #  Find Candidate (Use Name as Unique Identifier)
-            candidate, created = CandidateProfile.objects.get_or_create(
-                name=candidate_name,
-                defaults={
-                    "skills": candidate_data.get("skills", []),
-                    "education": candidate_data.get("education", []),
-                    "work_experience": candidate_data.get("work_experience", []),
-                    "resume_file": candidate_data.get("resume_file", None),
-                }
-            )
+            error = match_request_error(candidate_data, job_data, match_mode)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-            #  Find Job (Use Title + Company as Unique Identifier)
-            job, created = JobPosting.objects.get_or_create(
-                title=job_title,
-                company=company_name,
-                defaults={
-                    "required_skills": job_data.get("required_skills", []),
-                    "description": job_data.get("description", ""),
-                }
-            )
+            force_rescore = bool(request.data.get("force_rescore"))
+            candidate, job, input_hash, match_entry = find_stored_match(candidate_data, job_data, match_mode, force_rescore)
+            reused = match_entry is not None
+
+            if not reused:
+                #  Call Matching Logic
+                match_result = match_candidate_to_job(candidate_data, job_data, mode=match_mode, refresh=force_rescore)
+
+                # ✅ Save to database (one row per candidate, job and inputs)
+                match_entry = store_match(candidate, job, input_hash, match_result, match_mode)
 
-            #  Call Matching Logic
-            match_result = match_candidate_to_job(candidate_data, job_data)
-            print("Raw match_result:", match_result) 
+            return Response(match_response(candidate, job, match_entry, reused), status=status.HTTP_200_OK)
 
-            if isinstance(match_result, str):  
-                match_result = json.loads(match_result)  
+        except json.JSONDecodeError as e:
+            return Response({"error": f"JSON Decode Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            logger.exception("Matching failed")
+            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MatchBatchView(APIView):
+    """Match one candidate against many stored jobs, several jobs per LLM call."""
+
+    MAX_JOBS = 100
+
+    def post(self, request):
+        candidate_data = request.data.get("candidate", {})
+        job_ids = request.data.get("job_ids", [])
+        match_mode = request.data.get("mode")
+
+        candidate_name = candidate_data.get("name", "").strip() if isinstance(candidate_data, dict) else ""
+        if not candidate_name:
+            return Response({"error": "Candidate name is missing!"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(job_ids, list) or not job_ids or not all(isinstance(job_id, int) for job_id in job_ids):
+            return Response({"error": "job_ids must be a non-empty list of job ids."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(job_ids) > self.MAX_JOBS:
+            return Response({"error": f"At most {self.MAX_JOBS} jobs per request."}, status=status.HTTP_400_BAD_REQUEST)
+        if match_mode and match_mode not in MATCH_MODES:
+            return Response({"error": f"Unknown match mode: {match_mode}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        jobs = JobPosting.objects.in_bulk(job_ids)
+        jobs = [jobs[job_id] for job_id in dict.fromkeys(job_ids) if job_id in jobs]
+        if not jobs:
+            return Response({"error": "No matching jobs found."}, status=status.HTTP_404_NOT_FOUND)
+
+        job_data = [
+            {"title": job.title, "company": job.company, "required_skills": job.required_skills, "description": job.description}
+            for job in jobs
+        ]
 
-            match_score = match_result.get("match_score", 0)
-            missing_skills = match_result.get("missing_skills", [])  
-            summary = match_result.get("summary", "No summary available")
+        candidate, created = CandidateProfile.objects.get_or_create(
+            name=candidate_name,
+            defaults={
+                "skills": candidate_data.get("skills", []),
+                "education": candidate_data.get("education", []),
+                "work_experience": candidate_data.get("work_experience", []),
+                "resume_file": candidate_data.get("resume_file", None),
+            }
+        )
 
-            if not isinstance(missing_skills, list):
-                missing_skills = [missing_skills]  
+        # Only jobs without a stored result for these exact inputs are scored
+        mode = resolve_match_mode(match_mode)
+        input_hashes = [match_input_hash(candidate_data, data, mode) for data in job_data]
+        force_rescore = bool(request.data.get("force_rescore"))
+        stored = {}
+        if not force_rescore:
+            stored = {
+                (entry.job_id, entry.input_hash): entry
+                for entry in MatchResult.objects.filter(
+                    candidate=candidate, job__in=jobs, input_hash__in=input_hashes
+                )
+            }
+        todo = [index for index, job in enumerate(jobs) if (job.id, input_hashes[index]) not in stored]
+        match_results = match_candidate_to_jobs(candidate_data, [job_data[index] for index in todo], mode=match_mode, refresh=force_rescore)
 
-            # ✅ Save to database (Ensure candidate and job are linked)
-            match_entry = MatchResult.objects.create(
+        entries, results = [], []
+        for index, match_result in zip(todo, match_results):
+            match_score, missing_skills, summary = match_result_fields(match_result)
+            entries.append(MatchResult(
                 candidate=candidate,
-                job=job,
+                job=jobs[index],
                 match_score=match_score,
                 missing_skills=missing_skills,
-                summary=summary
-            )
+                summary=summary,
+                input_hash=input_hashes[index],
+                mode=mode,
+                candidate_revision=candidate.revision,
+                job_revision=jobs[index].revision
+            ))
+        MatchResult.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["candidate", "job", "input_hash"],
+            update_fields=["match_score", "missing_skills", "summary", "mode", "candidate_revision", "job_revision", "created_at"],
+        )
 
-            return Response({
-                "match_score": match_entry.match_score,
-                "missing_skills": match_entry.missing_skills,
-                "summary": match_entry.summary,
-                "candidate_name": candidate.name,
-                "job_title": job.title,
-                "company": job.company
-            }, status=status.HTTP_200_OK)
+        jobs_by_id = {job.id: job for job in jobs}
+        for reused, batch in ((True, stored.values()), (False, entries)):
+            for entry in batch:
+                job = jobs_by_id[entry.job_id]
+                results.append({
+                    "job_id": job.id,
+                    "job_title": job.title,
+                    "company": job.company,
+                    "match_score": entry.match_score,
+                    "missing_skills": entry.missing_skills,
+                    "summary": entry.summary,
+                    "reused": reused,
+                })
 
-        except json.JSONDecodeError as e:
-            return Response({"error": f"JSON Decode Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            import traceback
-            print(traceback.format_exc())  
-            return Response({"error": f"Unexpected error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        results.sort(key=lambda result: -result["match_score"])
+        return Response({"candidate_name": candidate.name, "results": results}, status=status.HTTP_200_OK)
 
 
 class CoverLetterView(APIView):
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer]
+
     def post(self, request):
         candidate = request.data.get("candidate")
         job = request.data.get("job")
@@ -114,39 +218,420 @@ class CoverLetterView(APIView):
         if not candidate or not job:
             return Response({"error": "Candidate and job data are required."}, status=400)
 
+        if wants_stream(request, request.data):
+            return event_stream_response(sse_events(stream_cover_letter(candidate, job)))
+
         cover_letter = generate_cover_letter(candidate, job)
         return Response({"cover_letter": cover_letter})
 
 
+def filter_jobs(jobs, params):
+    """Apply the ``company`` and ``skill``/``skill_match`` query filters to a JobPosting queryset."""
+    companies = [company.strip() for company in params.getlist("company") if company.strip()]
+    if companies:
+        match_any = Q()
+        for company in companies:
+            match_any |= Q(company__iexact=company)
+        jobs = jobs.filter(match_any)
+    skills = [skill for skill in params.getlist("skill") if skill.strip()]
+    if skills:
+        skill_match = params.get("skill_match", "any")
+        if skill_match not in ("any", "all"):
+            raise ValueError("skill_match must be 'any' or 'all'.")
+        jobs = jobs.with_all_skills(skills) if skill_match == "all" else jobs.with_any_skills(skills)
+    return jobs
+
+
 class JobListView(APIView):
+    """List job postings a page at a time, newest id last.
+
+    Pages are keyed on id: pass the ``X-Next-Cursor`` header of one page as
+    ``cursor`` to get the next. ``fields`` picks columns (``id`` is always
+    included); ``company`` and ``skill`` may repeat and match any of the given
+    values (``skill_match=all`` requires every skill); ``search`` looks in
+    title, company and description. Responses carry an ETag and
+    Last-Modified tied to the jobs version counter, which is stored in the
+    database, so unchanged lists come back as 304 and a write by any process
+    invalidates them.
+    """
+
+    FIELDS = ("id", "title", "company", "required_skills", "description")
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
     def get(self, request):
-        jobs = JobPosting.objects.all().values()
-        return Response(list(jobs), status=status.HTTP_200_OK)
+        etag, last_modified = self.validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        query = request.query_params.get("q", "").strip()
+        if query:
+            response = self.semantic_search(request, query)
+        else:
+            response = self.list_jobs(request)
+
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            response["Cache-Control"] = "no-cache"
+        return response
+
+    def validators(self, request):
+        params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+        digest = hashlib.sha256(json.dumps(params).encode()).hexdigest()[:16]
+        version, last_modified = get_version_and_modified("jobs")
+        return f'"{version}-{digest}"', last_modified
+
+    def list_jobs(self, request):
+        params = request.query_params
+        try:
+            limit = int(params.get("limit", self.DEFAULT_LIMIT))
+            cursor = int(params.get("cursor", 0))
+            ids = [int(job_id) for job_id in params.get("ids", "").split(",") if job_id.strip()]
+        except ValueError:
+            return Response({"error": "limit, cursor and ids must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.MAX_LIMIT:
+            return Response({"error": f"limit must be between 1 and {self.MAX_LIMIT}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = [field.strip() for field in params.get("fields", "").split(",") if field.strip()] or list(self.FIELDS)
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            return Response({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+        if "id" not in fields:
+            fields.insert(0, "id")
+
+        jobs = JobPosting.objects.filter(id__gt=cursor).order_by("id")
+        if ids:
+            jobs = jobs.filter(id__in=ids)
+        search = params.get("search", "").strip()
+        if search:
+            jobs = jobs.filter(Q(title__icontains=search) | Q(company__icontains=search) | Q(description__icontains=search))
+        try:
+            jobs = filter_jobs(jobs, params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = list(jobs.values(*fields)[:limit + 1])
+
+        response = Response(page[:limit], status=status.HTTP_200_OK)
+        if len(page) > limit:
+            next_cursor = page[limit - 1]["id"]
+            query = params.copy()
+            query["cursor"] = next_cursor
+            response["X-Next-Cursor"] = str(next_cursor)
+            response["Link"] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+        return response
+
+    def semantic_search(self, request, query):
+        try:
+            k = min(max(int(request.query_params.get("k", 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "k must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        job_ids, similarities = get_semantic_index("jobs").search(query, k=k)
+        jobs = JobPosting.objects.in_bulk(job_ids.tolist())
+        results = []
+        for job_id, similarity in zip(job_ids.tolist(), similarities.tolist()):
+            if job_id in jobs:
+                job = jobs[job_id]
+                results.append({
+                    "id": job.id,
+                    "title": job.title,
+                    "company": job.company,
+                    "required_skills": job.required_skills,
+                    "description": job.description,
+                    "similarity": round(similarity, 4),
+                })
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class JobSearchView(APIView):
+    """Full-text search over job title, company and description, best match first.
+
+    ``q`` holds the words to find (all must match; end a word with ``*`` for
+    a prefix, or pass ``prefix=true`` to treat the last word as one).
+    ``company``, ``skill`` and ``skill_match`` filter as in job listings.
+    """
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(params.get("limit", self.DEFAULT_LIMIT))
+            offset = int(params.get("offset", 0))
+        except ValueError:
+            return Response({"error": "limit and offset must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.MAX_LIMIT or offset < 0:
+            return Response({"error": f"limit must be between 1 and {self.MAX_LIMIT} and offset not negative."}, status=status.HTTP_400_BAD_REQUEST)
+
+        jobs = None
+        if any(key in params for key in ("company", "skill")):
+            try:
+                jobs = filter_jobs(JobPosting.objects.all(), params)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        prefix = params.get("prefix", "").lower() in ("1", "true", "yes")
+        results = search_jobs(query, limit=limit, offset=offset, prefix=prefix, jobs=jobs)
+        return Response(results, status=status.HTTP_200_OK)
+
 
-    
 class AddJobView(APIView):
     def post(self, request):
         serializer = JobPostingSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                existing = JobPosting.objects.filter(content_hash=job_content_hash(serializer.validated_data)).first()
+                return Response(
+                    {"error": "An identical job posting already exists.", "id": existing.id if existing else None},
+                    status=status.HTTP_409_CONFLICT,
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    
+
+
+class JobImportView(APIView):
+    """Bulk-import job postings from NDJSON or CSV.
+
+    Send the file as the request body (``Content-Type: application/x-ndjson``
+    or ``text/csv``) or upload it as ``file``, named ``.ndjson``, ``.jsonl``
+    or ``.csv``. Returns how many postings were created, skipped as
+    duplicates or rejected, with the first row errors.
+    """
+
+    CONTENT_TYPES = {"application/x-ndjson": "ndjson", "application/jsonl": "ndjson", "text/csv": "csv"}
+    EXTENSIONS = {"ndjson": "ndjson", "jsonl": "ndjson", "csv": "csv"}
+
+    def post(self, request):
+        upload = request.FILES.get("file") if request.content_type.startswith("multipart/") else None
+        if upload is not None:
+            file_format = self.EXTENSIONS.get(upload.name.rsplit(".", 1)[-1].lower())
+            source = upload
+        else:
+            file_format = self.CONTENT_TYPES.get(request.content_type.split(";")[0].strip().lower())
+            source = request.stream or []
+        if file_format is None:
+            return Response(
+                {"error": f"Send NDJSON or CSV ({', '.join(FORMATS)}) as the body or as a file upload."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        max_rows = import_settings()["MAX_API_ROWS"]
+        rows = list(islice(read_postings(codecs.iterdecode(source, "utf-8"), file_format), max_rows + 1))
+        if len(rows) > max_rows:
+            return Response(
+                {"error": f"At most {max_rows} postings per request; use manage.py import_jobs for larger files."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        report = JobImporter().run(rows)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK)
+
+
 class MatchResultListView(APIView):
+    """List match results newest first, a page at a time.
+
+    Pass the ``X-Next-Cursor`` header of one page as ``cursor`` to get the
+    next. Filter with ``candidate`` and ``job`` ids and a ``min_score`` /
+    ``max_score`` range.
+    """
+
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = int(params.get("limit", self.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.MAX_LIMIT:
+            return Response({"error": f"limit must be between 1 and {self.MAX_LIMIT}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            matches = filter_match_results(MatchResult.objects.all(), params)
+            if params.get("cursor"):
+                matches = after_cursor(matches, params["cursor"])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = list(result_values(matches.order_by("-created_at", "-id"))[:limit + 1])
+
+        response = Response([format_result(row) for row in page[:limit]], status=status.HTTP_200_OK)
+        if len(page) > limit:
+            next_cursor = encode_cursor(page[limit - 1]["created_at"], page[limit - 1]["id"])
+            query = params.copy()
+            query["cursor"] = next_cursor
+            response["X-Next-Cursor"] = next_cursor
+            response["Link"] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+        return response
+
+
+class MatchResultExportView(APIView):
+    """Stream every (filtered) match result as NDJSON or CSV, newest first."""
+
+    FORMATS = {
+        "ndjson": ("application/x-ndjson", ndjson_lines),
+        "csv": ("text/csv", csv_lines),
+    }
+
+    def get(self, request, file_format):
+        if file_format not in self.FORMATS:
+            return Response({"error": f"Unknown export format: {file_format}"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            matches = filter_match_results(MatchResult.objects.all(), request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type, lines = self.FORMATS[file_format]
+        response = StreamingHttpResponse(lines(export_rows(matches.order_by("-created_at", "-id"))), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="match_results.{file_format}"'
+        return response
+
+
+class MatchResultStatsView(APIView):
+    """Score statistics, a score histogram and the most common missing skills.
+
+    Accepts the match result filters, plus ``bucket_size`` (default 10) and
+    ``top_skills`` (default 20).
+    """
+
     def get(self, request):
-        matches = MatchResult.objects.select_related('candidate', 'job').all()
-
-        match_results = []
-        for match in matches:
-            match_results.append({
-                "candidate_name": match.candidate.name if match.candidate else "N/A",
-                "job_title": match.job.title if match.job else "N/A",
-                "company": match.job.company if match.job else "N/A",
-                "match_score": match.match_score,
-                "missing_skills": match.missing_skills,
-                "summary": match.summary,
-                "created_at": match.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        params = request.query_params
+        try:
+            matches = filter_match_results(MatchResult.objects.all(), params)
+            bucket_size = int(params.get("bucket_size", 10))
+            top_skills = int(params.get("top_skills", 20))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= bucket_size <= 100 or not 1 <= top_skills <= 100:
+            return Response({"error": "bucket_size and top_skills must be between 1 and 100."}, status=status.HTTP_400_BAD_REQUEST)
+
+        stats = score_summary(matches, bucket_size)
+        stats["missing_skills"] = missing_skill_counts(matches, top_skills)
+        return Response(stats, status=status.HTTP_200_OK)
+
+
+class RankJobsView(APIView):
+    """Rank every job posting for one candidate and return the top K."""
+
+    MAX_TOP_K = 100
+    SEMANTIC_NEIGHBOURS = 500
+
+    def post(self, request):
+        candidate_id = request.data.get("candidate_id")
+        if candidate_id is not None:
+            candidate = CandidateProfile.objects.filter(pk=candidate_id).values("id", "name", "skills").first()
+            if candidate is None:
+                return Response({"error": "Candidate not found."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            candidate = request.data.get("candidate")
+            if not isinstance(candidate, dict):
+                return Response({"error": "Provide a candidate or candidate_id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            top_k = min(int(request.data.get("top_k", 10)), self.MAX_TOP_K)
+        except (TypeError, ValueError):
+            return Response({"error": "top_k must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        companies = request.data.get("company") or []
+        if isinstance(companies, str):
+            companies = [companies]
+        must_have = request.data.get("must_have") or []
+
+        semantic = None
+        if request.data.get("semantic"):
+            if candidate_id is not None:
+                candidate = CandidateProfile.objects.filter(pk=candidate_id).values(
+                    "id", "name", "skills", "education", "work_experience"
+                ).first()
+            semantic = get_semantic_index("jobs").search(candidate_document(candidate), k=self.SEMANTIC_NEIGHBOURS)
+
+        job_ids, scores = get_job_index().rank(
+            candidate.get("skills") or [], top=top_k, companies=companies, must_have=must_have, semantic=semantic
+        )
+
+        jobs = JobPosting.objects.in_bulk(job_ids.tolist())
+        results = []
+        for job_id, score in zip(job_ids.tolist(), scores.tolist()):
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            match = local_match(candidate, {"required_skills": job.required_skills})
+            results.append({
+                "job_id": job.id,
+                "job_title": job.title,
+                "company": job.company,
+                "required_skills": job.required_skills,
+                "match_score": score,
+                "missing_skills": match["missing_skills"],
             })
 
-        return Response(match_results, status=status.HTTP_200_OK)
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class RankCandidatesView(APIView):
+    """Rank every stored candidate for one job posting, one page at a time."""
+
+    MAX_PAGE_SIZE = 100
+    MAX_RESCORE_TOP = 20
+
+    def get(self, request, job_id):
+        job = JobPosting.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), self.MAX_PAGE_SIZE)
+            rescore_top = min(max(int(request.query_params.get("rescore_top", 0)), 0), self.MAX_RESCORE_TOP)
+        except ValueError:
+            return Response({"error": "page, page_size and rescore_top must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, results = rank_candidates_for_job(job, page=page, page_size=page_size, rescore_top=rescore_top)
+        return Response({
+            "job_id": job.id,
+            "job_title": job.title,
+            "company": job.company,
+            "count": total,
+            "page": page,
+            "page_size": page_size,
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """Request, stage, database, token and cache metrics in the Prometheus text format."""
+
+    def get(self, request):
+        return HttpResponse(get_registry().render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class UsageView(APIView):
+    """LLM calls, tokens and latency from the usage ledger, with the current budget.
+
+    ``since``/``until`` bound the period (default: the last 7 days) and
+    ``group_by`` splits it by hour, day (default), endpoint, operation or model.
+    """
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            records = filter_usage(UsageRecord.objects.all(), params)
+            usage = usage_rollup(records, params.get("group_by", "day"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        budget = get_budget()
+        usage["budget"] = budget.status() if budget is not None else None
+        return Response(usage, status=status.HTTP_200_OK)